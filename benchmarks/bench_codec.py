@@ -0,0 +1,68 @@
+"""
+Micro-benchmark of the JSON codecs on small and large LSP messages.
+
+Run with ``python -m benchmarks.bench_codec``.
+"""
+
+import timeit
+from typing import Any
+
+from lsp_client.codec import JSONCodec, MsgspecCodec, OrjsonCodec
+
+
+def _symbol(i: int) -> dict[str, Any]:
+    return {
+        "name": f"symbol_{i}",
+        "kind": 12,
+        "location": {
+            "uri": f"file:///workspace/pkg/module_{i % 97}.py",
+            "range": {
+                "start": {"line": i, "character": 4},
+                "end": {"line": i, "character": 20},
+            },
+        },
+        "containerName": "pkg.module",
+    }
+
+
+MESSAGES = {
+    "small": {"jsonrpc": "2.0", "id": 1, "result": {"contents": "def f() -> None"}},
+    "large": {"jsonrpc": "2.0", "id": 2, "result": [_symbol(i) for i in range(20000)]},
+}
+
+
+def _codecs() -> list[JSONCodec]:
+    codecs = [JSONCodec()]
+    for codec_cls in (OrjsonCodec, MsgspecCodec):
+        try:
+            codecs.append(codec_cls())
+        except ImportError:
+            pass
+    return codecs
+
+
+def run(number: int = 20) -> list[dict[str, Any]]:
+    results = []
+    for label, message in MESSAGES.items():
+        for codec in _codecs():
+            data = codec.encode(message)
+            encode = min(timeit.repeat(lambda: codec.encode(message), number=number))
+            decode = min(timeit.repeat(lambda: codec.decode(data), number=number))
+            results.append(
+                {
+                    "message": label,
+                    "codec": codec.name,
+                    "bytes": len(data),
+                    "encode_us": encode / number * 1e6,
+                    "decode_us": decode / number * 1e6,
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    for row in run():
+        print(
+            f"{row['message']:>6} {row['codec']:>8} {row['bytes']:>10} B "
+            f"encode {row['encode_us']:>10.1f} us  decode {row['decode_us']:>10.1f} us"
+        )
@@ -0,0 +1,187 @@
+"""
+Configurable stand-in language server for benchmarks.
+
+Speaks LSP over stdio using only the standard library, so that benchmarks
+measure the client rather than a real server. Run it with
+``python benchmarks/fake_server.py [options]``.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, BinaryIO
+
+
+def symbols(count: int) -> list[dict[str, Any]]:
+    """Return `count` SymbolInformation objects."""
+    return [
+        {
+            "name": f"symbol_{i}",
+            "kind": 12,
+            "location": {
+                "uri": f"file:///workspace/pkg/module_{i % 97}.py",
+                "range": {
+                    "start": {"line": i, "character": 4},
+                    "end": {"line": i, "character": 20},
+                },
+            },
+            "containerName": "pkg.module",
+        }
+        for i in range(count)
+    ]
+
+
+def read_message(stream: BinaryIO) -> dict[str, Any] | None:
+    content_length = 0
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            content_length = int(value)
+    message: dict[str, Any] = json.loads(stream.read(content_length))
+    return message
+
+
+def write_message(stream: BinaryIO, message: dict[str, Any]) -> None:
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    stream.write(b"Content-Length: %d\r\n\r\n" % len(body))
+    stream.write(body)
+    stream.flush()
+
+
+class FakeServer(object):
+    def __init__(
+        self,
+        latency: float,
+        symbol_count: int,
+        hover_size: int,
+        partial_chunk: int = 1000,
+        stderr_bytes: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.partial_chunk = partial_chunk
+        self.stderr_bytes = stderr_bytes
+        self.workspace_symbols = symbols(symbol_count)
+        self.hover = {"contents": {"kind": "plaintext", "value": "x" * hover_size}}
+        self.open_documents: set[str] = set()
+
+    def result(self, method: str, params: Any) -> Any:
+        if method == "initialize":
+            return {
+                "capabilities": {
+                    "textDocumentSync": 2,
+                    "hoverProvider": True,
+                    "workspaceSymbolProvider": True,
+                },
+                "serverInfo": {"name": "fake-server"},
+            }
+        if method == "textDocument/hover":
+            return self.hover
+        if method == "workspace/symbol":
+            return self.workspace_symbols
+        if method == "bench/echo":
+            return params
+        if method == "bench/documents":
+            return sorted(self.open_documents)
+        return None
+
+    def log(self, stderr: BinaryIO | None, method: str) -> None:
+        """Write `stderr_bytes` of log lines, as verbose servers do."""
+        if stderr is None or not self.stderr_bytes:
+            return
+        line = f"handling {method} ".encode().ljust(79, b".") + b"\n"
+        count, rest = divmod(self.stderr_bytes, len(line))
+        stderr.write(line * count + line[-rest:] if rest else line * count)
+        stderr.flush()
+
+    def serve(
+        self, stdin: BinaryIO, stdout: BinaryIO, stderr: BinaryIO | None = None
+    ) -> None:
+        while True:
+            message = read_message(stdin)
+            if message is None or message.get("method") == "exit":
+                return
+            method = message.get("method")
+            if method == "bench/crash":
+                # Die without answering, as a crashing server does.
+                os._exit(3)
+            if method in ("textDocument/didOpen", "textDocument/didClose"):
+                uri = message["params"]["textDocument"]["uri"]
+                if method == "textDocument/didOpen":
+                    self.open_documents.add(uri)
+                else:
+                    self.open_documents.discard(uri)
+            if "id" not in message or "method" not in message:
+                continue
+            self.log(stderr, message["method"])
+            if self.latency:
+                time.sleep(self.latency)
+            params = message.get("params") or {}
+            token = params.get("partialResultToken")
+            result = self.result(message["method"], message.get("params"))
+            if token is not None and isinstance(result, list):
+                # Report the result in chunks; the final response is empty.
+                for start in range(0, len(result), self.partial_chunk):
+                    write_message(
+                        stdout,
+                        {
+                            "jsonrpc": "2.0",
+                            "method": "$/progress",
+                            "params": {
+                                "token": token,
+                                "value": result[start : start + self.partial_chunk],
+                            },
+                        },
+                    )
+                result = []
+            write_message(
+                stdout, {"jsonrpc": "2.0", "id": message["id"], "result": result}
+            )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds to wait per request"
+    )
+    parser.add_argument(
+        "--symbols",
+        type=int,
+        default=1000,
+        help="number of symbols returned by workspace/symbol",
+    )
+    parser.add_argument(
+        "--hover-size", type=int, default=64, help="characters in a hover result"
+    )
+    parser.add_argument(
+        "--partial-chunk",
+        type=int,
+        default=1000,
+        help="items per $/progress chunk when partial results are requested",
+    )
+    parser.add_argument(
+        "--stderr-bytes",
+        type=int,
+        default=0,
+        help="bytes written to stderr per request",
+    )
+    args = parser.parse_args(argv)
+    server = FakeServer(
+        args.latency,
+        args.symbols,
+        args.hover_size,
+        args.partial_chunk,
+        args.stderr_bytes,
+    )
+    server.serve(sys.stdin.buffer, sys.stdout.buffer, sys.stderr.buffer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""
+Benchmark suite for lsp_client.
+
+Drives the stand-in server in benchmarks/fake_server.py through
+LSPClient.from_command and measures the client in isolation. Results are
+written as JSON so that they can be compared between releases.
+
+Run with ``python -m benchmarks.run [--suite NAME ...] [--output FILE]``.
+"""
+
+import argparse
+import asyncio
+import importlib.metadata
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from lsp_client import fast
+from lsp_client.client import LSPClient
+from lsp_client.documents import DocumentManager
+from lsp_client.protocol import (
+    BaseRequest,
+    ContentChange,
+    ExitNotification,
+    HoverRequest,
+    InitializedNotification,
+    InitializeParams,
+    InitializeRequest,
+    Position,
+    Range,
+    ShutdownRequest,
+    TextDocumentDidChangeNotification,
+    WorkspaceSymbolRequest,
+)
+from lsp_client.workspace import open_files
+
+from . import bench_codec
+from . import fake_server as fake_server_module
+
+Result = dict[str, Any]
+
+FAKE_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_server.py")
+
+
+def _package_version() -> str:
+    try:
+        return importlib.metadata.version("lsp_client")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def result(suite: str, name: str, value: float, unit: str) -> Result:
+    return {"suite": suite, "name": name, "value": value, "unit": unit}
+
+
+async def _ignore(message: dict) -> None:
+    pass
+
+
+class NullWriter(object):
+    """Stand-in for the server's stdin that discards what is written."""
+
+    def write(self, data: bytes) -> None:
+        pass
+
+    def writelines(self, data: list[bytes]) -> None:
+        pass
+
+    async def drain(self) -> None:
+        pass
+
+
+@asynccontextmanager
+async def fake_server(*args: str) -> AsyncIterator[LSPClient]:
+    """
+    Start the fake server with the given options and yield an initialized
+    client connected to it.
+    """
+    client, proc = await LSPClient.from_command(
+        sys.executable, FAKE_SERVER, *args, response_handler=_ignore
+    )
+    listener = asyncio.create_task(client.listen())
+    try:
+        await client.request(
+            InitializeRequest(params=InitializeParams(rootUri="file:///workspace"))
+        )
+        await client.send_notification(InitializedNotification())
+        yield client
+        await client.request(ShutdownRequest())
+        await client.send_notification(ExitNotification())
+        await client.flush()
+        await proc.wait()
+    finally:
+        listener.cancel()
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+
+def _hover() -> HoverRequest:
+    return HoverRequest(
+        params={
+            "textDocument": {"uri": "file:///workspace/a.py"},
+            "position": {"line": 1, "character": 2},
+        }
+    )
+
+
+async def bench_roundtrip(count: int) -> list[Result]:
+    """Latency of sequential hover requests."""
+    async with fake_server() as client:
+        latencies = []
+        for _ in range(count):
+            started = time.perf_counter()
+            await client.request(_hover())
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return [
+        result("roundtrip", "hover_p50", latencies[len(latencies) // 2] * 1e6, "us"),
+        result(
+            "roundtrip",
+            "hover_p99",
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6,
+            "us",
+        ),
+        result("roundtrip", "hover_mean", statistics.fmean(latencies) * 1e6, "us"),
+    ]
+
+
+async def bench_pipelined(count: int) -> list[Result]:
+    """Throughput of hover requests that are all in flight at once."""
+    async with fake_server() as client:
+        started = time.perf_counter()
+        futures = [await client.send_request(_hover()) for _ in range(count)]
+        await asyncio.gather(*futures)
+        elapsed = time.perf_counter() - started
+    return [result("pipelined", "hover_throughput", count / elapsed, "requests/s")]
+
+
+async def bench_large_payload(count: int, symbols: int) -> list[Result]:
+    """Framing and decoding of large workspace/symbol responses."""
+    size = len(json.dumps(fake_server_module.symbols(symbols), separators=(",", ":")))
+    async with fake_server("--symbols", str(symbols)) as client:
+        started = time.perf_counter()
+        for _ in range(count):
+            await client.request(
+                BaseRequest(method="workspace/symbol", params={"query": ""})
+            )
+        elapsed = time.perf_counter() - started
+    return [
+        result("large_payload", "response_bytes", size, "B"),
+        result("large_payload", "latency", elapsed / count * 1e3, "ms"),
+        result("large_payload", "rate", size * count / elapsed / 1e6, "MB/s"),
+    ]
+
+
+async def bench_partial_results(count: int, symbols: int) -> list[Result]:
+    """Time to first result of workspace/symbol, buffered versus streamed."""
+    async with fake_server("--symbols", str(symbols)) as client:
+        buffered = streamed = 0.0
+        for _ in range(count):
+            started = time.perf_counter()
+            await client.request(WorkspaceSymbolRequest(params={"query": ""}))
+            buffered += time.perf_counter() - started
+            started = time.perf_counter()
+            stream = await client.stream_request(
+                WorkspaceSymbolRequest(params={"query": ""})
+            )
+            await stream.__anext__()
+            streamed += time.perf_counter() - started
+            await stream.collect()
+    return [
+        result("partial", "buffered_first_result", buffered / count * 1e3, "ms"),
+        result("partial", "streamed_first_result", streamed / count * 1e3, "ms"),
+    ]
+
+
+async def bench_open_workspace(files: int, size: int) -> list[Result]:
+    """Opening a workspace of generated files with open_files."""
+    line = "value = compute(value, 42)  # comment\n"
+    text = line * (size // len(line))
+    with tempfile.TemporaryDirectory() as root:
+        for i in range(files):
+            with open(os.path.join(root, f"module_{i}.py"), "w") as f:
+                f.write(text)
+        async with fake_server() as client:
+            started = time.perf_counter()
+            documents = await open_files(DocumentManager(client), ["*.py"], root=root)
+            await client.flush()
+            elapsed = time.perf_counter() - started
+    assert len(documents) == files
+    return [
+        result("open_workspace", "files_per_second", files / elapsed, "files/s"),
+        result("open_workspace", "rate", files * len(text) / elapsed / 1e6, "MB/s"),
+    ]
+
+
+async def bench_memory(size: int) -> list[Result]:
+    """Peak memory of sending a large didOpen, buffered versus streamed."""
+    text = "x = 'value'\n" * (size // 12)
+    results = []
+    for name, threshold in (("buffered", None), ("streamed", 1)):
+        client = LSPClient(
+            NullWriter(),  # type: ignore[arg-type]
+            None,
+            _ignore,
+            streaming_threshold=threshold,
+        )
+        tracemalloc.start()
+        await client.send_notification(
+            fast.did_open_notification("file:///workspace/big.py", "python", 0, text)
+        )
+        await client.flush()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append(result("memory", f"did_open_{name}_peak", peak / 1e6, "MB"))
+    results.append(result("memory", "document_size", len(text) / 1e6, "MB"))
+    return results
+
+
+IMPORT_STATEMENTS = {
+    "package": "import lsp_client",
+    "client": "from lsp_client import LSPClient",
+    "protocol_first_use": (
+        "from lsp_client.protocol import Position; Position(line=0, character=0)"
+    ),
+}
+
+
+def bench_import(repeat: int) -> list[Result]:
+    """Import time of the package in fresh interpreters."""
+    results = []
+    for name, statement in IMPORT_STATEMENTS.items():
+        code = (
+            "import time; started = time.perf_counter(); "
+            f"{statement}; print(time.perf_counter() - started)"
+        )
+        elapsed = min(
+            float(
+                subprocess.run(
+                    [sys.executable, "-c", code],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout
+            )
+            for _ in range(repeat)
+        )
+        results.append(result("import", name, elapsed * 1e3, "ms"))
+    return results
+
+
+def bench_models(number: int) -> list[Result]:
+    """Construction and serialisation of hot protocol models."""
+
+    def build_position() -> Position:
+        return Position(line=10, character=4)
+
+    def build_change() -> TextDocumentDidChangeNotification:
+        return TextDocumentDidChangeNotification(
+            uri="file:///workspace/a.py",
+            version=7,
+            contentChanges=[
+                ContentChange(
+                    text="x",
+                    range=Range(
+                        start=Position(line=10, character=4),
+                        end=Position(line=10, character=5),
+                    ),
+                )
+            ],
+        )
+
+    notification = build_change()
+
+    def dump_change() -> dict:
+        return notification.model_dump(exclude_none=True)
+
+    def build_change_fast() -> dict:
+        return fast.did_change_notification(
+            "file:///workspace/a.py",
+            7,
+            [fast.content_change("x", fast.range_(10, 4, 10, 5))],
+        )
+
+    results = []
+    for name, func in (
+        ("position_build", build_position),
+        ("did_change_build", build_change),
+        ("did_change_dump", dump_change),
+        (
+            "did_change_build_and_dump",
+            lambda: build_change().model_dump(exclude_none=True),
+        ),
+        ("did_change_fast_build", build_change_fast),
+    ):
+        elapsed = min(timeit.repeat(func, number=number, repeat=3))
+        results.append(result("models", name, elapsed / number * 1e6, "us"))
+    return results
+
+
+def bench_codecs(number: int) -> list[Result]:
+    """JSON encode and decode with the available codecs."""
+    results = []
+    for row in bench_codec.run(number):
+        name = f"{row['message']}_{row['codec']}"
+        results.append(result("codec", f"{name}_encode", row["encode_us"], "us"))
+        results.append(result("codec", f"{name}_decode", row["decode_us"], "us"))
+    return results
+
+
+def suites(
+    quick: bool
+) -> dict[str, Callable[[], Awaitable[list[Result]] | list[Result]]]:
+    scale = 10 if quick else 1
+    return {
+        "roundtrip": lambda: bench_roundtrip(2000 // scale),
+        "pipelined": lambda: bench_pipelined(5000 // scale),
+        "large_payload": lambda: bench_large_payload(20 // scale or 1, 20000),
+        "partial": lambda: bench_partial_results(20 // scale or 1, 20000),
+        "open_workspace": lambda: bench_open_workspace(2000 // scale, 8192),
+        "memory": lambda: bench_memory(32_000_000 // scale),
+        "import": lambda: bench_import(10 // scale or 1),
+        "models": lambda: bench_models(20000 // scale),
+        "codec": lambda: bench_codecs(20 // scale or 1),
+    }
+
+
+async def run(names: list[str] | None = None, quick: bool = False) -> dict[str, Any]:
+    """
+    Run the selected suites, or all of them, and return the report.
+    """
+    available = suites(quick)
+    results: list[Result] = []
+    for name in names or list(available):
+        outcome = available[name]()
+        if asyncio.iscoroutine(outcome):
+            outcome = await outcome
+        assert isinstance(outcome, list)
+        results.extend(outcome)
+    return {
+        "meta": {
+            "lsp_client": _package_version(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--suite",
+        action="append",
+        choices=sorted(suites(False)),
+        help="suite to run; may be repeated, defaults to all",
+    )
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--quick", action="store_true", help="run fewer iterations")
+    args = parser.parse_args(argv)
+    report = asyncio.run(run(args.suite, args.quick))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,218 @@
-from .client import LSPClient
-from .protocol import (
-    BaseNotification,
-    BaseRequest,
-    CancelRequest,
-    ClientCapabilities,
-    ClientInfo,
-    CompletionRequest,
-    ContentChange,
-    DefinitionRequest,
-    ExitNotification,
-    HoverRequest,
-    InitializeParams,
-    InitializeRequest,
-    InitializedNotification,
-    Position,
-    ProgressNotification,
-    ProgressParams,
-    Range,
-    ShutdownRequest,
-    TextDocumentDidChangeNotification,
-    TextDocumentDidCloseNotification,
-    TextDocumentDidOpenNotification,
-    TextDocumentIdentifier,
-    TextDocumentItem,
-    TextDocumentPositionParams,
+"""
+Asynchronous client for the Language Server Protocol.
+
+The names exported here are imported on first access, so that importing the
+package does not load the client, pydantic or the protocol models until they
+are used.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .client import LSPClient
+    from .diagnostics import DiagnosticsEntry, DiagnosticsStore
+    from .dispatch import Dispatcher
+    from .documents import Document, DocumentManager
+    from .flow import Priority, RequestWindow
+    from .metrics import ClientMetrics
+    from .partial import PartialResultStream
+    from .pool import LSPServerPool, RoutingStrategy
+    from .protocol import (
+        BaseNotification,
+        BaseRequest,
+        CancelNotification,
+        CancelParams,
+        CancelRequest,
+        ClientCapabilities,
+        ClientInfo,
+        CompletionRequest,
+        ContentChange,
+        DefinitionRequest,
+        ErrorCodes,
+        ExitNotification,
+        HoverRequest,
+        InitializeParams,
+        InitializeRequest,
+        InitializedNotification,
+        PartialResultParams,
+        Position,
+        PositionEncodingKind,
+        ProgressNotification,
+        ProgressParams,
+        Range,
+        ReferencesRequest,
+        ResponseError,
+        ShutdownRequest,
+        TextDocumentDidChangeNotification,
+        TextDocumentDidCloseNotification,
+        TextDocumentDidOpenNotification,
+        TextDocumentIdentifier,
+        TextDocumentItem,
+        TextDocumentPositionParams,
+        TextDocumentSyncKind,
+        WorkspaceSymbolRequest,
+        # Backwards-compatible aliases
+        TextDocumentDidChangeRequest,
+        TextDocumentDidOpenRequest,
+        TextDocument_DidChange_Request,
+        TextDocument_DidOpen_Request,
+    )
+    from .recorder import SessionRecorder
+    from .stderr import StderrDrain
+    from .supervisor import ServerSupervisor
+    from .sync import SyncLSPClient
+    from .text import TextBuffer
+    from .transport import (
+        ReconnectPolicy,
+        SocketOptions,
+        TcpTransport,
+        Transport,
+        UnixTransport,
+    )
+    from .workspace import OpenProgress, open_files
+
+# Module defining each exported name.
+_EXPORTS = {
+    "LSPClient": "client",
+    "DiagnosticsEntry": "diagnostics",
+    "DiagnosticsStore": "diagnostics",
+    "Dispatcher": "dispatch",
+    "Document": "documents",
+    "DocumentManager": "documents",
+    "Priority": "flow",
+    "RequestWindow": "flow",
+    "ClientMetrics": "metrics",
+    "PartialResultStream": "partial",
+    "LSPServerPool": "pool",
+    "RoutingStrategy": "pool",
+    "BaseNotification": "protocol",
+    "BaseRequest": "protocol",
+    "CancelNotification": "protocol",
+    "CancelParams": "protocol",
+    "CancelRequest": "protocol",
+    "ClientCapabilities": "protocol",
+    "ClientInfo": "protocol",
+    "CompletionRequest": "protocol",
+    "ContentChange": "protocol",
+    "DefinitionRequest": "protocol",
+    "ErrorCodes": "protocol",
+    "ExitNotification": "protocol",
+    "HoverRequest": "protocol",
+    "InitializeParams": "protocol",
+    "InitializeRequest": "protocol",
+    "InitializedNotification": "protocol",
+    "PartialResultParams": "protocol",
+    "Position": "protocol",
+    "PositionEncodingKind": "protocol",
+    "ProgressNotification": "protocol",
+    "ProgressParams": "protocol",
+    "Range": "protocol",
+    "ReferencesRequest": "protocol",
+    "ResponseError": "protocol",
+    "ShutdownRequest": "protocol",
+    "TextDocumentDidChangeNotification": "protocol",
+    "TextDocumentDidCloseNotification": "protocol",
+    "TextDocumentDidOpenNotification": "protocol",
+    "TextDocumentIdentifier": "protocol",
+    "TextDocumentItem": "protocol",
+    "TextDocumentPositionParams": "protocol",
+    "TextDocumentSyncKind": "protocol",
+    "WorkspaceSymbolRequest": "protocol",
     # Backwards-compatible aliases
-    TextDocumentDidChangeRequest,
-    TextDocumentDidOpenRequest,
-    TextDocument_DidChange_Request,
-    TextDocument_DidOpen_Request,
-)
+    "TextDocumentDidChangeRequest": "protocol",
+    "TextDocumentDidOpenRequest": "protocol",
+    "TextDocument_DidChange_Request": "protocol",
+    "TextDocument_DidOpen_Request": "protocol",
+    "SessionRecorder": "recorder",
+    "StderrDrain": "stderr",
+    "ServerSupervisor": "supervisor",
+    "SyncLSPClient": "sync",
+    "TextBuffer": "text",
+    "ReconnectPolicy": "transport",
+    "SocketOptions": "transport",
+    "TcpTransport": "transport",
+    "Transport": "transport",
+    "UnixTransport": "transport",
+    "OpenProgress": "workspace",
+    "open_files": "workspace",
+}
 
 __all__ = [
     "Position",
+    "PositionEncodingKind",
     "Range",
+    "ReferencesRequest",
     "BaseNotification",
     "BaseRequest",
+    "CancelNotification",
+    "CancelParams",
     "CancelRequest",
     "ClientCapabilities",
     "ClientInfo",
+    "ClientMetrics",
     "CompletionRequest",
     "ContentChange",
     "DefinitionRequest",
+    "DiagnosticsEntry",
+    "DiagnosticsStore",
+    "Dispatcher",
+    "Document",
+    "DocumentManager",
+    "ErrorCodes",
     "ExitNotification",
     "HoverRequest",
     "InitializeParams",
     "InitializeRequest",
     "InitializedNotification",
     "LSPClient",
+    "LSPServerPool",
+    "OpenProgress",
+    "PartialResultParams",
+    "PartialResultStream",
+    "Priority",
     "ProgressNotification",
     "ProgressParams",
+    "ReconnectPolicy",
+    "RequestWindow",
+    "ResponseError",
+    "RoutingStrategy",
+    "ServerSupervisor",
+    "SessionRecorder",
     "ShutdownRequest",
+    "SocketOptions",
+    "StderrDrain",
+    "SyncLSPClient",
+    "TcpTransport",
+    "TextBuffer",
     "TextDocumentDidChangeNotification",
     "TextDocumentDidCloseNotification",
     "TextDocumentDidOpenNotification",
     "TextDocumentIdentifier",
     "TextDocumentItem",
     "TextDocumentPositionParams",
+    "TextDocumentSyncKind",
+    "Transport",
+    "UnixTransport",
+    "WorkspaceSymbolRequest",
+    "open_files",
     # Backwards-compatible aliases
     "TextDocumentDidOpenRequest",
     "TextDocumentDidChangeRequest",
     "TextDocument_DidOpen_Request",
     "TextDocument_DidChange_Request",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    # Cache the value so that later accesses bypass __getattr__.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
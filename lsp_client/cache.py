@@ -0,0 +1,172 @@
+"""
+Opt-in cache of responses to read-only text document requests.
+"""
+
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+DEFAULT_CACHE_SIZE = 1024
+CACHEABLE_METHODS = frozenset(
+    {
+        "textDocument/hover",
+        "textDocument/definition",
+        "textDocument/completion",
+    }
+)
+# Outgoing notifications that change or end the life of a document.
+_INVALIDATING_METHODS = frozenset({"textDocument/didChange", "textDocument/didClose"})
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class ResponseCache(object):
+    """
+    LRU cache of request results keyed by method, document uri, document
+    version and request params.
+
+    The cache learns document versions from the `didOpen` and `didChange`
+    notifications the client sends, and drops all entries of a document as
+    soon as a `didChange` or `didClose` for it goes out. Cached results are
+    shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        methods: frozenset[str] = CACHEABLE_METHODS,
+    ) -> None:
+        self.max_size = max_size
+        self.methods = methods
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._keys_by_uri: dict[str, set[tuple]] = {}
+        self._versions: dict[str, int | None] = {}
+        # Bumped on every invalidation, so that responses to requests sent
+        # before a document changed are not stored afterwards.
+        self._generations: dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            self._hits,
+            self._misses,
+            self._evictions,
+            self._invalidations,
+            len(self._entries),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key_for(self, request: dict) -> tuple | None:
+        """
+        Return the cache key for a serialised request, or None if the request
+        is not cacheable.
+        """
+        method = request.get("method")
+        if method not in self.methods:
+            return None
+        params = request.get("params") or {}
+        uri = (params.get("textDocument") or {}).get("uri")
+        # Results streamed as partial results are not in the final response.
+        if uri is None or params.get("partialResultToken") is not None:
+            return None
+        return (
+            method,
+            uri,
+            self._versions.get(uri),
+            self._generations.get(uri, 0),
+            _freeze(params),
+        )
+
+    def lookup(self, key: tuple) -> tuple[bool, Any]:
+        """
+        Look up a key and count the hit or miss.
+
+        Returns:
+            A pair of whether the key was found and the cached result.
+        """
+        try:
+            result = self._entries[key]
+        except KeyError:
+            self._misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return True, result
+
+    def store(self, key: tuple, result: Any) -> None:
+        """
+        Store the result for a key, unless its document changed since the key
+        was computed.
+        """
+        uri = key[1]
+        if key[3] != self._generations.get(uri, 0):
+            return
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        self._keys_by_uri.setdefault(uri, set()).add(key)
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._discard_key(evicted)
+            self._evictions += 1
+
+    def invalidate(self, uri: str) -> None:
+        """
+        Drop all entries for a document.
+        """
+        self._generations[uri] = self._generations.get(uri, 0) + 1
+        for key in self._keys_by_uri.pop(uri, ()):
+            del self._entries[key]
+            self._invalidations += 1
+
+    def clear(self) -> None:
+        for uri in list(self._keys_by_uri):
+            self.invalidate(uri)
+
+    def observe_notification(self, notification: dict) -> None:
+        """
+        Track document versions and invalidate entries from an outgoing
+        serialised notification.
+        """
+        method = notification.get("method")
+        if method == "textDocument/didOpen" or method in _INVALIDATING_METHODS:
+            document = (notification.get("params") or {}).get("textDocument") or {}
+            uri = document.get("uri")
+            if uri is None:
+                return
+            if method in _INVALIDATING_METHODS:
+                self.invalidate(uri)
+            if method == "textDocument/didClose":
+                self._versions.pop(uri, None)
+            else:
+                self._versions[uri] = document.get("version")
+
+    def _discard_key(self, key: tuple) -> None:
+        keys = self._keys_by_uri.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_uri[key[1]]
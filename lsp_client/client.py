@@ -1,17 +1,48 @@
 import asyncio
-import json
+import itertools
 import logging
-from typing import Any, Callable, Coroutine
+import time
+from functools import partial
+from typing import Any, Callable, Coroutine, Iterable, Iterator
 
-from .protocol import BaseNotification, BaseRequest
+from .cache import ResponseCache
+from .codec import JSONCodec, default_codec
+from .diagnostics import DiagnosticsStore
+from .dispatch import Dispatcher
+from .flow import Priority, RequestWindow
+from .framing import Frame, FrameParser
+from .message import Envelope, LazyMessage, peek_envelope
+from .metrics import ClientMetrics, clock
+from .partial import PartialResultStream
+from .protocol import (
+    BaseNotification,
+    BaseRequest,
+    CancelNotification,
+    CancelParams,
+    ResponseError,
+)
+from .recorder import Direction, SessionRecorder
+from .stderr import DEFAULT_STDERR_CAPACITY, StderrDrain
+from .streaming import DEFAULT_STREAMING_THRESHOLD, StreamedBody, find_large_text
+from .transport import (
+    ReconnectPolicy,
+    SocketOptions,
+    TcpTransport,
+    Transport,
+    UnixTransport,
+)
 from .utils import (
     DEFAULT_CONTENT_TYPE,
     DEFAULT_ENCODING,
     EncodingError,
+    is_utf8,
     parse_content_type,
 )
+from .writer import DEFAULT_FLUSH_THRESHOLD, CoalescingWriter
 
 SEPARATOR = "\r\n"
+READ_CHUNK_SIZE = 65536
+MAX_CANCELLED_IDS = 1024
 
 
 class LSPClient(object):
@@ -20,6 +51,7 @@ class LSPClient(object):
     """
 
     stdin: asyncio.StreamWriter | None
+    writer: CoalescingWriter | None
     stdout: asyncio.StreamReader | None
     response_handler: Callable[[dict[Any, Any]], Coroutine[Any, Any, None]]
 
@@ -29,6 +61,18 @@ class LSPClient(object):
         stdout: asyncio.StreamReader | None,
         response_handler: Callable[[dict[Any, Any]], Coroutine[Any, Any, None]],
         logger: logging.Logger | None = None,
+        codec: JSONCodec | None = None,
+        flush_threshold: int = DEFAULT_FLUSH_THRESHOLD,
+        cache: ResponseCache | None = None,
+        window: RequestWindow | None = None,
+        request_timeout: float | None = None,
+        metrics: ClientMetrics | None = None,
+        lazy_decoding: bool = False,
+        ignored_methods: Iterable[str] = (),
+        dispatcher: Dispatcher | None = None,
+        diagnostics: DiagnosticsStore | None = None,
+        streaming_threshold: int | None = DEFAULT_STREAMING_THRESHOLD,
+        recorder: SessionRecorder | None = None,
     ) -> None:
         if logger is None:
             self.logger = logging.getLogger(__name__)
@@ -36,34 +80,280 @@ class LSPClient(object):
             self.logger = logger
         self.response_handler = response_handler
         self.stdin = stdin
+        self.flush_threshold = flush_threshold
+        self.writer = (
+            CoalescingWriter(stdin, flush_threshold) if stdin is not None else None
+        )
         self.stdout = stdout
+        self.codec = codec if codec is not None else default_codec()
+        self.cache = cache
+        self.window = window
+        self.request_timeout = request_timeout
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.bind_pending(lambda: len(self._pending))
+        # Peek the envelope of incoming messages and decode them only when
+        # needed.
+        self.lazy_decoding = lazy_decoding
+        # Methods of notifications that are dropped instead of being passed to
+        # the response handler.
+        self.ignored_methods = frozenset(ignored_methods)
+        # Runs handlers in tasks instead of awaiting the response handler in
+        # the reader loop.
+        self.dispatcher = dispatcher
+        if dispatcher is not None:
+            dispatcher.attach(self.send_response, response_handler, metrics)
+        # Receives `textDocument/publishDiagnostics` in place of the handlers.
+        self.diagnostics = diagnostics
+        # Document texts with at least this many characters are encoded and
+        # written in chunks; None disables streaming.
+        self.streaming_threshold = streaming_threshold
+        # Records the body of every message sent and received.
+        self.recorder = recorder
+        # Set by from_tcp and from_socket; used to reconnect.
+        self.transport: Transport | None = None
+        # Scheduled after the client reconnected, e.g. to initialize again.
+        self.on_reconnect: Callable[[], Coroutine[Any, Any, None]] | None = None
+        # When the current connection was opened, whether anything was read
+        # from it, and the delays left for reconnecting after it drops.
+        self._connected_at = time.monotonic()
+        self._connection_used = False
+        self._reconnect_delays: Iterator[float] | None = None
+        # Set by from_command; keeps the tail of the server's stderr.
+        self.stderr: StderrDrain | None = None
+        self.read_chunk_size = READ_CHUNK_SIZE
+        self._parser = FrameParser()
         self._next_request_id: int = 0
+        # Requests awaiting a response, keyed by request id.
+        self._pending: dict[int | str, asyncio.Future[Any]] = {}
+        # Ids of recently cancelled requests, whose late responses are dropped.
+        self._cancelled: dict[int | str, None] = {}
+        # Ids of pending requests resolved with a LazyMessage.
+        self._lazy: set[int | str] = set()
+        # Streams of requests sent with a partialResultToken, keyed by token.
+        self._partial_streams: dict[int | str, PartialResultStream] = {}
+        self._background_tasks: set[asyncio.Future[None]] = set()
+
+    @property
+    def pending_count(self) -> int:
+        """The number of requests sent and still awaiting a response."""
+        return len(self._pending)
 
     def _allocate_request_id(self) -> int:
         self._next_request_id += 1
         return self._next_request_id
 
-    async def send_request(self, request: BaseRequest) -> None:
+    async def send_request(
+        self,
+        request: BaseRequest,
+        priority: Priority = Priority.INTERACTIVE,
+        lazy: bool = False,
+    ) -> asyncio.Future[Any]:
         """
         Send a request to the LSP server.
 
+        The response is not passed to the response handler. Instead, the
+        returned future is resolved with the `result` of the matching response,
+        or fails with a ResponseError if the server answered with an `error`.
+        Several requests may be in flight at once.
+
+        If the client has a response cache and holds a result for the request,
+        the request is not sent and the returned future is already resolved.
+
+        If the client has a request window, this waits for a free slot before
+        sending, so that no more than the window's limit of requests are in
+        flight.
+
+        If `lazy` is set, the future is instead resolved with a LazyMessage
+        wrapping the response, which is decoded only once its result is asked
+        for, and the response cache is bypassed.
+
         Args:
             request: A BaseRequest object representing the request.
+            priority: The priority with which the request waits for a slot.
+            lazy: Resolve the future with the undecoded response.
+
+        Returns:
+            A future resolved with the response result.
         """
+        metrics = self.metrics
+        started = clock() if metrics is not None else 0.0
         if request.id is None:
             request.id = self._allocate_request_id()
-        await self._send_request(request.model_dump())
+        payload = request.model_dump()
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        cache_key = None
+        if self.cache is not None and not lazy:
+            cache_key = self.cache.key_for(payload)
+            if cache_key is not None:
+                found, result = self.cache.lookup(cache_key)
+                if found:
+                    future.set_result(result)
+                    return future
+        if self.window is not None:
+            await self.window.acquire(priority)
+            future.add_done_callback(self._release_slot)
+        self._pending[request.id] = future
+        if lazy:
+            self._lazy.add(request.id)
+        try:
+            await self._send_request(payload)
+        except BaseException:
+            self._pending.pop(request.id, None)
+            self._lazy.discard(request.id)
+            future.cancel()
+            raise
+        future.add_done_callback(partial(self._cancel_if_abandoned, request.id))
+        if metrics is not None:
+            future.add_done_callback(
+                partial(self._record_request, request.method, started)
+            )
+        if cache_key is not None:
+            future.add_done_callback(partial(self._store_cached, cache_key))
+        return future
+
+    async def request(
+        self,
+        request: BaseRequest,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: float | None = None,
+        deadline: float | None = None,
+        result_type: Any = None,
+    ) -> Any:
+        """
+        Send a request to the LSP server and wait for its result.
+
+        If the timeout or deadline passes, or the awaiting task is cancelled,
+        the client sends `$/cancelRequest` for the request and ignores its
+        response should it still arrive. Time spent waiting for a slot in the
+        request window counts against the timeout.
+
+        Args:
+            request: A BaseRequest object representing the request.
+            priority: The priority with which the request waits for a slot.
+            timeout: Seconds to wait for the result; defaults to the client's
+                request_timeout.
+            deadline: Event loop time by which the result must have arrived.
+            result_type: Type to validate the result into, such as a model
+                class or `list[Model]`. The response is then decoded lazily.
+
+        Returns:
+            The `result` member of the server's response.
+
+        Raises:
+            ResponseError: If the server responded with an error.
+            TimeoutError: If the timeout or deadline passed.
+        """
+        loop = asyncio.get_running_loop()
+        if timeout is None:
+            timeout = self.request_timeout
+        if deadline is not None:
+            remaining = deadline - loop.time()
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        lazy = result_type is not None
+        if timeout is None:
+            result = await (await self.send_request(request, priority, lazy))
+        else:
+            # Cancelling the future, by wait_for or by cancelling the awaiting
+            # task, triggers the $/cancelRequest.
+            result = await asyncio.wait_for(
+                self._send_and_wait(request, priority, lazy), timeout
+            )
+        if lazy:
+            return result.result(result_type)
+        return result
+
+    async def _send_and_wait(
+        self, request: BaseRequest, priority: Priority, lazy: bool
+    ) -> Any:
+        return await (await self.send_request(request, priority, lazy))
+
+    async def stream_request(
+        self, request: BaseRequest, priority: Priority = Priority.INTERACTIVE
+    ) -> PartialResultStream:
+        """
+        Send a request with a `partialResultToken` and return a stream of its
+        result chunks.
+
+        Chunks the server reports through `$/progress` are yielded as they
+        arrive, followed by the final result unless it is empty. Cancelling
+        the stream sends `$/cancelRequest`.
+
+        Args:
+            request: A request whose method supports partial results, such as
+                `textDocument/references` or `workspace/symbol`.
+            priority: The priority with which the request waits for a slot.
+        """
+        if request.id is None:
+            request.id = self._allocate_request_id()
+        token = f"partial/{request.id}"
+        request.params = {**(request.params or {}), "partialResultToken": token}
+        stream = PartialResultStream(token)
+        self._partial_streams[token] = stream
+        try:
+            future = await self.send_request(request, priority)
+        except BaseException:
+            del self._partial_streams[token]
+            raise
+        future.add_done_callback(partial(self._drop_stream, token))
+        stream.attach(future)
+        return stream
+
+    def cancel_request(self, request_id: int | str) -> bool:
+        """
+        Stop waiting for a request and ask the server to cancel it.
 
-    async def send_notification(self, notification: BaseNotification) -> None:
+        Returns:
+            True if the request was pending.
+        """
+        future = self._pending.get(request_id)
+        if future is None:
+            return False
+        future.cancel()
+        return True
+
+    async def send_notification(
+        self, notification: BaseNotification | dict[str, Any]
+    ) -> None:
         """
         Send a notification to the LSP server.
 
         Notifications have no id and expect no response.
 
         Args:
-            notification: A BaseNotification object representing the notification.
+            notification: A BaseNotification object representing the notification,
+                or its wire format as built by lsp_client.fast.
+        """
+        if isinstance(notification, dict):
+            payload = notification
+        else:
+            payload = notification.model_dump(exclude_none=True)
+        if self.cache is not None:
+            self.cache.observe_notification(payload)
+        await self._send_request(payload)
+
+    async def send_response(
+        self,
+        request_id: int | str,
+        result: Any = None,
+        error: ResponseError | None = None,
+    ) -> None:
+        """
+        Answer a server-to-client request.
+
+        Args:
+            request_id: The id of the server's request.
+            result: The result, if the request succeeded.
+            error: The error, if the request failed.
         """
-        await self._send_request(notification.model_dump(exclude_none=True))
+        response: dict[str, Any] = {"jsonrpc": "2.0", "id": request_id}
+        if error is None:
+            response["result"] = result
+        else:
+            response["error"] = {"code": error.code, "message": error.message}
+            if error.data is not None:
+                response["error"]["data"] = error.data
+        await self._send_request(response)
 
     @classmethod
     async def from_command(
@@ -71,14 +361,25 @@ class LSPClient(object):
         *cmd: str,
         response_handler: Callable[[dict[Any, Any]], Coroutine[Any, Any, None]],
         logger: logging.Logger | None = None,
+        codec: JSONCodec | None = None,
+        stderr_capacity: int = DEFAULT_STDERR_CAPACITY,
+        log_stderr: bool = False,
+        **options: Any,
     ) -> tuple["LSPClient", asyncio.subprocess.Process]:
         """
         Spawn an LSP server subprocess and return a ready-to-use client.
 
+        The server's stderr is drained in the background so that it never
+        blocks on a full pipe; its tail is available from `client.stderr`.
+
         Args:
             *cmd: The command and arguments to launch the LSP server.
             response_handler: Async callable that receives each parsed response.
             logger: Optional logger; defaults to the module logger.
+            codec: Optional JSON codec; defaults to the fastest one installed.
+            stderr_capacity: Bytes of the server's latest stderr output kept.
+            log_stderr: Forward stderr lines to the logger at a bounded rate.
+            **options: Further keyword arguments of the LSPClient constructor.
         """
         proc = await asyncio.create_subprocess_exec(
             *cmd,
@@ -86,7 +387,111 @@ class LSPClient(object):
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
-        return cls(proc.stdin, proc.stdout, response_handler, logger), proc
+        try:
+            client = cls(
+                proc.stdin, proc.stdout, response_handler, logger, codec, **options
+            )
+            if proc.stderr is not None:
+                client.stderr = StderrDrain(
+                    proc.stderr,
+                    stderr_capacity,
+                    client.logger if log_stderr else None,
+                )
+        except BaseException:
+            # Do not leave the server running without a client, such as on
+            # invalid options.
+            if proc.returncode is None:
+                proc.kill()
+            await proc.wait()
+            raise
+        if client.stderr is not None:
+            client.stderr.start()
+        return client, proc
+
+    @classmethod
+    async def from_transport(
+        cls,
+        transport: Transport,
+        response_handler: Callable[[dict[Any, Any]], Coroutine[Any, Any, None]],
+        logger: logging.Logger | None = None,
+        codec: JSONCodec | None = None,
+        **options: Any,
+    ) -> "LSPClient":
+        """
+        Connect through a transport and return a ready-to-use client.
+
+        If the transport has a reconnect policy, failed connection attempts
+        are retried, and `listen` reconnects when the connection is lost.
+        """
+        reader, writer = await transport.connect()
+        client = cls(writer, reader, response_handler, logger, codec, **options)
+        client.transport = transport
+        return client
+
+    @classmethod
+    async def from_tcp(
+        cls,
+        host: str,
+        port: int,
+        response_handler: Callable[[dict[Any, Any]], Coroutine[Any, Any, None]],
+        logger: logging.Logger | None = None,
+        codec: JSONCodec | None = None,
+        reconnect_policy: ReconnectPolicy | None = None,
+        socket_options: SocketOptions | None = None,
+        **options: Any,
+    ) -> "LSPClient":
+        """
+        Connect to an LSP server listening on a TCP port.
+
+        See from_transport.
+        """
+        transport = TcpTransport(host, port, reconnect_policy, socket_options)
+        return await cls.from_transport(
+            transport, response_handler, logger, codec, **options
+        )
+
+    @classmethod
+    async def from_socket(
+        cls,
+        path: str,
+        response_handler: Callable[[dict[Any, Any]], Coroutine[Any, Any, None]],
+        logger: logging.Logger | None = None,
+        codec: JSONCodec | None = None,
+        reconnect_policy: ReconnectPolicy | None = None,
+        socket_options: SocketOptions | None = None,
+        **options: Any,
+    ) -> "LSPClient":
+        """
+        Connect to an LSP server listening on a Unix domain socket.
+
+        See from_transport.
+        """
+        transport = UnixTransport(path, reconnect_policy, socket_options)
+        return await cls.from_transport(
+            transport, response_handler, logger, codec, **options
+        )
+
+    async def reconnect(self) -> None:
+        """
+        Replace the connection with a new one opened through the transport.
+
+        Requests still pending on the old connection fail with
+        ConnectionResetError, as their responses can no longer arrive.
+
+        Raises:
+            OSError: If no new connection could be opened.
+        """
+        assert self.transport is not None
+        self._fail_pending(ConnectionResetError("Connection to the server was reset"))
+        if self.stdin is not None:
+            self.stdin.close()
+        reader, writer = await self.transport.connect()
+        self.stdin = writer
+        self.writer = CoalescingWriter(writer, self.flush_threshold)
+        self.stdout = reader
+        self._parser = FrameParser()
+        self._connected_at = time.monotonic()
+        self._connection_used = False
 
     def build_request(
         self, request_cls: type[BaseRequest], **kwargs: Any
@@ -106,52 +511,126 @@ class LSPClient(object):
         Args:
             request: A dictionary representing the request.
         """
-        request_string = json.dumps(request)
-        request_bytes = request_string.encode(DEFAULT_ENCODING)
-        header_string = f"Content-Length: {len(request_bytes)}{SEPARATOR}"
+        if self.streaming_threshold is not None and self.writer is not None:
+            path = find_large_text(request, self.streaming_threshold)
+            if path is not None:
+                await self._send_streamed(StreamedBody(self.codec, request, path))
+                return
+        metrics = self.metrics
+        if metrics is None:
+            request_bytes = self.codec.encode(request)
+        else:
+            started = clock()
+            request_bytes = self.codec.encode(request)
+            metrics.record_out(len(request_bytes), clock() - started)
+        if self.recorder is not None:
+            self.recorder.record(Direction.OUT, request_bytes)
+        header_bytes = self._header(len(request_bytes))
+        await self._async_write_request(header_bytes, request_bytes)
+
+    async def _send_streamed(self, body: StreamedBody) -> None:
+        """
+        Write a message whose body is encoded piecewise.
+
+        The body is encoded twice, once to compute its length and once while
+        writing it, so that it is never held in memory as a whole.
+        """
+        assert self.writer is not None
+        started = clock()
+        length = body.content_length()
+        if self.recorder is not None:
+            self.recorder.record_chunks(Direction.OUT, length, body)
+        await self.writer.write_stream(itertools.chain([self._header(length)], body))
+        if self.metrics is not None:
+            # Includes the time spent waiting for the stream to drain.
+            self.metrics.record_out(length, clock() - started)
+
+    @staticmethod
+    def _header(content_length: int) -> bytes:
+        header_string = f"Content-Length: {content_length}{SEPARATOR}"
         header_string += f"Content-Type: {DEFAULT_CONTENT_TYPE}"
         header_string += f"{SEPARATOR}{SEPARATOR}"
-        header_bytes = header_string.encode(DEFAULT_ENCODING)
-
-        await self._async_write_request(header_bytes, request_bytes)
+        return header_string.encode(DEFAULT_ENCODING)
 
     async def listen(self) -> None:
         """
         Continuously read and dispatch responses from the LSP server until the
         connection is closed or the task is cancelled.
+
+        Requests still pending when the server closes the connection fail with
+        ConnectionResetError.
         """
         try:
             while True:
-                await self.read_response()
+                try:
+                    await self.read_response()
+                except EOFError:
+                    if not await self._reconnect_after_eof():
+                        raise
         except EOFError:
             self.logger.info("LSPClient.listen() — server closed the connection.")
+            self._fail_pending(ConnectionResetError("LSP server closed the connection"))
+            if self.stderr is not None and self.stderr.bytes_read:
+                self.logger.info(
+                    "Last server stderr output:\n%s", self.stderr.tail_text(4096)
+                )
         except asyncio.CancelledError:
             self.logger.debug("LSPClient.listen() cancelled — shutting down.")
             raise
 
+    async def _reconnect_after_eof(self) -> bool:
+        """
+        Reconnect if the transport allows it.
+
+        A connection that is closed before anything was read from it, or
+        before the policy's stable period, counts as a failed attempt: the
+        reconnect waits for the policy's next delay, and gives up once the
+        policy's attempts are spent.
+
+        Returns:
+            True if the client is connected again.
+        """
+        transport = self.transport
+        if transport is None or transport.reconnect_policy is None:
+            return False
+        policy = transport.reconnect_policy
+        uptime = time.monotonic() - self._connected_at
+        if self._connection_used or uptime >= policy.stable_after:
+            self._reconnect_delays = policy.delays()
+        else:
+            if self._reconnect_delays is None:
+                self._reconnect_delays = policy.delays()
+            delay = next(self._reconnect_delays, None)
+            if delay is None:
+                self.logger.error(
+                    "Connections to %s keep closing, giving up.", transport
+                )
+                return False
+            await asyncio.sleep(delay)
+        self.logger.info("Lost connection to %s, reconnecting.", transport)
+        try:
+            await self.reconnect()
+        except OSError as e:
+            self.logger.error("Reconnecting to %s failed: %s", transport, e)
+            return False
+        if self.on_reconnect is not None:
+            task = asyncio.ensure_future(self.on_reconnect())
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        return True
+
     async def read_response(self) -> None:
         """
         Read a single response from the LSP server and dispatch it.
         """
-        content_length = 0
-        content_type = None
-
-        # Read headers until the blank separator line.
-        while True:
-            line = await self._async_read_line()
-            if line == b"":
-                raise EOFError("LSP server closed its stdout")
-            # Strip \r\n / \n so header parsing is not sensitive to line endings.
-            decoded_line = line.decode(DEFAULT_ENCODING).rstrip("\r\n")
-            if decoded_line.startswith("Content-Length:"):
-                content_length = int(decoded_line.split(":", 1)[1].strip())
-            elif decoded_line.startswith("Content-Type:"):
-                content_type = decoded_line.split(":", 1)[1].strip()
-            elif decoded_line == "":
-                break
+        frame = await self._read_frame()
+        if self.recorder is not None:
+            self.recorder.record(Direction.IN, frame.body)
+        metrics = self.metrics
+        started = clock() if metrics is not None else 0.0
 
         try:
-            content_type, encoding = parse_content_type(content_type)
+            content_type, encoding = parse_content_type(frame.content_type)
         except EncodingError as e:
             self.logger.warning("Unrecognised encoding, skipping message: %s", e)
             return
@@ -159,45 +638,211 @@ class LSPClient(object):
             self.logger.warning("Unsupported content type, skipping message: %s", e)
             return
 
-        response = await self._async_read(content_length)
-        decoded_response = response.decode(encoding)
-        response = json.loads(decoded_response)
+        if self.lazy_decoding and is_utf8(encoding):
+            envelope = peek_envelope(frame.body)
+            if envelope is not None and self._dispatch_envelope(envelope, frame.body):
+                if metrics is not None:
+                    metrics.record_in(len(frame.body), clock() - started)
+                return
+
+        response = self.codec.decode(frame.body, encoding)
+        if metrics is None:
+            await self._handle_response(response)
+            return
+        metrics.record_in(len(frame.body), clock() - started)
         await self._handle_response(response)
+        metrics.record_reader_busy(clock() - started)
+
+    async def _read_frame(self) -> Frame:
+        """
+        Return the next complete frame, reading from the server as needed.
+        """
+        frame = self._parser.next_frame()
+        while frame is None:
+            chunk = await self._async_read(
+                max(self.read_chunk_size, self._parser.bytes_needed)
+            )
+            if chunk == b"":
+                raise EOFError("LSP server closed its stdout")
+            self._connection_used = True
+            self._parser.feed(chunk)
+            frame = self._parser.next_frame()
+        return frame
+
+    async def flush(self) -> None:
+        """
+        Write out all queued messages and wait until the server's stdin has
+        drained.
+
+        Messages are written in batches at the end of each event loop
+        iteration, so callers only need this to make sure that messages have
+        left the client, e.g. before shutting the server down.
+        """
+        if self.writer is not None:
+            await self.writer.flush()
 
     async def _async_write_request(
         self, header_bytes: bytes, request_bytes: bytes
     ) -> None:
         """
-        Write header and body bytes to the LSP server subprocess.
+        Queue header and body bytes for writing to the LSP server subprocess.
+
+        Waits for the server's stdin to drain only once the queue reaches the
+        writer's flush threshold.
         """
-        assert self.stdin is not None
-        self.stdin.write(header_bytes)
-        self.stdin.write(request_bytes)
-        await self.stdin.drain()
+        assert self.writer is not None
+        if self.writer.write(header_bytes, request_bytes):
+            await self.writer.flush()
 
-    async def _async_read(self, content_length: int) -> bytes:
+    async def _async_read(self, max_bytes: int) -> bytes:
         """
-        Read exactly `content_length` bytes from the server, handling partial
-        reads caused by system buffer limits.
+        Read whatever the server has sent, up to `max_bytes` bytes.
         """
         assert self.stdout is not None
-        response = await self.stdout.read(content_length)
-        while len(response) < content_length:
-            chunk = await self.stdout.read(content_length - len(response))
-            if chunk == b"":
-                raise EOFError("LSP server closed its stdout mid-message")
-            response += chunk
-        return response
+        return await self.stdout.read(max_bytes)
 
-    async def _async_read_line(self) -> bytes:
+    def _dispatch_envelope(self, envelope: Envelope, body: bytes | bytearray) -> bool:
         """
-        Read one line (up to and including the newline) from the server.
+        Handle a message from its envelope alone, if possible.
+
+        Late responses to cancelled requests and ignored notifications are
+        dropped, and responses to lazy requests resolve their future with the
+        undecoded message.
+
+        Returns:
+            True if the message was handled and need not be decoded.
         """
-        assert self.stdout is not None
-        return await self.stdout.readline()
+        message_id = envelope.id
+        if envelope.method == "$/progress" and self._partial_streams:
+            # The token is in the params, which the envelope does not cover.
+            return False
+        if envelope.is_response:
+            assert message_id is not None
+            if message_id in self._lazy:
+                self._lazy.discard(message_id)
+                future = self._pending.pop(message_id, None)
+                if future is not None and not future.done():
+                    future.set_result(LazyMessage(envelope, body, self.codec))
+                return True
+            return self._cancelled.pop(message_id, False) is None
+        return message_id is None and envelope.method in self.ignored_methods
 
     async def _handle_response(self, response: dict) -> None:
         """
-        Delegate a parsed response to the registered response handler.
+        Resolve the pending request a response belongs to, or delegate the
+        message to the registered response handler.
+
+        Notifications, server-to-client requests and responses to requests
+        this client is not waiting on are passed to the response handler, or
+        to the dispatcher if the client has one, which handles them without
+        blocking the reader loop.
         """
+        response_id = response.get("id")
+        if "method" not in response and response_id is not None:
+            future = self._pending.pop(response_id, None)
+            if future is not None:
+                if response_id in self._lazy:
+                    self._lazy.discard(response_id)
+                    if not future.done():
+                        future.set_result(
+                            LazyMessage.from_payload(response, self.codec)
+                        )
+                    return
+                self._resolve(future, response)
+                return
+            if self._cancelled.pop(response_id, False) is None:
+                # Late response to a cancelled request.
+                return
+        elif response_id is None:
+            method = response.get("method")
+            if method == "$/progress" and self._partial_streams:
+                params = response.get("params") or {}
+                stream = self._partial_streams.get(params.get("token", ""))
+                if stream is not None:
+                    stream.feed(params.get("value"))
+                    return
+            diagnostics = self.diagnostics
+            if method == "textDocument/publishDiagnostics" and diagnostics is not None:
+                diagnostics.publish(response.get("params") or {})
+                return
+            if method in self.ignored_methods:
+                return
+        if self.dispatcher is not None:
+            self.dispatcher.dispatch(response)
+            return
+        if self.metrics is None:
+            await self.response_handler(response)
+            return
+        started = clock()
         await self.response_handler(response)
+        self.metrics.record_handler(clock() - started)
+
+    def _cancel_if_abandoned(
+        self, request_id: int | str, future: asyncio.Future[Any]
+    ) -> None:
+        """
+        Send `$/cancelRequest` for a request whose future was cancelled while
+        the response was outstanding.
+        """
+        if not future.cancelled() or self._pending.pop(request_id, None) is None:
+            return
+        self._lazy.discard(request_id)
+        self._cancelled[request_id] = None
+        while len(self._cancelled) > MAX_CANCELLED_IDS:
+            del self._cancelled[next(iter(self._cancelled))]
+        task = asyncio.ensure_future(
+            self.send_notification(
+                CancelNotification(params=CancelParams(id=request_id))
+            )
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _fail_pending(self, exception: BaseException) -> None:
+        """Fail all pending requests with `exception`."""
+        pending = self._pending
+        self._pending = {}
+        self._lazy.clear()
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(exception)
+
+    def _record_request(
+        self, method: str, started: float, future: asyncio.Future[Any]
+    ) -> None:
+        if self.metrics is None:
+            return
+        if future.cancelled():
+            self.metrics.requests_cancelled += 1
+            return
+        error = future.exception() is not None
+        self.metrics.record_request(method, clock() - started, error)
+
+    def _drop_stream(self, token: int | str, future: asyncio.Future[Any]) -> None:
+        self._partial_streams.pop(token, None)
+
+    def _release_slot(self, future: asyncio.Future[Any]) -> None:
+        if self.window is not None:
+            self.window.release()
+
+    def _store_cached(self, key: tuple, future: asyncio.Future[Any]) -> None:
+        if self.cache is not None and not future.cancelled():
+            if future.exception() is None:
+                self.cache.store(key, future.result())
+
+    @staticmethod
+    def _resolve(future: asyncio.Future[Any], response: dict) -> None:
+        """
+        Complete a pending request future from a response message.
+        """
+        if future.done():
+            return
+        error = response.get("error")
+        if error is not None:
+            future.set_exception(
+                ResponseError(
+                    error.get("code", 0), error.get("message", ""), error.get("data")
+                )
+            )
+        else:
+            future.set_result(response.get("result"))
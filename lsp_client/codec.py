@@ -0,0 +1,94 @@
+"""
+JSON codecs used to encode and decode LSP message bodies.
+
+orjson and msgspec are used when installed, since they encode to and decode
+from bytes directly without an intermediate str. The stdlib json module is
+the fallback.
+"""
+
+import json
+from typing import Any
+
+from .utils import DEFAULT_ENCODING, is_utf8
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None  # type: ignore[assignment]
+
+
+class JSONCodec(object):
+    """
+    Encodes messages to UTF-8 JSON bytes and decodes message bodies.
+    """
+
+    name = "json"
+
+    def encode(self, message: Any) -> bytes:
+        """
+        Serialise a message to UTF-8 encoded JSON.
+        """
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode(
+            DEFAULT_ENCODING
+        )
+
+    def decode(self, data: bytes | bytearray, encoding: str = DEFAULT_ENCODING) -> Any:
+        """
+        Deserialise a message body sent in the given encoding.
+        """
+        return json.loads(data.decode(encoding))
+
+
+class OrjsonCodec(JSONCodec):
+    """Codec backed by orjson."""
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def encode(self, message: Any) -> bytes:
+        return orjson.dumps(message)
+
+    def decode(self, data: bytes | bytearray, encoding: str = DEFAULT_ENCODING) -> Any:
+        if is_utf8(encoding):
+            return orjson.loads(data)
+        return orjson.loads(data.decode(encoding))
+
+
+class MsgspecCodec(JSONCodec):
+    """Codec backed by msgspec."""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        if msgspec is None:
+            raise ImportError("msgspec is not installed")
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def encode(self, message: Any) -> bytes:
+        data: bytes = self._encoder.encode(message)
+        return data
+
+    def decode(self, data: bytes | bytearray, encoding: str = DEFAULT_ENCODING) -> Any:
+        if is_utf8(encoding):
+            return self._decoder.decode(data)
+        return self._decoder.decode(data.decode(encoding).encode(DEFAULT_ENCODING))
+
+
+def default_codec() -> JSONCodec:
+    """
+    Return the fastest codec available in this environment.
+    """
+    if orjson is not None:
+        return OrjsonCodec()
+    if msgspec is not None:
+        return MsgspecCodec()
+    return JSONCodec()
@@ -0,0 +1,204 @@
+"""
+Store of the latest diagnostics per document.
+
+Servers republish `textDocument/publishDiagnostics` many times during edits,
+often with unchanged content. DiagnosticsStore keeps only the latest
+diagnostics of each document, drops outdated versions and unchanged payloads,
+and notifies subscribers once per burst instead of once per message.
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Iterator, NamedTuple
+
+from .codec import JSONCodec, default_codec
+
+# Seconds during which updates are collected before subscribers are notified.
+DEFAULT_COALESCE_WINDOW = 0.05
+
+Subscriber = Callable[[list["DiagnosticsEntry"]], Awaitable[None] | None]
+
+
+class DiagnosticsStats(NamedTuple):
+    received: int
+    stale: int
+    duplicates: int
+    notifications: int
+    size: int
+
+
+class DiagnosticsEntry(object):
+    """
+    The diagnostics of one document version.
+
+    Diagnostics are kept in their encoded form and decoded on access.
+    """
+
+    __slots__ = ("uri", "version", "digest", "data", "_codec")
+
+    def __init__(
+        self,
+        uri: str,
+        version: int | None,
+        digest: bytes,
+        data: bytes,
+        codec: JSONCodec,
+    ) -> None:
+        self.uri = uri
+        self.version = version
+        self.digest = digest
+        self.data = data
+        self._codec = codec
+
+    @property
+    def diagnostics(self) -> list[dict[str, Any]]:
+        diagnostics: list[dict[str, Any]] = self._codec.decode(self.data)
+        return diagnostics
+
+    def __repr__(self) -> str:
+        return f"DiagnosticsEntry(uri={self.uri!r}, version={self.version!r})"
+
+
+class DiagnosticsStore(object):
+    """
+    Latest diagnostics per document uri, fed by an LSPClient.
+
+    A publication is dropped if its version is older than the stored one, or
+    if its diagnostics are identical to the stored ones. Accepted updates are
+    collected for `coalesce_window` seconds; subscribers are then called once
+    with the latest entry of each document that changed.
+    """
+
+    def __init__(
+        self,
+        coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+        codec: JSONCodec | None = None,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        self.coalesce_window = coalesce_window
+        self.codec = codec if codec is not None else default_codec()
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self._entries: dict[str, DiagnosticsEntry] = {}
+        self._subscribers: list[Subscriber] = []
+        # Updated entries not yet passed to subscribers, keyed by uri.
+        self._updates: dict[str, DiagnosticsEntry] = {}
+        # Digest of the diagnostics subscribers last saw, per uri.
+        self._notified: dict[str, bytes] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._background_tasks: set[asyncio.Future[None]] = set()
+        self._received = 0
+        self._stale = 0
+        self._duplicates = 0
+        self._notifications = 0
+
+    @property
+    def stats(self) -> DiagnosticsStats:
+        return DiagnosticsStats(
+            self._received,
+            self._stale,
+            self._duplicates,
+            self._notifications,
+            len(self._entries),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[DiagnosticsEntry]:
+        return iter(list(self._entries.values()))
+
+    def get(self, uri: str) -> DiagnosticsEntry | None:
+        return self._entries.get(uri)
+
+    def subscribe(self, subscriber: Subscriber) -> Callable[[], None]:
+        """
+        Call `subscriber` with the entries updated in each burst. It may be a
+        plain or an async function.
+
+        Returns:
+            A function that removes the subscription.
+        """
+        self._subscribers.append(subscriber)
+        return lambda: self._subscribers.remove(subscriber)
+
+    def publish(self, params: dict[str, Any]) -> bool:
+        """
+        Record the params of a `textDocument/publishDiagnostics` notification.
+
+        Returns:
+            True if the diagnostics were new.
+        """
+        self._received += 1
+        uri = params.get("uri")
+        if uri is None:
+            return False
+        version = params.get("version")
+        current = self._entries.get(uri)
+        if (
+            current is not None
+            and version is not None
+            and current.version is not None
+            and version < current.version
+        ):
+            self._stale += 1
+            return False
+        data = self.codec.encode(params.get("diagnostics") or [])
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        if current is not None and current.digest == digest:
+            self._duplicates += 1
+            if version is not None:
+                current.version = version
+            return False
+        entry = DiagnosticsEntry(uri, version, digest, data, self.codec)
+        self._entries[uri] = entry
+        self._updates[uri] = entry
+        if self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.coalesce_window, self.flush)
+        return True
+
+    def clear(self, uri: str | None = None) -> None:
+        """Forget the diagnostics of one document, or of all documents."""
+        if uri is None:
+            self._entries.clear()
+            self._updates.clear()
+            self._notified.clear()
+        else:
+            self._entries.pop(uri, None)
+            self._updates.pop(uri, None)
+            self._notified.pop(uri, None)
+
+    def flush(self) -> None:
+        """Notify subscribers of pending updates now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        updates = [
+            entry
+            for entry in self._updates.values()
+            if self._notified.get(entry.uri) != entry.digest
+        ]
+        self._updates.clear()
+        if not updates:
+            return
+        for entry in updates:
+            self._notified[entry.uri] = entry.digest
+        self._notifications += 1
+        for subscriber in list(self._subscribers):
+            try:
+                outcome = subscriber(updates)
+            except Exception:
+                self.logger.exception("Diagnostics subscriber failed")
+                continue
+            if outcome is not None:
+                task = asyncio.ensure_future(outcome)
+                self._background_tasks.add(task)
+                task.add_done_callback(self._subscriber_done)
+
+    def _subscriber_done(self, task: asyncio.Future[None]) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error(
+                "Diagnostics subscriber failed", exc_info=task.exception()
+            )
@@ -0,0 +1,233 @@
+"""
+Dispatch of notifications and server-to-client requests to handlers.
+
+The Dispatcher runs handlers in tasks so that the reader loop of an LSPClient
+never waits on user code. Handlers are looked up by method. Messages that
+share an ordering key, such as the uri of `textDocument/publishDiagnostics`,
+are handled one at a time in arrival order; all others run concurrently, up to
+a bound.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable
+
+from .metrics import ClientMetrics, clock
+from .protocol import ErrorCodes, ResponseError
+
+Handler = Callable[[dict], Awaitable[Any]]
+KeyFunction = Callable[[dict], Hashable | None]
+# Sends a response given the request id, result and error, as
+# LSPClient.send_response does.
+Responder = Callable[[int | str, Any, ResponseError | None], Awaitable[None]]
+
+DEFAULT_MAX_CONCURRENCY = 32
+
+
+def by_uri(message: dict) -> str | None:
+    """
+    Ordering key of messages about one document, such as diagnostics.
+    """
+    params = message.get("params") or {}
+    uri = params.get("uri")
+    if uri is None:
+        uri = (params.get("textDocument") or {}).get("uri")
+    return uri
+
+
+def _is_request(message: dict) -> bool:
+    # A message with an id but no method is an unmatched response, which is
+    # not answered.
+    return "id" in message and "method" in message
+
+
+class Dispatcher(object):
+    """
+    Method-keyed registry of handlers, run off the reader loop.
+
+    A handler is called with the message. For server-to-client requests, its
+    return value becomes the `result` of the response; raising ResponseError
+    sends that error, and any other exception an InternalError. Messages
+    without a registered handler go to the fallback handler, if set, and
+    requests without either are answered with MethodNotFound. The fallback
+    handler is responsible for answering the requests it receives.
+
+    Pending messages beyond `max_concurrency` wait in a queue; dispatch()
+    itself never blocks.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.fallback: Handler | None = None
+        self.metrics: ClientMetrics | None = None
+        self._respond: Responder | None = None
+        self._handlers: dict[str, Handler] = {}
+        self._key_functions: dict[str, KeyFunction] = {}
+        # Jobs ready to run, each a handler, message and ordering key.
+        self._ready: deque[tuple[Handler, dict, Hashable | None]] = deque()
+        # Messages waiting behind a running job with the same key.
+        self._lanes: dict[Hashable, deque[tuple[Handler, dict]]] = {}
+        self._running: set[asyncio.Task[None]] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def attach(
+        self,
+        respond: Responder,
+        fallback: Handler | None = None,
+        metrics: ClientMetrics | None = None,
+    ) -> None:
+        """
+        Connect the dispatcher to a client. Called by LSPClient.
+        """
+        self._respond = respond
+        if self.fallback is None:
+            self.fallback = fallback
+        self.metrics = metrics
+
+    def register(
+        self, method: str, handler: Handler, key: KeyFunction | None = None
+    ) -> None:
+        """
+        Register the handler of a method, replacing any previous one.
+
+        Args:
+            method: The method of the notifications or requests to handle.
+            handler: Async callable receiving each message.
+            key: Function returning the ordering key of a message. Messages
+                with equal keys are handled sequentially in arrival order.
+        """
+        self._handlers[method] = handler
+        if key is None:
+            self._key_functions.pop(method, None)
+        else:
+            self._key_functions[method] = key
+
+    def unregister(self, method: str) -> None:
+        self._handlers.pop(method, None)
+        self._key_functions.pop(method, None)
+
+    def handler(
+        self, method: str, key: KeyFunction | None = None
+    ) -> Callable[[Handler], Handler]:
+        """Decorator form of register()."""
+
+        def decorate(handler: Handler) -> Handler:
+            self.register(method, handler, key)
+            return handler
+
+        return decorate
+
+    @property
+    def backlog(self) -> int:
+        """The number of messages waiting for a handler to run."""
+        return len(self._ready) + sum(len(lane) for lane in self._lanes.values())
+
+    def dispatch(self, message: dict) -> None:
+        """
+        Schedule the handling of a notification or server-to-client request.
+        """
+        method = message.get("method")
+        handler = self._handlers.get(method) if method is not None else None
+        if handler is None:
+            handler = self.fallback
+            if handler is None:
+                if _is_request(message):
+                    self._schedule_reply(
+                        message,
+                        ResponseError(
+                            int(ErrorCodes.MethodNotFound), f"Unhandled method {method}"
+                        ),
+                    )
+                return
+        key_function = self._key_functions.get(method) if method is not None else None
+        key = key_function(message) if key_function is not None else None
+        if key is not None:
+            lane = self._lanes.get(key)
+            if lane is not None:
+                lane.append((handler, message))
+                return
+            self._lanes[key] = deque()
+        self._ready.append((handler, message, key))
+        self._idle.clear()
+        self._start_ready()
+
+    async def join(self) -> None:
+        """Wait until all dispatched messages have been handled."""
+        await self._idle.wait()
+
+    async def close(self) -> None:
+        """Drop queued messages and cancel running handlers."""
+        self._ready.clear()
+        self._lanes.clear()
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        self._idle.set()
+
+    def _start_ready(self) -> None:
+        while self._ready and len(self._running) < self.max_concurrency:
+            handler, message, key = self._ready.popleft()
+            task = asyncio.ensure_future(self._run(handler, message))
+            self._running.add(task)
+            task.add_done_callback(partial(self._finished, key=key))
+
+    def _finished(self, task: asyncio.Task[None], key: Hashable | None) -> None:
+        self._running.discard(task)
+        if key is not None:
+            lane = self._lanes.get(key)
+            if lane:
+                handler, message = lane.popleft()
+                self._ready.append((handler, message, key))
+            else:
+                self._lanes.pop(key, None)
+        self._start_ready()
+        if not self._running and not self._ready:
+            self._idle.set()
+
+    async def _run(self, handler: Handler, message: dict) -> None:
+        started = clock() if self.metrics is not None else 0.0
+        try:
+            result = await handler(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if _is_request(message):
+                await self._reply(message, e)
+            else:
+                self.logger.exception("Handler for %s failed", message.get("method"))
+            return
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_handler(clock() - started)
+        if _is_request(message) and handler is not self.fallback:
+            await self._reply(message, result)
+
+    def _schedule_reply(self, message: dict, result: Any) -> None:
+        task = asyncio.ensure_future(self._reply(message, result))
+        self._running.add(task)
+        self._idle.clear()
+        task.add_done_callback(partial(self._finished, key=None))
+
+    async def _reply(self, message: dict, result: Any) -> None:
+        if self._respond is None:
+            return
+        if isinstance(result, ResponseError):
+            await self._respond(message["id"], None, result)
+        elif isinstance(result, Exception):
+            self.logger.exception(
+                "Handler for %s failed", message.get("method"), exc_info=result
+            )
+            error = ResponseError(int(ErrorCodes.InternalError), str(result))
+            await self._respond(message["id"], None, error)
+        else:
+            await self._respond(message["id"], result, None)
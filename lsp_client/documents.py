@@ -0,0 +1,204 @@
+"""
+Client-side store of open text documents.
+
+The DocumentManager keeps a copy of every document it opened on the server,
+together with its version, and turns new document contents into minimal
+`textDocument/didChange` notifications.
+"""
+
+from typing import Any
+
+from . import fast
+from .client import LSPClient
+from .protocol import ContentChange, PositionEncodingKind, TextDocumentSyncKind
+from .text import TextBuffer
+
+# Compare texts in blocks of this many characters before narrowing down to the
+# first differing character, so that long common prefixes are skipped at C
+# speed.
+_BLOCK_SIZE = 4096
+
+
+class Document(object):
+    """An open text document as last sent to the server."""
+
+    __slots__ = ("uri", "language_id", "version", "buffer")
+
+    def __init__(self, uri: str, language_id: str, version: int, text: str) -> None:
+        self.uri = uri
+        self.language_id = language_id
+        self.version = version
+        self.buffer = TextBuffer(text)
+
+    @property
+    def text(self) -> str:
+        return self.buffer.text
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    limit = min(len(a), len(b))
+    length = 0
+    while (
+        length + _BLOCK_SIZE <= limit
+        and a[length : length + _BLOCK_SIZE] == b[length : length + _BLOCK_SIZE]
+    ):
+        length += _BLOCK_SIZE
+    while length < limit and a[length] == b[length]:
+        length += 1
+    return length
+
+
+def _common_suffix_length(a: str, b: str, limit: int) -> int:
+    length = 0
+    while (
+        length + _BLOCK_SIZE <= limit
+        and a[len(a) - length - _BLOCK_SIZE : len(a) - length]
+        == b[len(b) - length - _BLOCK_SIZE : len(b) - length]
+    ):
+        length += _BLOCK_SIZE
+    while length < limit and a[len(a) - length - 1] == b[len(b) - length - 1]:
+        length += 1
+    return length
+
+
+def compute_edit(old: str, new: str) -> tuple[int, int, str] | None:
+    """
+    Compute a single edit that turns `old` into `new`.
+
+    The edit replaces the part of `old` between the longest common prefix and
+    the longest common suffix of both texts. Returns the start and end offsets
+    of the replaced part and its replacement, or None if the texts are equal.
+    """
+    if old == new:
+        return None
+    prefix = _common_prefix_length(old, new)
+    # Do not split a \r\n line ending.
+    if prefix and old[prefix - 1] == "\r":
+        prefix -= 1
+    suffix = _common_suffix_length(old, new, min(len(old), len(new)) - prefix)
+    old_end = len(old) - suffix
+    if (
+        suffix
+        and old[old_end] == "\n"
+        and old_end > prefix
+        and old[old_end - 1] == "\r"
+    ):
+        suffix -= 1
+        old_end += 1
+    return prefix, old_end, new[prefix : len(new) - suffix]
+
+
+def compute_change(
+    old: str,
+    new: str,
+    encoding: PositionEncodingKind = PositionEncodingKind.UTF16,
+) -> ContentChange | None:
+    """
+    Compute a single range edit that turns `old` into `new`, or None if the
+    texts are equal.
+    """
+    edit = compute_edit(old, new)
+    if edit is None:
+        return None
+    start, end, text = edit
+    return ContentChange(
+        range=TextBuffer(old).range_at(start, end, encoding), text=text
+    )
+
+
+class DocumentManager(object):
+    """
+    Tracks the documents open on an LSP server and keeps them in sync.
+
+    Callers hand in the full new text of a document; the manager increments
+    the version and sends only the changed range, or the full text if the
+    server requested full document sync.
+    """
+
+    def __init__(
+        self,
+        client: LSPClient,
+        sync_kind: TextDocumentSyncKind = TextDocumentSyncKind.INCREMENTAL,
+        position_encoding: PositionEncodingKind = PositionEncodingKind.UTF16,
+    ) -> None:
+        self.client = client
+        self.sync_kind = sync_kind
+        self.position_encoding = position_encoding
+        self.documents: dict[str, Document] = {}
+
+    def set_server_capabilities(self, capabilities: dict | None) -> None:
+        """
+        Adopt the change sync kind and position encoding announced in the
+        server's capabilities.
+
+        Args:
+            capabilities: The `capabilities` member of the InitializeResult.
+        """
+        self.sync_kind = TextDocumentSyncKind.from_server_capabilities(capabilities)
+        self.position_encoding = PositionEncodingKind.from_server_capabilities(
+            capabilities
+        )
+
+    def get(self, uri: str) -> Document | None:
+        return self.documents.get(uri)
+
+    async def open(
+        self, uri: str, language_id: str, text: str, version: int = 0
+    ) -> Document:
+        """
+        Open a document on the server and start tracking it.
+        """
+        document = Document(uri, language_id, version, text)
+        self.documents[uri] = document
+        await self.client.send_notification(
+            fast.did_open_notification(uri, language_id, version, text)
+        )
+        return document
+
+    async def change(self, uri: str, text: str) -> list[dict[str, Any]]:
+        """
+        Update a tracked document to `text` and notify the server.
+
+        Messages are built with the unvalidated builders in lsp_client.fast,
+        as this runs on every keystroke.
+
+        Returns:
+            The content changes sent, in wire format; empty if the text did not
+            change.
+
+        Raises:
+            KeyError: If the document is not open.
+        """
+        document = self.documents[uri]
+        edit = compute_edit(document.text, text)
+        if edit is None:
+            return []
+        start, end, replacement = edit
+        if self.sync_kind == TextDocumentSyncKind.FULL:
+            changes = [fast.content_change(text)]
+        else:
+            buffer = document.buffer
+            encoding = self.position_encoding
+            changes = [
+                fast.content_change(
+                    replacement,
+                    fast.range_(
+                        *buffer.line_character_at(start, encoding),
+                        *buffer.line_character_at(end, encoding),
+                    ),
+                )
+            ]
+        document.buffer.replace(start, end, replacement)
+        document.version += 1
+        if self.sync_kind != TextDocumentSyncKind.NONE:
+            await self.client.send_notification(
+                fast.did_change_notification(uri, document.version, changes)
+            )
+        return changes
+
+    async def close(self, uri: str) -> None:
+        """
+        Close a tracked document on the server and stop tracking it.
+        """
+        del self.documents[uri]
+        await self.client.send_notification(fast.did_close_notification(uri))
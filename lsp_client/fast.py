@@ -0,0 +1,76 @@
+"""
+Unvalidated fast path for building hot protocol messages.
+
+The builders return the wire representation of a message as plain dicts,
+with the same keys in the same order as `model_dump(exclude_none=True)` of the
+corresponding models in protocol.py, so that both encode to identical JSON.
+They skip pydantic validation entirely: callers must pass values of the right
+types. LSPClient.send_notification accepts the resulting dicts directly.
+"""
+
+from typing import Any
+
+JSONRPC_VERSION = "2.0"
+
+
+def position(line: int, character: int) -> dict[str, int]:
+    """Build a Position."""
+    return {"line": line, "character": character}
+
+
+def range_(
+    start_line: int, start_character: int, end_line: int, end_character: int
+) -> dict[str, dict[str, int]]:
+    """Build a Range from the coordinates of its start and end."""
+    return {
+        "start": {"line": start_line, "character": start_character},
+        "end": {"line": end_line, "character": end_character},
+    }
+
+
+def content_change(text: str, range: dict | None = None) -> dict[str, Any]:
+    """Build a ContentChange; a change without range replaces the full text."""
+    if range is None:
+        return {"text": text}
+    return {"text": text, "range": range}
+
+
+def did_open_notification(
+    uri: str, language_id: str, version: int, text: str
+) -> dict[str, Any]:
+    """Build a `textDocument/didOpen` notification."""
+    return {
+        "jsonrpc": JSONRPC_VERSION,
+        "method": "textDocument/didOpen",
+        "params": {
+            "textDocument": {
+                "uri": uri,
+                "languageId": language_id,
+                "version": version,
+                "text": text,
+            }
+        },
+    }
+
+
+def did_change_notification(
+    uri: str, version: int, content_changes: list[dict[str, Any]]
+) -> dict[str, Any]:
+    """Build a `textDocument/didChange` notification."""
+    return {
+        "jsonrpc": JSONRPC_VERSION,
+        "method": "textDocument/didChange",
+        "params": {
+            "textDocument": {"uri": uri, "version": version},
+            "contentChanges": content_changes,
+        },
+    }
+
+
+def did_close_notification(uri: str) -> dict[str, Any]:
+    """Build a `textDocument/didClose` notification."""
+    return {
+        "jsonrpc": JSONRPC_VERSION,
+        "method": "textDocument/didClose",
+        "params": {"textDocument": {"uri": uri}},
+    }
@@ -0,0 +1,115 @@
+"""
+Flow control for requests sent to an LSP server.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import NamedTuple
+
+DEFAULT_MAX_IN_FLIGHT = 64
+
+
+class Priority(IntEnum):
+    """Priority classes of requests; lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class WindowStats(NamedTuple):
+    in_flight: int
+    max_in_flight: int
+    # Number of requests waiting for a slot, per priority.
+    queued: dict[Priority, int]
+    # Number of requests that had to wait, and their total and longest wait in
+    # seconds.
+    waits: int
+    total_wait: float
+    max_wait: float
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.waits if self.waits else 0.0
+
+
+class RequestWindow(object):
+    """
+    Bounds the number of requests in flight.
+
+    A request takes a slot before it is sent and gives it back once its
+    response arrives. When all slots are taken, senders wait, which applies
+    backpressure to the caller. Freed slots go to waiting interactive requests
+    before background ones, and first come first served within a priority.
+    """
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> None:
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._queued = {priority: 0 for priority in Priority}
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of requests waiting for a slot."""
+        return sum(self._queued.values())
+
+    @property
+    def stats(self) -> WindowStats:
+        return WindowStats(
+            self._in_flight,
+            self.max_in_flight,
+            dict(self._queued),
+            self._waits,
+            self._total_wait,
+            self._max_wait,
+        )
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        """
+        Take a slot, waiting until one is free.
+        """
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._queued[priority] += 1
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before the cancellation.
+                self.release()
+            raise
+        finally:
+            self._queued[priority] -= 1
+            waited = time.monotonic() - started
+            self._waits += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+    def release(self) -> None:
+        """
+        Give back a slot, handing it to the next waiting request if any.
+        """
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot passes to the waiter; the in-flight count stays.
+                future.set_result(None)
+                return
+        self._in_flight -= 1
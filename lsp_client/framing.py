@@ -0,0 +1,147 @@
+"""
+Incremental parser for the base protocol framing of LSP messages.
+
+See https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#baseProtocol
+"""
+
+import re
+from collections import deque
+from typing import NamedTuple
+
+from .protocol import ProtocolError
+
+# Headers end with an empty line. The spec mandates \r\n, but bare \n line
+# endings are tolerated so that header parsing is not sensitive to them.
+HEADER_TERMINATOR = re.compile(rb"\r?\n\r?\n")
+DEFAULT_MAX_HEADER_SIZE = 8192
+
+
+class Frame(NamedTuple):
+    """A complete message: its Content-Type header, if any, and its body."""
+
+    content_type: str | None
+    body: bytes | bytearray
+
+
+def parse_headers(header_bytes: bytes | bytearray) -> tuple[int, str | None]:
+    """
+    Parse a header block and return the content length and content type.
+
+    Raises ProtocolError if Content-Length is missing or malformed.
+    """
+    content_length = None
+    content_type = None
+    for line in header_bytes.splitlines():
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            try:
+                content_length = int(value)
+            except ValueError:
+                raise ProtocolError(f"Invalid Content-Length header: {value!r}")
+        elif name == b"content-type":
+            content_type = value.strip().decode("ascii")
+    if content_length is None or content_length < 0:
+        raise ProtocolError("Message without valid Content-Length header")
+    return content_length, content_type
+
+
+class FrameParser(object):
+    """
+    Buffered framing engine that splits a byte stream into messages.
+
+    Bytes are fed in arbitrary chunks. Header terminators are found with a
+    single scan of the buffer, and headers are parsed directly from bytes.
+    Bodies that do not fit in the bytes already received are assembled in a
+    preallocated buffer, so large messages are copied once rather than grown
+    chunk by chunk. A single chunk may complete several frames.
+    """
+
+    def __init__(self, max_header_size: int = DEFAULT_MAX_HEADER_SIZE) -> None:
+        self.max_header_size = max_header_size
+        self._buffer = bytearray()
+        self._frames: deque[Frame] = deque()
+        # Position from which to resume scanning for the header terminator.
+        self._scan_from = 0
+        # Preallocated body of a partially received frame.
+        self._body: bytearray | None = None
+        self._body_view: memoryview | None = None
+        self._body_filled = 0
+        self._body_content_type: str | None = None
+
+    @property
+    def bytes_needed(self) -> int:
+        """
+        The number of bytes still missing from a partially received body, or
+        0 if the parser is not in the middle of a body.
+        """
+        if self._body is None:
+            return 0
+        return len(self._body) - self._body_filled
+
+    def feed(self, data: bytes | bytearray | memoryview) -> None:
+        """
+        Add received bytes to the parser.
+
+        Raises ProtocolError if the stream contains malformed headers.
+        """
+        view = memoryview(data)
+        if self._body_view is not None:
+            view = self._fill_body(view)
+        if view:
+            self._buffer += view
+            self._parse_buffer()
+
+    def next_frame(self) -> Frame | None:
+        """
+        Return the next complete frame, or None if none is available.
+        """
+        if self._frames:
+            return self._frames.popleft()
+        return None
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def _fill_body(self, view: memoryview) -> memoryview:
+        assert self._body is not None and self._body_view is not None
+        count = min(len(view), len(self._body) - self._body_filled)
+        self._body_view[self._body_filled : self._body_filled + count] = view[:count]
+        self._body_filled += count
+        if self._body_filled == len(self._body):
+            self._frames.append(Frame(self._body_content_type, self._body))
+            self._body_view.release()
+            self._body = None
+            self._body_view = None
+            self._body_filled = 0
+            self._body_content_type = None
+        return view[count:]
+
+    def _parse_buffer(self) -> None:
+        buffer = self._buffer
+        while buffer:
+            match = HEADER_TERMINATOR.search(buffer, self._scan_from)
+            if match is None:
+                if len(buffer) > self.max_header_size:
+                    raise ProtocolError("Message header exceeds maximum size")
+                # The terminator may straddle the next chunk.
+                self._scan_from = max(0, len(buffer) - 3)
+                return
+            content_length, content_type = parse_headers(buffer[: match.start()])
+            start = match.end()
+            end = start + content_length
+            self._scan_from = 0
+            if end <= len(buffer):
+                self._frames.append(Frame(content_type, bytes(buffer[start:end])))
+                del buffer[:end]
+                continue
+            # Incomplete body: move what we have into a buffer of the final size
+            # and copy the remaining bytes straight into it as they arrive.
+            self._body = bytearray(content_length)
+            self._body_view = memoryview(self._body)
+            self._body_content_type = content_type
+            with memoryview(buffer) as received:
+                self._body_view[: len(buffer) - start] = received[start:]
+            self._body_filled = len(buffer) - start
+            buffer.clear()
+            return
@@ -0,0 +1,189 @@
+"""
+Lazy decoding of incoming messages.
+
+`peek_envelope` reads the `id` and `method` of a message from the start of its
+body without parsing the rest, so that messages can be routed, or dropped,
+before paying for a full decode. LazyMessage defers decoding, and validation
+into typed models, until a consumer asks for it.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+from pydantic import TypeAdapter
+
+from .codec import JSONCodec
+from .protocol import ResponseError
+from .utils import DEFAULT_ENCODING
+
+_OBJECT_START = re.compile(rb"\s*\{")
+_KEY = re.compile(rb'\s*"((?:[^"\\]|\\.)*)"\s*:\s*')
+_STRING = re.compile(rb'"((?:[^"\\]|\\.)*)"')
+_SCALAR = re.compile(rb"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|null|true|false")
+_SEPARATOR = re.compile(rb"\s*([,}])")
+_CONTAINER_START = frozenset(b"{[")
+
+
+class Envelope(NamedTuple):
+    """Routing information of a message."""
+
+    id: int | str | None
+    method: str | None
+    # True if the message carries a `result` or `error` member.
+    is_response: bool
+
+
+def _string(raw: bytes) -> str:
+    if b"\\" in raw:
+        value: str = json.loads(b'"' + raw + b'"')
+        return value
+    return raw.decode(DEFAULT_ENCODING)
+
+
+def peek_envelope(body: bytes | bytearray) -> Envelope | None:
+    """
+    Read the envelope of a UTF-8 encoded message from its leading members.
+
+    Scanning stops at the first member whose value is an object or array,
+    such as `params` or `result`, so the cost does not depend on the size of
+    the message. Servers send `id` and `method` ahead of those members in
+    practice. Returns None if the envelope cannot be determined that way; the
+    caller should decode the message fully instead.
+    """
+    match = _OBJECT_START.match(body)
+    if match is None:
+        return None
+    position = match.end()
+    message_id: int | str | None = None
+    method = None
+    is_response = False
+    while True:
+        key_match = _KEY.match(body, position)
+        if key_match is None:
+            return None
+        key = key_match.group(1)
+        position = key_match.end()
+        if position >= len(body):
+            return None
+        if body[position] in _CONTAINER_START:
+            if key in (b"result", b"error"):
+                if message_id is None:
+                    return None
+                return Envelope(message_id, None, True)
+            if key == b"params" and method is not None:
+                return Envelope(message_id, method, False)
+            return None
+        if body[position] == 0x22:  # "
+            string_match = _STRING.match(body, position)
+            if string_match is None:
+                return None
+            value: Any = _string(string_match.group(1))
+            position = string_match.end()
+        else:
+            scalar_match = _SCALAR.match(body, position)
+            if scalar_match is None:
+                return None
+            value = scalar_match.group(0)
+            position = scalar_match.end()
+            if key == b"id":
+                try:
+                    value = int(value)
+                except ValueError:
+                    return None
+        if key == b"id":
+            message_id = value
+        elif key == b"method":
+            method = value
+        elif key in (b"result", b"error"):
+            is_response = True
+        separator = _SEPARATOR.match(body, position)
+        if separator is None:
+            return None
+        position = separator.end()
+        if separator.group(1) == b"}":
+            if is_response and message_id is None:
+                return None
+            if not is_response and method is None:
+                return None
+            return Envelope(message_id, method, is_response)
+
+
+@lru_cache(maxsize=256)
+def _type_adapter(result_type: Any) -> TypeAdapter:
+    return TypeAdapter(result_type)
+
+
+class LazyMessage(object):
+    """
+    A message whose body is decoded on first access.
+    """
+
+    __slots__ = ("envelope", "body", "encoding", "codec", "_payload")
+
+    def __init__(
+        self,
+        envelope: Envelope,
+        body: bytes | bytearray | None,
+        codec: JSONCodec,
+        encoding: str = DEFAULT_ENCODING,
+        payload: dict | None = None,
+    ) -> None:
+        self.envelope = envelope
+        self.body = body
+        self.codec = codec
+        self.encoding = encoding
+        self._payload = payload
+
+    @classmethod
+    def from_payload(cls, payload: dict, codec: JSONCodec) -> "LazyMessage":
+        """Wrap a message that has already been decoded."""
+        envelope = Envelope(
+            payload.get("id"),
+            payload.get("method"),
+            "result" in payload or "error" in payload,
+        )
+        return cls(envelope, None, codec, payload=payload)
+
+    @property
+    def id(self) -> int | str | None:
+        return self.envelope.id
+
+    @property
+    def method(self) -> str | None:
+        return self.envelope.method
+
+    @property
+    def decoded(self) -> bool:
+        return self._payload is not None
+
+    def payload(self) -> dict:
+        """
+        Return the decoded message, decoding it on first access.
+        """
+        if self._payload is None:
+            assert self.body is not None
+            self._payload = self.codec.decode(self.body, self.encoding)
+            self.body = None
+        return self._payload
+
+    def result(self, result_type: Any = None) -> Any:
+        """
+        Return the `result` of a response, validated into `result_type` if
+        given. `result_type` may be any type pydantic can validate, such as a
+        model class or `list[Model]`.
+
+        Raises:
+            ResponseError: If the response carries an error.
+        """
+        payload = self.payload()
+        error = payload.get("error")
+        if error is not None:
+            raise ResponseError(
+                error.get("code", 0), error.get("message", ""), error.get("data")
+            )
+        result = payload.get("result")
+        if result_type is None or result is None:
+            return result
+        return _type_adapter(result_type).validate_python(result)
@@ -0,0 +1,177 @@
+"""
+Latency and throughput metrics of an LSPClient.
+
+Metrics are opt-in: a client only records them when given a ClientMetrics
+instance, and checks for it with a single attribute test otherwise.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Any, Callable
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Time the reader loop may spend on one message before it counts as a stall.
+DEFAULT_STALL_THRESHOLD = 0.05
+
+clock = time.perf_counter
+
+
+class Histogram(object):
+    """Cumulative histogram of observed values with fixed bucket bounds."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        # One count per bound plus one for values above the last bound.
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile as the upper bound of the bucket containing it.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([*self.bounds, float("inf")], self.counts)),
+        }
+
+
+class ClientMetrics(object):
+    """
+    Counters and histograms recorded by an LSPClient.
+
+    Read them with `snapshot()`, or push snapshots to an exporter with
+    `export()`. An observer, if set, is called with the method, latency in
+    seconds and error flag of every completed request.
+    """
+
+    def __init__(
+        self,
+        latency_buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+        stall_threshold: float = DEFAULT_STALL_THRESHOLD,
+        exporter: Callable[[dict[str, Any]], None] | None = None,
+        observer: Callable[[str, float, bool], None] | None = None,
+    ) -> None:
+        self.latency_buckets = latency_buckets
+        self.stall_threshold = stall_threshold
+        self.exporter = exporter
+        self.observer = observer
+        self.request_latency: dict[str, Histogram] = {}
+        self.request_errors: dict[str, int] = {}
+        self.requests_cancelled = 0
+        self.messages_in = 0
+        self.messages_out = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.encode_time = 0.0
+        self.decode_time = 0.0
+        self.handler_time = 0.0
+        self.reader_stalls = 0
+        self.reader_stall_time = 0.0
+        self._pending: Callable[[], int] | None = None
+
+    def bind_pending(self, pending: Callable[[], int]) -> None:
+        """Set the gauge reporting the number of pending requests."""
+        self._pending = pending
+
+    def record_request(self, method: str, latency: float, error: bool) -> None:
+        histogram = self.request_latency.get(method)
+        if histogram is None:
+            histogram = self.request_latency[method] = Histogram(self.latency_buckets)
+        histogram.observe(latency)
+        if error:
+            self.request_errors[method] = self.request_errors.get(method, 0) + 1
+        if self.observer is not None:
+            self.observer(method, latency, error)
+
+    def record_out(self, size: int, encode_time: float) -> None:
+        self.messages_out += 1
+        self.bytes_out += size
+        self.encode_time += encode_time
+
+    def record_in(self, size: int, decode_time: float) -> None:
+        self.messages_in += 1
+        self.bytes_in += size
+        self.decode_time += decode_time
+
+    def record_handler(self, duration: float) -> None:
+        self.handler_time += duration
+
+    def record_reader_busy(self, duration: float) -> None:
+        """Record the time the reader loop spent on one message."""
+        if duration >= self.stall_threshold:
+            self.reader_stalls += 1
+            self.reader_stall_time += duration
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "requests": {
+                method: {
+                    **histogram.snapshot(),
+                    "errors": self.request_errors.get(method, 0),
+                }
+                for method, histogram in self.request_latency.items()
+            },
+            "requests_cancelled": self.requests_cancelled,
+            "pending_requests": self._pending() if self._pending is not None else 0,
+            "messages_in": self.messages_in,
+            "messages_out": self.messages_out,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "encode_time": self.encode_time,
+            "decode_time": self.decode_time,
+            "handler_time": self.handler_time,
+            "reader_stalls": self.reader_stalls,
+            "reader_stall_time": self.reader_stall_time,
+        }
+
+    def export(self) -> dict[str, Any]:
+        """
+        Take a snapshot and pass it to the exporter, if any.
+        """
+        snapshot = self.snapshot()
+        if self.exporter is not None:
+            self.exporter(snapshot)
+        return snapshot
@@ -0,0 +1,90 @@
+"""
+Streaming of partial results.
+
+A request sent with a `partialResultToken` lets the server report its result
+in chunks through `$/progress` notifications carrying that token, ahead of the
+final response. PartialResultStream turns those chunks into an async iterator,
+so that callers can consume results as they arrive and stop early.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator
+
+# Queued after the last chunk.
+_END = object()
+
+
+class PartialResultStream(object):
+    """
+    Async iterator over the chunks of a request's result.
+
+    Each item is the value of one `$/progress` notification, followed by the
+    result of the final response if it is not empty. Iteration raises
+    ResponseError if the server answered with an error.
+    """
+
+    def __init__(self, token: int | str) -> None:
+        self.token = token
+        self.future: asyncio.Future[Any] | None = None
+        self._queue: asyncio.Queue[Any] = asyncio.Queue()
+        self._finished = False
+
+    def attach(self, future: asyncio.Future[Any]) -> None:
+        """Bind the stream to the future of its request."""
+        self.future = future
+        future.add_done_callback(self._finish)
+
+    def feed(self, value: Any) -> None:
+        """Queue a chunk reported with the stream's token."""
+        if not self._finished:
+            self._queue.put_nowait(value)
+
+    def cancel(self) -> None:
+        """
+        Stop the stream and cancel the request. Chunks already queued are
+        discarded.
+        """
+        self._finished = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(_END)
+        if self.future is not None:
+            self.future.cancel()
+
+    async def collect(self) -> list[Any]:
+        """Consume the stream and return all results as one list."""
+        results: list[Any] = []
+        async for chunk in self:
+            if isinstance(chunk, list):
+                results.extend(chunk)
+            else:
+                results.append(chunk)
+        return results
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self
+
+    async def __anext__(self) -> Any:
+        item = await self._queue.get()
+        if item is _END:
+            # Let further calls end the iteration too.
+            self._queue.put_nowait(_END)
+            raise StopAsyncIteration
+        if isinstance(item, BaseException):
+            self._queue.put_nowait(_END)
+            raise item
+        return item
+
+    def _finish(self, future: asyncio.Future[Any]) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        if not future.cancelled():
+            error = future.exception()
+            if error is not None:
+                self._queue.put_nowait(error)
+                return
+            result = future.result()
+            if result is not None and result != []:
+                self._queue.put_nowait(result)
+        self._queue.put_nowait(_END)
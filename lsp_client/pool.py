@@ -0,0 +1,274 @@
+"""
+Pool of identical LSP server processes behind a single dispatch interface.
+"""
+
+import asyncio
+import logging
+import zlib
+from enum import Enum
+from typing import Any, Callable, Coroutine
+
+from .client import LSPClient
+from .flow import Priority
+from .partial import PartialResultStream
+from .protocol import (
+    BaseNotification,
+    BaseRequest,
+    ExitNotification,
+    InitializedNotification,
+    InitializeParams,
+    InitializeRequest,
+    ShutdownRequest,
+)
+
+# Requests that do not change server state and may go to any instance that has
+# the document open.
+READ_ONLY_METHODS = frozenset(
+    {
+        "textDocument/hover",
+        "textDocument/definition",
+        "textDocument/declaration",
+        "textDocument/typeDefinition",
+        "textDocument/implementation",
+        "textDocument/references",
+        "textDocument/completion",
+        "textDocument/signatureHelp",
+        "textDocument/documentSymbol",
+        "textDocument/documentHighlight",
+        "textDocument/foldingRange",
+        "textDocument/semanticTokens/full",
+    }
+)
+_DOCUMENT_SYNC_METHODS = frozenset(
+    {
+        "textDocument/didOpen",
+        "textDocument/didChange",
+        "textDocument/willSave",
+        "textDocument/didSave",
+        "textDocument/didClose",
+    }
+)
+
+
+class RoutingStrategy(str, Enum):
+    # Documents are opened on every instance; requests go to the instance
+    # with the fewest requests in flight.
+    LEAST_OUTSTANDING = "least_outstanding"
+    # Each document lives on one instance chosen by hashing its uri; requests
+    # for it always go there.
+    URI_AFFINITY = "uri_affinity"
+
+
+def _method_and_params(
+    message: BaseRequest | BaseNotification | dict[str, Any],
+) -> tuple[str | None, dict | None]:
+    if isinstance(message, dict):
+        return message.get("method"), message.get("params")
+    return message.method, message.params
+
+
+def _document_uri(
+    message: BaseRequest | BaseNotification | dict[str, Any]
+) -> str | None:
+    _, params = _method_and_params(message)
+    document = (params or {}).get("textDocument")
+    if isinstance(document, dict):
+        return document.get("uri")
+    return None
+
+
+class LSPServerPool(object):
+    """
+    Dispatches requests across several instances of the same language server.
+
+    Read-only requests are routed to one instance according to the routing
+    strategy. Document synchronisation notifications go to every instance that
+    has the document open. Other requests go to the first instance, and other
+    notifications to all instances.
+    """
+
+    def __init__(
+        self,
+        clients: list[LSPClient],
+        strategy: RoutingStrategy = RoutingStrategy.LEAST_OUTSTANDING,
+        processes: list[asyncio.subprocess.Process] | None = None,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        if not clients:
+            raise ValueError("A server pool needs at least one client")
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger
+        self.clients = clients
+        self.strategy = strategy
+        self.processes = processes or []
+        self.server_capabilities: list[dict | None] = [None] * len(clients)
+        # Indices of the instances each document is open on.
+        self._open_on: dict[str, set[int]] = {}
+        self._listeners: list[asyncio.Task] = []
+
+    @classmethod
+    async def from_command(
+        cls,
+        *cmd: str,
+        size: int,
+        initialize_params: InitializeParams,
+        response_handler: Callable[[dict[Any, Any]], Coroutine[Any, Any, None]],
+        strategy: RoutingStrategy = RoutingStrategy.LEAST_OUTSTANDING,
+        logger: logging.Logger | None = None,
+    ) -> "LSPServerPool":
+        """
+        Spawn `size` server processes, start listening to them and initialize
+        each with the same parameters.
+
+        Args:
+            *cmd: The command and arguments to launch the LSP server.
+            size: The number of server processes.
+            initialize_params: Parameters sent with every InitializeRequest.
+            response_handler: Async callable that receives the notifications and
+                server-to-client requests of all instances.
+            strategy: How read-only requests are routed.
+            logger: Optional logger; defaults to the module logger.
+        """
+        spawned = await asyncio.gather(
+            *(
+                LSPClient.from_command(
+                    *cmd, response_handler=response_handler, logger=logger
+                )
+                for _ in range(size)
+            )
+        )
+        pool = cls(
+            [client for client, _ in spawned],
+            strategy,
+            [proc for _, proc in spawned],
+            logger,
+        )
+        pool.start()
+        await pool.initialize(initialize_params)
+        return pool
+
+    def start(self) -> None:
+        """
+        Start a listen task for every instance.
+        """
+        self._listeners = [
+            asyncio.create_task(client.listen()) for client in self.clients
+        ]
+
+    async def initialize(self, params: InitializeParams) -> None:
+        """
+        Run the initialize handshake with every instance concurrently.
+        """
+
+        async def handshake(client: LSPClient) -> dict | None:
+            result = await client.request(InitializeRequest(params=params))
+            await client.send_notification(InitializedNotification())
+            return (result or {}).get("capabilities")
+
+        self.server_capabilities = list(
+            await asyncio.gather(*(handshake(client) for client in self.clients))
+        )
+
+    def select(self, uri: str | None = None) -> LSPClient:
+        """
+        Return the instance a request for the given document is routed to.
+        """
+        if uri is not None and self.strategy == RoutingStrategy.URI_AFFINITY:
+            return self.clients[self._affine_index(uri)]
+        candidates = self._open_on.get(uri, ()) if uri is not None else ()
+        indices = candidates or range(len(self.clients))
+        index = min(indices, key=lambda i: self.clients[i].pending_count)
+        return self.clients[index]
+
+    async def send_request(
+        self, request: BaseRequest, priority: Priority = Priority.INTERACTIVE
+    ) -> asyncio.Future[Any]:
+        """
+        Route a request to one instance and return the future of its result.
+
+        Read-only requests are load balanced, everything else goes to the first
+        instance.
+        """
+        return await self._route(request).send_request(request, priority)
+
+    async def request(
+        self,
+        request: BaseRequest,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        Route a request to one instance and wait for its result.
+
+        See LSPClient.request for timeout and cancellation semantics.
+        """
+        return await self._route(request).request(request, priority, timeout)
+
+    async def stream_request(
+        self, request: BaseRequest, priority: Priority = Priority.INTERACTIVE
+    ) -> PartialResultStream:
+        """
+        Route a request to one instance and stream its partial results.
+
+        See LSPClient.stream_request.
+        """
+        return await self._route(request).stream_request(request, priority)
+
+    async def send_notification(
+        self, notification: BaseNotification | dict[str, Any]
+    ) -> None:
+        """
+        Send a notification, a model or its wire format as built by
+        lsp_client.fast, to the instances it concerns.
+
+        `didOpen` opens the document on every instance, or on its affine
+        instance with URI_AFFINITY routing. The other document synchronisation
+        notifications go to the instances that have the document open. All
+        other notifications are broadcast.
+        """
+        method, _ = _method_and_params(notification)
+        uri = _document_uri(notification)
+        if method in _DOCUMENT_SYNC_METHODS and uri is not None:
+            if method == "textDocument/didOpen":
+                if self.strategy == RoutingStrategy.URI_AFFINITY:
+                    indices = {self._affine_index(uri)}
+                else:
+                    indices = set(range(len(self.clients)))
+                self._open_on[uri] = indices
+            elif method == "textDocument/didClose":
+                indices = self._open_on.pop(uri, set())
+            else:
+                indices = self._open_on.get(uri, set())
+        else:
+            indices = set(range(len(self.clients)))
+        await asyncio.gather(
+            *(self.clients[i].send_notification(notification) for i in sorted(indices))
+        )
+
+    async def shutdown(self) -> None:
+        """
+        Shut down and exit every instance, and wait for the processes to end.
+        """
+
+        async def stop(client: LSPClient) -> None:
+            await client.request(ShutdownRequest())
+            await client.send_notification(ExitNotification())
+            await client.flush()
+
+        await asyncio.gather(
+            *(stop(client) for client in self.clients), return_exceptions=True
+        )
+        for listener in self._listeners:
+            listener.cancel()
+        await asyncio.gather(*self._listeners, return_exceptions=True)
+        await asyncio.gather(*(proc.wait() for proc in self.processes))
+
+    def _route(self, request: BaseRequest) -> LSPClient:
+        if request.method in READ_ONLY_METHODS:
+            return self.select(_document_uri(request))
+        return self.clients[0]
+
+    def _affine_index(self, uri: str) -> int:
+        return zlib.crc32(uri.encode()) % len(self.clients)
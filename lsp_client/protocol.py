@@ -5,12 +5,25 @@ See https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17
 for reference, and what a correct and complete implementation should look like.
 """
 
+from enum import Enum, IntEnum
 from typing import Any, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
-class BaseNotification(BaseModel):
+class ProtocolModel(BaseModel):
+    """
+    Base of all protocol models.
+
+    Validators and serialisers are built on first use rather than at import,
+    so that importing the protocol stays cheap for processes that only use a
+    few of its models.
+    """
+
+    model_config = ConfigDict(defer_build=True)
+
+
+class BaseNotification(ProtocolModel):
     """LSP notification — like a request but without an id field."""
 
     jsonrpc: str = Field(default="2.0")
@@ -18,7 +31,7 @@ class BaseNotification(BaseModel):
     params: dict | None = Field(default=None)
 
 
-class BaseRequest(BaseModel):
+class BaseRequest(ProtocolModel):
     jsonrpc: str = Field(default="2.0")
     id: int | None = Field(default=None)
     method: str
@@ -38,20 +51,86 @@ class ProtocolError(Exception):
         self.errors = errors
 
 
+class ResponseError(Exception):
+    def __init__(self, code: int, message: str, data: Any = None) -> None:
+        """
+        Initialize the exception from the `error` member of a response.
+
+        Args:
+            code (int): The JSON-RPC error code.
+            message (str): The error message sent by the server.
+            data (optional): Additional information about the error.
+        """
+        super().__init__(f"{message} (code {code})")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class ErrorCodes(IntEnum):
+    """JSON-RPC and LSP error codes of a ResponseError."""
+
+    ParseError = -32700
+    InvalidRequest = -32600
+    MethodNotFound = -32601
+    InvalidParams = -32602
+    InternalError = -32603
+    ServerNotInitialized = -32002
+    UnknownErrorCode = -32001
+    RequestFailed = -32803
+    ServerCancelled = -32802
+    ContentModified = -32801
+    RequestCancelled = -32800
+
+
 # Server Lifecycle
 # See https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#lifeCycleMessages
 
 
-class WorkDoneProgressParams(BaseModel):
+class WorkDoneProgressParams(ProtocolModel):
     workDoneToken: int | str | None = None
 
 
-class ClientInfo(BaseModel):
+class PartialResultParams(ProtocolModel):
+    partialResultToken: int | str | None = None
+
+
+class ClientInfo(ProtocolModel):
     name: str
     version: str | None = None
 
 
-class ClientCapabilities(BaseModel):
+class PositionEncodingKind(str, Enum):
+    """Unit in which the character offset of a Position is counted (3.17)."""
+
+    UTF8 = "utf-8"
+    UTF16 = "utf-16"
+    UTF32 = "utf-32"
+
+    @classmethod
+    def from_server_capabilities(
+        cls, capabilities: dict | None
+    ) -> "PositionEncodingKind":
+        """
+        Read the negotiated position encoding from the `capabilities` of an
+        InitializeResult. Servers that do not announce one use UTF-16.
+        """
+        encoding = (capabilities or {}).get("positionEncoding")
+        if encoding is None:
+            return cls.UTF16
+        return cls(encoding)
+
+    @classmethod
+    def client_capabilities(cls, *encodings: "PositionEncodingKind | str") -> dict:
+        """
+        Build the `general` member of ClientCapabilities offering `encodings`,
+        in order of preference. The server picks one and announces it as
+        `positionEncoding` in its capabilities.
+        """
+        return {"positionEncodings": [cls(encoding).value for encoding in encodings]}
+
+
+class ClientCapabilities(ProtocolModel):
     workspace: dict | None = None
     textDocument: dict | None = None
     notebook: dict | None = None
@@ -60,7 +139,7 @@ class ClientCapabilities(BaseModel):
     experimental: dict | None = None
 
 
-class TextDocumentClientCapabilities(BaseModel):
+class TextDocumentClientCapabilities(ProtocolModel):
     synchronization: dict | None
     completion: dict | None
     hover: dict | None
@@ -93,11 +172,11 @@ class TextDocumentClientCapabilities(BaseModel):
     diagnostic: dict | None
 
 
-class NotebookDocumentClientCapabilities(BaseModel):
+class NotebookDocumentClientCapabilities(ProtocolModel):
     synchronization: dict | None
 
 
-class WorkspaceClientCapabilities(BaseModel):
+class WorkspaceClientCapabilities(ProtocolModel):
     applyEdit: dict | None
     workspaceEdit: dict | None
     didChangeConfiguration: dict | None
@@ -114,7 +193,7 @@ class WorkspaceClientCapabilities(BaseModel):
     diagnostics: dict | None
 
 
-class FileOperationsClientCapabilities(BaseModel):
+class FileOperationsClientCapabilities(ProtocolModel):
     didCreate: dict | None = None
     willCreate: dict | None = None
     didRename: dict | None = None
@@ -153,7 +232,31 @@ class InitializedNotification(BaseNotification):
 # See https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#textDocument_synchronization # noqa: E501
 
 
-class TextDocumentItem(BaseModel):
+class TextDocumentSyncKind(IntEnum):
+    NONE = 0
+    FULL = 1
+    INCREMENTAL = 2
+
+    @classmethod
+    def from_server_capabilities(
+        cls, capabilities: dict | None
+    ) -> "TextDocumentSyncKind":
+        """
+        Read the change sync kind from the `capabilities` of an InitializeResult.
+
+        `textDocumentSync` is either a TextDocumentSyncKind or a
+        TextDocumentSyncOptions object. Servers that do not announce it get
+        NONE, as the spec prescribes.
+        """
+        sync = (capabilities or {}).get("textDocumentSync")
+        if isinstance(sync, dict):
+            sync = sync.get("change")
+        if sync is None:
+            return cls.NONE
+        return cls(sync)
+
+
+class TextDocumentItem(ProtocolModel):
     uri: str
     languageId: str
     version: int
@@ -166,17 +269,17 @@ class TextDocumentDidOpenNotification(BaseNotification):
         super(TextDocumentDidOpenNotification, self).__init__(**kwargs)
 
 
-class Position(BaseModel):
+class Position(ProtocolModel):
     line: int
     character: int
 
 
-class Range(BaseModel):
+class Range(ProtocolModel):
     start: Position
     end: Position
 
 
-class ContentChange(BaseModel):
+class ContentChange(ProtocolModel):
     text: str
     range: Optional[Range] = None
     # rangeLength is deprecated and optional per the LSP spec
@@ -228,11 +331,11 @@ class TextDocumentDidCloseNotification(BaseNotification):
         super(TextDocumentDidCloseNotification, self).__init__(**kwargs)
 
 
-class TextDocumentIdentifier(BaseModel):
+class TextDocumentIdentifier(ProtocolModel):
     uri: str
 
 
-class TextDocumentPositionParams(BaseModel):
+class TextDocumentPositionParams(ProtocolModel):
     textDocument: TextDocumentIdentifier
     position: Position
 
@@ -255,6 +358,22 @@ class DefinitionRequest(BaseRequest):
         super(DefinitionRequest, self).__init__(**kwargs)
 
 
+class ReferencesRequest(BaseRequest):
+    def __init__(self, **kwargs: Any) -> None:
+        kwargs["method"] = "textDocument/references"
+        super(ReferencesRequest, self).__init__(**kwargs)
+
+
+# Workspace Features
+# See https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#workspaceFeatures
+
+
+class WorkspaceSymbolRequest(BaseRequest):
+    def __init__(self, **kwargs: Any) -> None:
+        kwargs["method"] = "workspace/symbol"
+        super(WorkspaceSymbolRequest, self).__init__(**kwargs)
+
+
 # $ Notifications and Requests
 # See https://microsoft.github.io/language-server-protocol/specifications/lsp/3.17/specification/#dollarRequests
 
@@ -265,9 +384,25 @@ class CancelRequest(BaseRequest):
         super(CancelRequest, self).__init__(**kwargs)
 
 
-class ProgressParams(BaseModel):
+class CancelParams(ProtocolModel):
+    id: int | str
+
+
+class CancelNotification(BaseNotification):
+    """`$/cancelRequest` sent as the notification the spec defines it as."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        kwargs["method"] = "$/cancelRequest"
+        if isinstance(kwargs.get("params"), CancelParams):
+            kwargs["params"] = kwargs["params"].model_dump()
+        super(CancelNotification, self).__init__(**kwargs)
+
+
+class ProgressParams(ProtocolModel):
     token: int | str
-    value: dict
+    # A work done progress object, or a partial result, which is usually an
+    # array.
+    value: Any
 
 
 class ProgressNotification(BaseNotification):
@@ -0,0 +1,96 @@
+"""
+Recording of LSP sessions for offline analysis.
+
+A session file starts with a magic line, followed by one record per message:
+a header packed as RECORD_HEADER, holding the direction, a monotonic
+timestamp in nanoseconds and the body length, then the message body. Each
+file holds one session, as request ids and timestamps are only meaningful
+within a session. See lsp_client.replay for playing sessions back.
+"""
+
+import struct
+import time
+from enum import IntEnum
+from typing import BinaryIO, Iterable, Iterator, NamedTuple
+
+MAGIC = b"LSPREC1\n"
+# Direction, timestamp in nanoseconds, body length.
+RECORD_HEADER = struct.Struct("<BQI")
+
+
+class Direction(IntEnum):
+    # From the client to the server.
+    OUT = 0
+    # From the server to the client.
+    IN = 1
+
+
+class RecordedMessage(NamedTuple):
+    direction: Direction
+    timestamp: int
+    body: bytes
+
+
+class SessionRecorder(object):
+    """
+    Writes the bodies of framed messages to a session file, replacing any
+    earlier session recorded there.
+
+    Records are buffered and written by the file object; call `close()`, or
+    use the recorder as a context manager, to make sure they reach the disk.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(MAGIC)
+        self.messages = 0
+
+    def record(self, direction: Direction, body: bytes | bytearray) -> None:
+        self._file.write(RECORD_HEADER.pack(direction, time.monotonic_ns(), len(body)))
+        self._file.write(body)
+        self.messages += 1
+
+    def record_chunks(
+        self, direction: Direction, length: int, chunks: Iterable[bytes]
+    ) -> None:
+        """Record a body of known length given in pieces."""
+        self._file.write(RECORD_HEADER.pack(direction, time.monotonic_ns(), length))
+        for chunk in chunks:
+            self._file.write(chunk)
+        self.messages += 1
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "SessionRecorder":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def read_session(path: str) -> Iterator[RecordedMessage]:
+    """
+    Yield the messages recorded in a session file.
+
+    Raises:
+        ValueError: If the file is not a session file or is truncated.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an LSP session recording")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if not header:
+                return
+            if len(header) < RECORD_HEADER.size:
+                raise ValueError(f"Truncated record header in {path}")
+            direction, timestamp, length = RECORD_HEADER.unpack(header)
+            body = f.read(length)
+            if len(body) < length:
+                raise ValueError(f"Truncated record body in {path}")
+            yield RecordedMessage(Direction(direction), timestamp, body)
@@ -0,0 +1,227 @@
+"""
+Offline replay of sessions recorded with SessionRecorder.
+
+ReplayServer is a stand-in language server that answers each request with the
+response recorded for its id, after the recorded latency, and sends the
+server's own notifications and requests at their recorded times. It expects
+the client to send the recorded requests with the same ids, as a client
+running the same workload does.
+
+`replay_client` drives an LSPClient alone: it sends the recorded outgoing
+messages through the client and feeds the recorded incoming messages to its
+reader, so that framing, decoding, dispatch and caching can be measured
+against real traffic without a server.
+
+Both take a speed factor that divides all delays; a speed of 0 replays
+without any delays. Run ``python -m lsp_client.replay --help`` for the
+command line interface.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, BinaryIO, Iterator, NamedTuple
+
+from .client import READ_CHUNK_SIZE, LSPClient
+from .framing import FrameParser
+from .metrics import ClientMetrics
+from .protocol import BaseRequest
+from .recorder import Direction, RecordedMessage, read_session
+
+NANOSECONDS = 1e9
+
+
+def frame(body: bytes) -> bytes:
+    """Prefix a message body with its header."""
+    return b"Content-Length: %d\r\n\r\n" % len(body) + body
+
+
+def _scaled(nanoseconds: int, speed: float) -> float:
+    """Convert a recorded interval into seconds to wait at `speed`."""
+    if speed <= 0:
+        return 0.0
+    return nanoseconds / NANOSECONDS / speed
+
+
+def _read_messages(stream: BinaryIO) -> Iterator[dict[str, Any]]:
+    """Yield the messages read from a blocking stream until EOF."""
+    parser = FrameParser()
+    while True:
+        frame = parser.next_frame()
+        if frame is not None:
+            yield json.loads(frame.body)
+            continue
+        # BinaryIO lacks read1, which buffered streams such as stdin have.
+        chunk = stream.read1(READ_CHUNK_SIZE)  # type: ignore[attr-defined]
+        if not chunk:
+            return
+        parser.feed(chunk)
+
+
+async def _devnull_writer() -> asyncio.StreamWriter:
+    """Return a stream writer discarding what is written, for client mode."""
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.connect_write_pipe(
+        asyncio.streams.FlowControlMixin, open(os.devnull, "wb")
+    )
+    return asyncio.StreamWriter(transport, protocol, None, loop)
+
+
+class ReplayServer(object):
+    """Stand-in language server answering from a recorded session."""
+
+    def __init__(self, messages: list[RecordedMessage], speed: float = 1.0) -> None:
+        self.speed = speed
+        # Recorded response to each request id, with its latency.
+        self.responses: dict[Any, tuple[int, bytes]] = {}
+        # Messages sent by the server on its own, with their offset from the
+        # start of the session.
+        self.unsolicited: list[tuple[int, bytes]] = []
+        start = messages[0].timestamp if messages else 0
+        sent_at: dict[Any, int] = {}
+        for message in messages:
+            payload = json.loads(message.body)
+            if message.direction == Direction.OUT:
+                if "id" in payload and "method" in payload:
+                    sent_at[payload["id"]] = message.timestamp
+            elif "method" not in payload and payload.get("id") in sent_at:
+                latency = message.timestamp - sent_at.pop(payload["id"])
+                self.responses[payload["id"]] = (latency, message.body)
+            else:
+                self.unsolicited.append((message.timestamp - start, message.body))
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def serve(self, stdin: BinaryIO, stdout: BinaryIO) -> None:
+        """Serve until the client sends `exit` or closes stdin."""
+
+        def send(body: bytes) -> None:
+            with self._lock:
+                stdout.write(frame(body))
+                stdout.flush()
+
+        def send_unsolicited() -> None:
+            started = time.monotonic()
+            for offset, body in self.unsolicited:
+                delay = started + _scaled(offset, self.speed) - time.monotonic()
+                if self._stopped.wait(max(delay, 0.0)):
+                    return
+                send(body)
+
+        threading.Thread(target=send_unsolicited, daemon=True).start()
+        try:
+            for message in _read_messages(stdin):
+                if message.get("method") == "exit":
+                    return
+                response = self.responses.get(message.get("id"))
+                if response is None or "method" not in message:
+                    continue
+                latency, body = response
+                timer = threading.Timer(_scaled(latency, self.speed), send, (body,))
+                timer.daemon = True
+                timer.start()
+        finally:
+            self._stopped.set()
+
+
+class ReplayStats(NamedTuple):
+    messages_out: int
+    messages_in: int
+    elapsed: float
+
+
+async def replay_client(
+    messages: list[RecordedMessage],
+    client: LSPClient,
+    feed: asyncio.StreamReader,
+    speed: float = 0.0,
+) -> ReplayStats:
+    """
+    Replay a session through `client`, whose stdout must be `feed`.
+
+    Returns once all messages have been replayed and the client has read
+    everything fed to it. The client should not have a request window, as
+    responses are only fed after the requests recorded before them.
+    """
+    listener = asyncio.ensure_future(client.listen())
+    futures = []
+    start = messages[0].timestamp if messages else 0
+    messages_out = messages_in = 0
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for message in messages:
+        delay = started + _scaled(message.timestamp - start, speed) - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if message.direction == Direction.IN:
+            feed.feed_data(frame(message.body))
+            messages_in += 1
+            continue
+        payload = json.loads(message.body)
+        if "id" in payload and "method" in payload:
+            futures.append(
+                await client.send_request(BaseRequest.model_validate(payload))
+            )
+        else:
+            await client.send_notification(payload)
+        messages_out += 1
+        # Let the reader keep up, as it would with a live server.
+        await asyncio.sleep(0)
+    feed.feed_eof()
+    await listener
+    for future in futures:
+        if not future.done():
+            future.cancel()
+    await asyncio.gather(*futures, return_exceptions=True)
+    return ReplayStats(messages_out, messages_in, loop.time() - started)
+
+
+async def _replay_client_main(path: str, speed: float, lazy: bool) -> dict[str, Any]:
+    async def ignore(message: dict) -> None:
+        pass
+
+    feed = asyncio.StreamReader()
+    metrics = ClientMetrics()
+    stdin = await _devnull_writer()
+    client = LSPClient(
+        stdin,
+        feed,
+        ignore,
+        metrics=metrics,
+        lazy_decoding=lazy,
+    )
+    stats = await replay_client(list(read_session(path)), client, feed, speed)
+    stdin.close()
+    return {**stats._asdict(), "metrics": metrics.snapshot()}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m lsp_client.replay", description=__doc__
+    )
+    parser.add_argument("mode", choices=["serve", "client"])
+    parser.add_argument("session", help="session file written by SessionRecorder")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="factor dividing recorded delays; 0 replays without delays",
+    )
+    parser.add_argument(
+        "--lazy", action="store_true", help="enable lazy decoding in client mode"
+    )
+    args = parser.parse_args(argv)
+    if args.mode == "serve":
+        server = ReplayServer(list(read_session(args.session)), args.speed)
+        server.serve(sys.stdin.buffer, sys.stdout.buffer)
+    else:
+        report = asyncio.run(_replay_client_main(args.session, args.speed, args.lazy))
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
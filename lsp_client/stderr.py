@@ -0,0 +1,152 @@
+"""
+Background draining of a language server's stderr.
+
+A server whose stderr pipe is never read blocks as soon as the pipe fills,
+stalling every request. StderrDrain reads the pipe continuously, keeps the
+most recent output in a bounded ring buffer for diagnosing crashes, and can
+forward lines to a logger at a bounded rate.
+"""
+
+import asyncio
+import collections
+import logging
+import time
+
+DEFAULT_STDERR_CAPACITY = 1 << 16
+DEFAULT_STDERR_CHUNK_SIZE = 1 << 14
+
+
+class StderrDrain(object):
+    """
+    Reads a stream until EOF, keeping its last `capacity` bytes.
+
+    Args:
+        stream: The server's stderr.
+        capacity: Number of bytes of the most recent output to keep.
+        logger: Logger to forward complete lines to, or None to only buffer.
+        level: Level at which lines are forwarded.
+        max_lines_per_second: Lines forwarded per second, on average; lines
+            beyond the rate are counted and dropped from the log, not from
+            the buffer.
+        chunk_size: Maximum number of bytes read at once.
+    """
+
+    def __init__(
+        self,
+        stream: asyncio.StreamReader,
+        capacity: int = DEFAULT_STDERR_CAPACITY,
+        logger: logging.Logger | None = None,
+        level: int = logging.DEBUG,
+        max_lines_per_second: float = 20.0,
+        chunk_size: int = DEFAULT_STDERR_CHUNK_SIZE,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.stream = stream
+        self.capacity = capacity
+        self.logger = logger
+        self.level = level
+        self.max_lines_per_second = max_lines_per_second
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self.lines_suppressed = 0
+        self._unreported = 0
+        self._chunks: collections.deque[bytes] = collections.deque()
+        self._buffered = 0
+        # Incomplete last line awaiting forwarding.
+        self._partial_line = b""
+        # Token bucket limiting the rate of forwarded lines.
+        self._tokens = max_lines_per_second
+        self._refilled = time.monotonic()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start draining in a background task."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.drain())
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def drain(self) -> None:
+        """Read the stream until EOF."""
+        while True:
+            chunk = await self.stream.read(self.chunk_size)
+            if not chunk:
+                break
+            self._append(chunk)
+            if self.logger is not None:
+                self._forward(chunk)
+        if self.logger is not None and self._partial_line:
+            self._forward(b"\n")
+
+    async def wait(self, timeout: float | None = None) -> None:
+        """Wait until the stream reached EOF, or the timeout passed."""
+        if self._task is not None:
+            await asyncio.wait([self._task], timeout=timeout)
+
+    async def close(self) -> None:
+        """Stop draining, if still running."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def tail(self, size: int | None = None) -> bytes:
+        """Return the last `size` bytes read, or all bytes still buffered."""
+        data = b"".join(self._chunks)
+        if size is not None:
+            data = data[-size:] if size > 0 else b""
+        return data
+
+    def tail_text(self, size: int | None = None, encoding: str = "utf-8") -> str:
+        """Return the last `size` bytes read, decoded leniently."""
+        return self.tail(size).decode(encoding, errors="replace")
+
+    def _append(self, chunk: bytes) -> None:
+        self.bytes_read += len(chunk)
+        if len(chunk) >= self.capacity:
+            self._chunks.clear()
+            self._chunks.append(chunk[-self.capacity :])
+            self._buffered = self.capacity
+            return
+        self._chunks.append(chunk)
+        self._buffered += len(chunk)
+        while self._buffered > self.capacity:
+            excess = self._buffered - self.capacity
+            first = self._chunks[0]
+            if len(first) <= excess:
+                self._chunks.popleft()
+                self._buffered -= len(first)
+            else:
+                self._chunks[0] = first[excess:]
+                self._buffered -= excess
+
+    def _forward(self, chunk: bytes) -> None:
+        assert self.logger is not None
+        lines = (self._partial_line + chunk).split(b"\n")
+        self._partial_line = lines.pop()
+        # Bound the memory held by a line that never ends.
+        if len(self._partial_line) > self.capacity:
+            lines.append(self._partial_line)
+            self._partial_line = b""
+        now = time.monotonic()
+        rate = self.max_lines_per_second
+        self._tokens = min(rate, self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+        for line in lines:
+            if self._tokens < 1:
+                self.lines_suppressed += 1
+                self._unreported += 1
+                continue
+            if self._unreported:
+                self.logger.log(
+                    self.level, "server stderr: %d lines suppressed", self._unreported
+                )
+                self._unreported = 0
+            self._tokens -= 1
+            self.logger.log(
+                self.level,
+                "server stderr: %s",
+                line.rstrip(b"\r").decode("utf-8", errors="replace"),
+            )
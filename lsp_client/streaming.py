@@ -0,0 +1,110 @@
+"""
+Streaming serialisation of messages carrying very large document texts.
+
+Encoding a `didOpen` or full-sync `didChange` in one go holds the encoded
+message in memory next to the document text. StreamedBody encodes the message
+without the text, then encodes the text in chunks as they are written, so
+that only one chunk of encoded text exists at a time.
+"""
+
+import uuid
+from typing import Any, Iterator
+
+from .codec import JSONCodec
+
+# Documents with at least this many characters are streamed.
+DEFAULT_STREAMING_THRESHOLD = 1 << 20
+# Characters encoded at a time.
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+Path = tuple[str | int, ...]
+
+
+def find_large_text(message: dict[str, Any], threshold: int) -> Path | None:
+    """
+    Return the path to the document text of a `didOpen` or `didChange`
+    message if it has at least `threshold` characters, else None.
+
+    Messages of any other shape are left to be encoded as a whole.
+    """
+    method = message.get("method")
+    params = message.get("params")
+    if not isinstance(params, dict):
+        return None
+    if method == "textDocument/didOpen":
+        document = params.get("textDocument")
+        text = document.get("text") if isinstance(document, dict) else None
+        if isinstance(text, str) and len(text) >= threshold:
+            return ("params", "textDocument", "text")
+    elif method == "textDocument/didChange":
+        changes = params.get("contentChanges")
+        if not isinstance(changes, list):
+            return None
+        for index, change in enumerate(changes):
+            text = change.get("text") if isinstance(change, dict) else None
+            if isinstance(text, str) and len(text) >= threshold:
+                return ("params", "contentChanges", index, "text")
+    return None
+
+
+def _get(value: Any, path: Path) -> Any:
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _replace(value: Any, path: Path, replacement: Any) -> Any:
+    """Return a copy of `value` with the item at `path` replaced."""
+    if not path:
+        return replacement
+    key = path[0]
+    copy = list(value) if isinstance(value, list) else dict(value)
+    copy[key] = _replace(value[key], path[1:], replacement)  # type: ignore[index]
+    return copy
+
+
+class StreamedBody(object):
+    """
+    The encoded body of a message, produced piecewise.
+
+    Iterating yields the encoded message up to the text, the encoded text in
+    chunks, and the rest of the message. Each pass over the text encodes it
+    anew; `content_length` takes one such pass.
+    """
+
+    def __init__(
+        self,
+        codec: JSONCodec,
+        message: dict[str, Any],
+        path: Path,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        self.codec = codec
+        self.chunk_size = chunk_size
+        self.text: str = _get(message, path)
+        placeholder = uuid.uuid4().hex
+        envelope = codec.encode(_replace(message, path, placeholder))
+        marker = codec.encode(placeholder)
+        start = envelope.index(marker)
+        # Keep the quotes around the text in the envelope.
+        self.prefix = envelope[: start + 1]
+        self.suffix = envelope[start + len(marker) - 1 :]
+
+    def chunks(self) -> Iterator[bytes]:
+        """Yield the text encoded as a JSON string without quotes."""
+        text = self.text
+        encode = self.codec.encode
+        for start in range(0, len(text), self.chunk_size):
+            yield encode(text[start : start + self.chunk_size])[1:-1]
+
+    def content_length(self) -> int:
+        return (
+            len(self.prefix)
+            + sum(len(chunk) for chunk in self.chunks())
+            + len(self.suffix)
+        )
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.prefix
+        yield from self.chunks()
+        yield self.suffix
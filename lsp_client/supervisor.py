@@ -0,0 +1,435 @@
+"""
+Supervision of a language server process.
+
+ServerSupervisor runs a server launched with LSPClient.from_command and
+restarts it when it exits. Requests in flight on the crashed server fail, or
+are sent again to the restarted server if they are read-only. The restarted
+server is initialized with the cached InitializeParams and the documents
+tracked by the supervisor's DocumentManager are opened on it again before new
+requests reach it.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Coroutine, Iterable
+
+from . import fast
+from .client import LSPClient
+from .documents import Document, DocumentManager
+from .flow import Priority
+from .pool import READ_ONLY_METHODS
+from .protocol import (
+    BaseNotification,
+    BaseRequest,
+    ExitNotification,
+    InitializedNotification,
+    InitializeParams,
+    InitializeRequest,
+    ResponseError,
+    ShutdownRequest,
+)
+from .transport import ReconnectPolicy
+
+# Errors of a failed attempt to start a server.
+_START_ERRORS = (OSError, ResponseError, asyncio.TimeoutError)
+
+
+class _Server(object):
+    """An initialized server process and the client connected to it."""
+
+    def __init__(
+        self,
+        client: LSPClient,
+        process: asyncio.subprocess.Process,
+        listener: "asyncio.Future[None]",
+        capabilities: dict | None,
+    ) -> None:
+        self.client = client
+        self.process = process
+        self.listener = listener
+        self.capabilities = capabilities
+        self.started = time.monotonic()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None and not self.listener.done()
+
+
+class _SupervisedDocuments(DocumentManager):
+    """
+    A document manager that holds document operations while the server is
+    restarted, so that they reach the restarted server after its documents
+    have been opened on it again.
+    """
+
+    def __init__(self, supervisor: "ServerSupervisor", client: LSPClient) -> None:
+        super().__init__(client)
+        self._supervisor = supervisor
+
+    async def open(
+        self, uri: str, language_id: str, text: str, version: int = 0
+    ) -> Document:
+        await self._supervisor._wait_ready()
+        return await super().open(uri, language_id, text, version)
+
+    async def change(self, uri: str, text: str) -> list[dict[str, Any]]:
+        await self._supervisor._wait_ready()
+        return await super().change(uri, text)
+
+    async def close(self, uri: str) -> None:
+        await self._supervisor._wait_ready()
+        await super().close(uri)
+
+
+class ServerSupervisor(object):
+    """
+    Keeps a language server running, restarting it when it exits.
+
+    Restarts back off exponentially as the restart policy prescribes. The
+    policy's attempts are shared by all restarts until the server has run for
+    `stable_after` seconds, so a server that keeps crashing is given up on;
+    requests then fail with ConnectionError.
+
+    Args:
+        *cmd: The command and arguments to launch the LSP server.
+        initialize_params: Parameters of the InitializeRequest sent to every
+            server started.
+        response_handler: Async callable that receives the notifications and
+            server-to-client requests of the server.
+        logger: Optional logger; defaults to the module logger.
+        restart_policy: Backoff between restart attempts.
+        warm_standby: Keep a second, initialized server process ready to take
+            over, so that failing over does not wait for a cold start.
+        retry_methods: Methods of the requests sent again after a crash.
+        max_retries: How often a request is sent again.
+        stable_after: Seconds after which a running server is considered
+            stable and the restart backoff starts over.
+        initialize_timeout: Seconds to wait for a server to initialize.
+        **options: Further keyword arguments of LSPClient.from_command.
+    """
+
+    def __init__(
+        self,
+        *cmd: str,
+        initialize_params: InitializeParams,
+        response_handler: Callable[[dict[Any, Any]], Coroutine[Any, Any, None]],
+        logger: logging.Logger | None = None,
+        restart_policy: ReconnectPolicy | None = None,
+        warm_standby: bool = False,
+        retry_methods: Iterable[str] = READ_ONLY_METHODS,
+        max_retries: int = 1,
+        stable_after: float = 30.0,
+        initialize_timeout: float | None = 30.0,
+        **options: Any,
+    ) -> None:
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger
+        self.cmd = cmd
+        self.initialize_params = initialize_params
+        self.response_handler = response_handler
+        self.restart_policy = (
+            restart_policy if restart_policy is not None else ReconnectPolicy()
+        )
+        self.warm_standby = warm_standby
+        self.retry_methods = frozenset(retry_methods)
+        self.max_retries = max_retries
+        self.stable_after = stable_after
+        self.initialize_timeout = initialize_timeout
+        self.options = options
+        # Awaited with the new client after every restart, before requests
+        # are sent to it. Operations on `documents` wait for it to return.
+        self.on_restart: Callable[[LSPClient], Coroutine[Any, Any, None]] | None = None
+        self.restarts = 0
+        self._server: _Server | None = None
+        self._documents: DocumentManager | None = None
+        self._standby: asyncio.Future[_Server] | None = None
+        self._delays = self.restart_policy.delays()
+        # Set while a live server accepts requests, or once restarting failed.
+        self._ready = asyncio.Event()
+        self._failed: ConnectionError | None = None
+        self._closing = False
+        self._monitor: asyncio.Future[None] | None = None
+
+    @classmethod
+    async def from_command(cls, *cmd: str, **kwargs: Any) -> "ServerSupervisor":
+        """Create a supervisor and start its server."""
+        supervisor = cls(*cmd, **kwargs)
+        await supervisor.start()
+        return supervisor
+
+    @property
+    def client(self) -> LSPClient:
+        """The client connected to the current server."""
+        return self._current().client
+
+    @property
+    def process(self) -> asyncio.subprocess.Process:
+        return self._current().process
+
+    @property
+    def server_capabilities(self) -> dict | None:
+        return self._current().capabilities
+
+    @property
+    def documents(self) -> DocumentManager:
+        """
+        Tracks the open documents; documents opened through it are opened
+        again on restarted servers. Its operations wait while the server is
+        being restarted.
+        """
+        if self._documents is None:
+            raise RuntimeError("The supervisor has not been started")
+        return self._documents
+
+    async def start(self) -> None:
+        """Start and initialize the server and begin supervising it."""
+        server = await self._launch()
+        self._server = server
+        self._documents = _SupervisedDocuments(self, server.client)
+        self._documents.set_server_capabilities(server.capabilities)
+        self._ready.set()
+        self._monitor = asyncio.ensure_future(self._supervise())
+        if self.warm_standby:
+            self._prepare_standby()
+
+    async def request(
+        self,
+        request: BaseRequest,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        Send a request to the current server and wait for its result.
+
+        If the server exits before responding, requests whose method is in
+        `retry_methods` are sent again once it has been restarted.
+
+        Raises:
+            ConnectionResetError: If the server exited before responding.
+            ConnectionError: If the server could not be restarted.
+        """
+        retries = self.max_retries if request.method in self.retry_methods else 0
+        while True:
+            client = await self._wait_ready()
+            try:
+                return await client.request(request, priority, timeout)
+            except ConnectionResetError:
+                if retries <= 0:
+                    raise
+                retries -= 1
+                self.logger.info("Retrying %s after a server restart", request.method)
+                request.id = None
+
+    async def send_notification(
+        self, notification: BaseNotification | dict[str, Any]
+    ) -> None:
+        """Send a notification to the current server."""
+        client = await self._wait_ready()
+        await client.send_notification(notification)
+
+    async def shutdown(self, timeout: float | None = None) -> None:
+        """
+        Stop supervising, shut the servers down and wait for them to exit.
+        """
+        self._closing = True
+        servers = [self._server] if self._server is not None else []
+        standby = self._take_standby_task()
+        if standby is not None:
+            servers.extend(await self._await_standby(standby))
+        await asyncio.gather(
+            *(self._shutdown_server(server, timeout) for server in servers),
+            return_exceptions=True,
+        )
+        await self.close()
+
+    async def close(self) -> None:
+        """Stop supervising and kill the server processes still running."""
+        self._closing = True
+        if self._failed is None:
+            self._failed = ConnectionError("The supervisor has been closed")
+        self._ready.set()
+        if self._monitor is not None:
+            self._monitor.cancel()
+            await asyncio.gather(self._monitor, return_exceptions=True)
+        servers = [self._server] if self._server is not None else []
+        standby = self._take_standby_task()
+        if standby is not None:
+            standby.cancel()
+            servers.extend(await self._await_standby(standby))
+        for server in servers:
+            await self._stop_server(server)
+
+    def _current(self) -> _Server:
+        if self._server is None:
+            raise RuntimeError("The supervisor has not been started")
+        return self._server
+
+    async def _wait_ready(self) -> LSPClient:
+        """Return the client of a live server, waiting for a restart."""
+        while True:
+            await self._ready.wait()
+            if self._failed is not None:
+                raise self._failed
+            server = self._current()
+            if not server.listener.done():
+                return server.client
+            # The server exited and the monitor has yet to notice.
+            self._ready.clear()
+
+    async def _launch(self) -> _Server:
+        """Spawn a server, start listening to it and initialize it."""
+        client, process = await LSPClient.from_command(
+            *self.cmd,
+            response_handler=self.response_handler,
+            logger=self.logger,
+            **self.options,
+        )
+        listener = asyncio.ensure_future(client.listen())
+        try:
+            result = await client.request(
+                InitializeRequest(params=self.initialize_params),
+                timeout=self.initialize_timeout,
+            )
+            await client.send_notification(InitializedNotification())
+        except BaseException:
+            await self._stop_server(_Server(client, process, listener, None))
+            raise
+        return _Server(client, process, listener, (result or {}).get("capabilities"))
+
+    async def _supervise(self) -> None:
+        while True:
+            server = self._current()
+            await asyncio.gather(server.listener, return_exceptions=True)
+            if self._closing:
+                return
+            self._ready.clear()
+            await self._stop_server(server)
+            stderr = server.client.stderr
+            if stderr is not None:
+                # Catch the last words of the server.
+                await stderr.wait(1.0)
+            self.logger.warning(
+                "LSP server exited with code %s after %.1fs%s",
+                server.process.returncode,
+                time.monotonic() - server.started,
+                f"; last stderr output:\n{stderr.tail_text(2048)}"
+                if stderr is not None and stderr.bytes_read
+                else "",
+            )
+            try:
+                await self._restart(server)
+            except ConnectionError as e:
+                self.logger.error("%s", e)
+                self._failed = e
+                self._ready.set()
+                return
+
+    async def _restart(self, crashed: _Server) -> None:
+        """
+        Start a server in place of `crashed`, retrying with backoff.
+
+        Raises:
+            ConnectionError: If the restart policy's attempts are exhausted.
+        """
+        stable = time.monotonic() - crashed.started >= self.stable_after
+        if stable:
+            self._delays = self.restart_policy.delays()
+        while True:
+            if not stable:
+                delay = next(self._delays, None)
+                if delay is None:
+                    raise ConnectionError(
+                        f"Gave up restarting the LSP server after {self.restarts} "
+                        "restarts"
+                    )
+                await asyncio.sleep(delay)
+            stable = False
+            server = None
+            try:
+                server = await self._take_standby()
+                if server is None:
+                    server = await self._launch()
+                await self._replay(server)
+            except _START_ERRORS as e:
+                self.logger.warning("Restarting the LSP server failed: %s", e)
+                if server is not None:
+                    await self._stop_server(server)
+                continue
+            except BaseException:
+                if server is not None:
+                    await self._stop_server(server)
+                raise
+            break
+        self._server = server
+        self.restarts += 1
+        self._ready.set()
+        if self.warm_standby:
+            self._prepare_standby()
+
+    async def _replay(self, server: _Server) -> None:
+        """
+        Open the tracked documents on `server` and switch the document
+        manager to it.
+
+        Document operations wait until the restart has finished, so the
+        tracked documents do not change meanwhile.
+        """
+        documents = self.documents
+        for document in list(documents.documents.values()):
+            await server.client.send_notification(
+                fast.did_open_notification(
+                    document.uri, document.language_id, document.version, document.text
+                )
+            )
+        documents.client = server.client
+        documents.set_server_capabilities(server.capabilities)
+        if self.on_restart is not None:
+            await self.on_restart(server.client)
+
+    def _prepare_standby(self) -> None:
+        if self._standby is None and not self._closing:
+            self._standby = asyncio.ensure_future(self._launch())
+
+    def _take_standby_task(self) -> "asyncio.Future[_Server] | None":
+        standby = self._standby
+        self._standby = None
+        return standby
+
+    async def _await_standby(self, standby: "asyncio.Future[_Server]") -> list[_Server]:
+        try:
+            return [await standby]
+        except (asyncio.CancelledError, *_START_ERRORS) as e:
+            self.logger.debug("Standby LSP server did not start: %r", e)
+            return []
+
+    async def _take_standby(self) -> _Server | None:
+        """Return the standby server, if it is running."""
+        standby = self._take_standby_task()
+        if standby is None:
+            return None
+        for server in await self._await_standby(standby):
+            if server.alive:
+                self.logger.info("Failing over to the standby LSP server")
+                server.started = time.monotonic()
+                return server
+            await self._stop_server(server)
+        return None
+
+    async def _shutdown_server(self, server: _Server, timeout: float | None) -> None:
+        if not server.alive:
+            return
+        client = server.client
+        await client.request(ShutdownRequest(), timeout=timeout)
+        await client.send_notification(ExitNotification())
+        await client.flush()
+        await asyncio.wait_for(server.process.wait(), timeout)
+
+    async def _stop_server(self, server: _Server) -> None:
+        server.listener.cancel()
+        await asyncio.gather(server.listener, return_exceptions=True)
+        if server.process.returncode is None:
+            server.process.kill()
+        await server.process.wait()
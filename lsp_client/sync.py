@@ -0,0 +1,218 @@
+"""
+Synchronous facade over LSPClient for threaded callers.
+
+SyncLSPClient runs an LSPClient and its reader on an event loop in a
+background thread. Its methods may be called from any number of threads at
+once; all calls share the one server connection, and requests from different
+threads are pipelined.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Callable, Coroutine, TypeVar
+
+from .client import LSPClient
+from .flow import Priority
+from .protocol import (
+    BaseNotification,
+    BaseRequest,
+    ExitNotification,
+    InitializedNotification,
+    InitializeParams,
+    InitializeRequest,
+    ShutdownRequest,
+)
+
+T = TypeVar("T")
+# A client and the server process it talks to, if any.
+Connection = tuple[LSPClient, asyncio.subprocess.Process | None]
+
+
+async def _ignore(message: dict) -> None:
+    pass
+
+
+class SyncLSPClient(object):
+    """
+    Thread-safe blocking interface to an LSPClient running on a loop thread.
+
+    Create one with `from_command` or `start`. Methods ending in `_future`
+    return a concurrent.futures.Future; the others block until done. None of
+    them may be called from the loop thread itself, e.g. from a response
+    handler, as they would wait on the loop they block.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        thread: threading.Thread,
+        client: LSPClient,
+        process: asyncio.subprocess.Process | None = None,
+    ) -> None:
+        self.loop = loop
+        self.thread = thread
+        self.client = client
+        self.process = process
+        self._listener: asyncio.Future[None] | None = None
+        self.server_capabilities: dict | None = None
+
+    @classmethod
+    def start(
+        cls,
+        factory: Callable[[], Coroutine[Any, Any, Connection]],
+        name: str = "lsp-client",
+    ) -> "SyncLSPClient":
+        """
+        Start a loop thread, create the client on it with `factory` and start
+        listening.
+
+        Args:
+            factory: Coroutine function returning the client and the server
+                process, if any. It runs on the loop thread.
+            name: Name of the loop thread.
+        """
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name=name, daemon=True)
+        thread.start()
+        try:
+            client, process = asyncio.run_coroutine_threadsafe(factory(), loop).result()
+        except BaseException:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            raise
+        sync_client = cls(loop, thread, client, process)
+        sync_client._listener = asyncio.run_coroutine_threadsafe(
+            sync_client._listen(), loop
+        ).result()
+        return sync_client
+
+    @classmethod
+    def from_command(
+        cls,
+        *cmd: str,
+        response_handler: Callable[
+            [dict[Any, Any]], Coroutine[Any, Any, None]
+        ] = _ignore,
+        logger: logging.Logger | None = None,
+        **options: Any,
+    ) -> "SyncLSPClient":
+        """
+        Spawn an LSP server and return a synchronous client connected to it.
+
+        Args:
+            *cmd: The command and arguments to launch the LSP server.
+            response_handler: Async callable run on the loop thread for each
+                notification and server-to-client request.
+            logger: Optional logger; defaults to the module logger.
+            **options: Further keyword arguments of the LSPClient constructor.
+        """
+
+        async def spawn() -> Connection:
+            return await LSPClient.from_command(
+                *cmd, response_handler=response_handler, logger=logger, **options
+            )
+
+        return cls.start(spawn)
+
+    def submit(
+        self, coroutine: Coroutine[Any, Any, T]
+    ) -> "concurrent.futures.Future[T]":
+        """Run a coroutine on the loop thread."""
+        if threading.current_thread() is self.thread:
+            coroutine.close()
+            raise RuntimeError("SyncLSPClient cannot be called from its loop thread")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def request_future(
+        self,
+        request: BaseRequest,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: float | None = None,
+    ) -> "concurrent.futures.Future[Any]":
+        """
+        Send a request and return a future of its result. Cancelling the future
+        cancels the request.
+        """
+        return self.submit(self.client.request(request, priority, timeout))
+
+    def request(
+        self,
+        request: BaseRequest,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        Send a request and wait for its result.
+
+        Raises:
+            ResponseError: If the server responded with an error.
+            TimeoutError: If the timeout passed.
+        """
+        return self.request_future(request, priority, timeout).result()
+
+    def send_notification(
+        self, notification: BaseNotification | dict[str, Any]
+    ) -> None:
+        self.submit(self.client.send_notification(notification)).result()
+
+    def flush(self) -> None:
+        self.submit(self.client.flush()).result()
+
+    def initialize(self, params: InitializeParams) -> dict | None:
+        """
+        Run the initialize handshake and return the server's capabilities.
+        """
+        result = self.request(InitializeRequest(params=params))
+        self.send_notification(InitializedNotification())
+        self.server_capabilities = (result or {}).get("capabilities")
+        return self.server_capabilities
+
+    def shutdown(self, timeout: float | None = None) -> None:
+        """
+        Shut the server down, wait for its process to end and stop the loop
+        thread.
+        """
+        try:
+            self.submit(self._shutdown(timeout)).result()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """
+        Stop listening, kill the server process if it is still running and
+        stop the loop thread.
+        """
+        if self.loop.is_closed():
+            return
+        if self.thread.is_alive():
+            self.submit(self._stop()).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+        self.loop.close()
+
+    def __enter__(self) -> "SyncLSPClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.shutdown()
+
+    async def _listen(self) -> "asyncio.Future[None]":
+        return asyncio.ensure_future(self.client.listen())
+
+    async def _shutdown(self, timeout: float | None) -> None:
+        await self.client.request(ShutdownRequest(), timeout=timeout)
+        await self.client.send_notification(ExitNotification())
+        await self.client.flush()
+        if self.process is not None:
+            await asyncio.wait_for(self.process.wait(), timeout)
+
+    async def _stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
@@ -0,0 +1,184 @@
+"""
+Line-indexed text buffer with conversions between string offsets and LSP
+positions.
+
+A Position counts characters in the code units of the negotiated position
+encoding, UTF-16 unless client and server agreed on UTF-8 or UTF-32. Python
+strings are indexed by code point, which coincides with UTF-32.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+
+from .protocol import Position, PositionEncodingKind, Range
+
+# Line endings recognised by the LSP specification.
+LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+def _line_starts(text: str, start: int = 0, end: int | None = None) -> list[int]:
+    if end is None:
+        end = len(text)
+    return [match.end() for match in LINE_BREAK.finditer(text, start, end)]
+
+
+def code_units(text: str, encoding: PositionEncodingKind) -> int:
+    """
+    Return the length of `text` in code units of the given encoding.
+    """
+    if encoding == PositionEncodingKind.UTF32 or text.isascii():
+        return len(text)
+    if encoding == PositionEncodingKind.UTF16:
+        return len(text.encode("utf-16-le", "surrogatepass")) // 2
+    return len(text.encode("utf-8", "surrogatepass"))
+
+
+def _code_points(text: str, units: int, encoding: PositionEncodingKind) -> int:
+    """
+    Return how many code points of `text` fit in `units` code units.
+    """
+    if encoding == PositionEncodingKind.UTF32 or text.isascii():
+        return min(units, len(text))
+    if encoding == PositionEncodingKind.UTF16:
+        unit_size, codec = 2, "utf-16-le"
+    else:
+        unit_size, codec = 1, "utf-8"
+    encoded = text.encode(codec, "surrogatepass")[: units * unit_size]
+    # A position inside a multi-unit character resolves to its start.
+    return len(encoded.decode(codec, "ignore"))
+
+
+class TextBuffer(object):
+    """
+    Text with an index of line start offsets.
+
+    Looking up the line of an offset is a binary search over the index, and
+    column conversions only look at the line in question, with a fast path
+    for ASCII lines. Edits update the index for the affected lines and shift
+    the offsets of the lines after them.
+    """
+
+    __slots__ = ("text", "_line_starts")
+
+    def __init__(self, text: str = "") -> None:
+        self.text = text
+        self._line_starts = [0] + _line_starts(text)
+
+    @property
+    def line_count(self) -> int:
+        return len(self._line_starts)
+
+    def line_start(self, line: int) -> int:
+        """Return the offset at which the given line starts."""
+        return self._line_starts[line]
+
+    def line_end(self, line: int) -> int:
+        """Return the offset of the line break ending the given line."""
+        if line + 1 < len(self._line_starts):
+            end = self._line_starts[line + 1]
+            if self.text[end - 2 : end] == "\r\n":
+                return end - 2
+            return end - 1
+        return len(self.text)
+
+    def line_at(self, offset: int) -> int:
+        """Return the line containing the given offset."""
+        return bisect_right(self._line_starts, offset) - 1
+
+    def line_character_at(
+        self, offset: int, encoding: PositionEncodingKind = PositionEncodingKind.UTF16
+    ) -> tuple[int, int]:
+        """
+        Convert a string offset into the line and character of a Position,
+        without building the model.
+        """
+        offset = max(0, min(offset, len(self.text)))
+        line = self.line_at(offset)
+        start = self._line_starts[line]
+        return line, code_units(self.text[start:offset], encoding)
+
+    def position_at(
+        self, offset: int, encoding: PositionEncodingKind = PositionEncodingKind.UTF16
+    ) -> Position:
+        """
+        Convert a string offset into a Position.
+        """
+        line, character = self.line_character_at(offset, encoding)
+        return Position(line=line, character=character)
+
+    def offset_at(
+        self,
+        position: Position,
+        encoding: PositionEncodingKind = PositionEncodingKind.UTF16,
+    ) -> int:
+        """
+        Convert a Position into a string offset.
+
+        Positions past the end of a line resolve to the end of the line, and
+        positions past the last line to the end of the text, as the spec
+        prescribes.
+        """
+        if position.line >= len(self._line_starts):
+            return len(self.text)
+        if position.line < 0:
+            return 0
+        start = self._line_starts[position.line]
+        line = self.text[start : self.line_end(position.line)]
+        return start + _code_points(line, position.character, encoding)
+
+    def range_at(
+        self,
+        start: int,
+        end: int,
+        encoding: PositionEncodingKind = PositionEncodingKind.UTF16,
+    ) -> Range:
+        """
+        Convert a pair of string offsets into a Range.
+        """
+        return Range(
+            start=self.position_at(start, encoding),
+            end=self.position_at(end, encoding),
+        )
+
+    def replace(self, start: int, end: int, text: str) -> None:
+        """
+        Replace the text between two offsets and update the line index.
+        """
+        self.text = self.text[:start] + text + self.text[end:]
+        starts = self._line_starts
+        delta = len(text) - (end - start)
+        # Line breaks ending up to two characters after the edit may have been
+        # joined with or split from a \r or \n of the edit, so those are
+        # rescanned. Breaks before the edit keep their offsets, and breaks
+        # after it are shifted.
+        limit = start + len(text) + 2
+        rescanned = [
+            match.end()
+            for match in LINE_BREAK.finditer(
+                self.text, max(start - 2, 0), min(limit + 1, len(self.text))
+            )
+            if start <= match.end() <= limit
+        ]
+        head = starts[: bisect_left(starts, start)] or [0]
+        tail = [offset + delta for offset in starts[bisect_right(starts, end + 2) :]]
+        self._line_starts = head + rescanned + tail
+
+    def apply_change(
+        self,
+        text: str,
+        range: Range | None = None,
+        encoding: PositionEncodingKind = PositionEncodingKind.UTF16,
+    ) -> None:
+        """
+        Apply a content change: a range edit, or a full replacement if
+        `range` is None.
+        """
+        if range is None:
+            self.text = text
+            self._line_starts = [0] + _line_starts(text)
+            return
+        self.replace(
+            self.offset_at(range.start, encoding),
+            self.offset_at(range.end, encoding),
+            text,
+        )
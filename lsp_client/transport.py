@@ -0,0 +1,170 @@
+"""
+Socket transports for connecting to language servers running as daemons.
+
+A Transport opens the byte streams an LSPClient reads from and writes to.
+Messages are framed exactly as over stdio. LSPClient.from_tcp and
+LSPClient.from_socket connect through TcpTransport and UnixTransport; the
+client reconnects through the same transport if it has a ReconnectPolicy.
+"""
+
+import asyncio
+import logging
+import socket
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class ReconnectPolicy(object):
+    """
+    Exponential backoff between connection attempts.
+
+    Args:
+        max_attempts: Attempts per connect, or None to retry forever.
+        initial_delay: Seconds to wait after the first failed attempt.
+        max_delay: Upper bound of the delay between attempts.
+        multiplier: Factor by which the delay grows after each attempt.
+        stable_after: Seconds after which an open connection that then drops
+            no longer counts as a failed attempt, even if nothing was read
+            from it.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int | None = 5,
+        initial_delay: float = 0.1,
+        max_delay: float = 5.0,
+        multiplier: float = 2.0,
+        stable_after: float = 30.0,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.stable_after = stable_after
+
+    def delays(self) -> Iterator[float]:
+        """Yield the delay before each retry."""
+        delay = self.initial_delay
+        attempt = 1
+        while self.max_attempts is None or attempt < self.max_attempts:
+            yield min(delay, self.max_delay)
+            delay *= self.multiplier
+            attempt += 1
+
+
+class SocketOptions(object):
+    """
+    Tuning of the socket underlying a connection.
+
+    Args:
+        send_buffer: SO_SNDBUF in bytes, or None for the system default.
+        receive_buffer: SO_RCVBUF in bytes, or None for the system default.
+        no_delay: Disable Nagle's algorithm on TCP sockets.
+        limit: Buffer limit of the StreamReader.
+    """
+
+    def __init__(
+        self,
+        send_buffer: int | None = None,
+        receive_buffer: int | None = None,
+        no_delay: bool = True,
+        limit: int = 2**16,
+    ) -> None:
+        self.send_buffer = send_buffer
+        self.receive_buffer = receive_buffer
+        self.no_delay = no_delay
+        self.limit = limit
+
+    def apply(self, sock: socket.socket) -> None:
+        if self.send_buffer is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+        if self.receive_buffer is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+        if self.no_delay and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class Transport(ABC):
+    """
+    Opens the streams of a connection, retrying with the reconnect policy.
+    """
+
+    def __init__(
+        self,
+        reconnect_policy: ReconnectPolicy | None = None,
+        socket_options: SocketOptions | None = None,
+    ) -> None:
+        self.reconnect_policy = reconnect_policy
+        self.socket_options = (
+            socket_options if socket_options is not None else SocketOptions()
+        )
+
+    @abstractmethod
+    async def open(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open the connection once."""
+
+    async def connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """
+        Open the connection, retrying failed attempts as the reconnect policy
+        allows.
+
+        Raises:
+            OSError: If the last attempt failed.
+        """
+        delays = self.reconnect_policy.delays() if self.reconnect_policy else iter(())
+        while True:
+            try:
+                reader, writer = await self.open()
+            except OSError as e:
+                delay = next(delays, None)
+                if delay is None:
+                    raise
+                logger.info("Connecting to %s failed (%s), retrying", self, e)
+                await asyncio.sleep(delay)
+                continue
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                self.socket_options.apply(sock)
+            return reader, writer
+
+
+class TcpTransport(Transport):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        reconnect_policy: ReconnectPolicy | None = None,
+        socket_options: SocketOptions | None = None,
+    ) -> None:
+        super().__init__(reconnect_policy, socket_options)
+        self.host = host
+        self.port = port
+
+    async def open(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_connection(
+            self.host, self.port, limit=self.socket_options.limit
+        )
+
+    def __str__(self) -> str:
+        return f"tcp://{self.host}:{self.port}"
+
+
+class UnixTransport(Transport):
+    def __init__(
+        self,
+        path: str,
+        reconnect_policy: ReconnectPolicy | None = None,
+        socket_options: SocketOptions | None = None,
+    ) -> None:
+        super().__init__(reconnect_policy, socket_options)
+        self.path = path
+
+    async def open(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_unix_connection(
+            self.path, limit=self.socket_options.limit
+        )
+
+    def __str__(self) -> str:
+        return f"unix://{self.path}"
@@ -13,6 +13,10 @@ def is_valid_encoding(encoding: str) -> bool:
     return True
 
 
+def is_utf8(encoding: str) -> bool:
+    return encoding.lower().replace("_", "-") in ("utf-8", "utf8")
+
+
 def parse_content_type(content_type_string: str | None) -> tuple[str, str]:
     """
     Parses content type string and returns content type and encoding.
@@ -0,0 +1,139 @@
+"""
+Bulk opening of workspace files.
+
+Patterns are expanded and files are read in worker threads, a bounded number at a time, and opened
+through a DocumentManager as soon as they have been read. Opening a document
+waits for the server's stdin to drain once the client's write queue is full,
+so reading never runs far ahead of what the server accepts.
+"""
+
+import asyncio
+import glob
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from .documents import Document, DocumentManager
+
+DEFAULT_CONCURRENCY = 8
+
+LANGUAGE_IDS = {
+    ".c": "c",
+    ".cc": "cpp",
+    ".cpp": "cpp",
+    ".cs": "csharp",
+    ".css": "css",
+    ".go": "go",
+    ".h": "c",
+    ".hpp": "cpp",
+    ".html": "html",
+    ".java": "java",
+    ".js": "javascript",
+    ".json": "json",
+    ".jsx": "javascriptreact",
+    ".kt": "kotlin",
+    ".lua": "lua",
+    ".md": "markdown",
+    ".php": "php",
+    ".py": "python",
+    ".rb": "ruby",
+    ".rs": "rust",
+    ".sh": "shellscript",
+    ".sql": "sql",
+    ".swift": "swift",
+    ".toml": "toml",
+    ".ts": "typescript",
+    ".tsx": "typescriptreact",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class OpenProgress(NamedTuple):
+    opened: int
+    failed: int
+    total: int
+    bytes_read: int
+
+
+def language_id_for(path: str) -> str:
+    """Guess the language id of a file from its extension."""
+    return LANGUAGE_IDS.get(os.path.splitext(path)[1].lower(), "plaintext")
+
+
+def expand_paths(patterns: Iterable[str], root: str | None = None) -> list[str]:
+    """
+    Expand paths and glob patterns, which may use `**`, into a sorted list of
+    unique file paths. Relative patterns are resolved against `root`.
+    """
+    paths = set()
+    for pattern in patterns:
+        if root is not None:
+            pattern = os.path.join(root, pattern)
+        for path in glob.iglob(pattern, recursive=True):
+            if os.path.isfile(path):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def _read(path: str, encoding: str) -> tuple[str, int]:
+    with open(path, "rb") as f:
+        data = f.read()
+    return data.decode(encoding, errors="replace"), len(data)
+
+
+async def open_files(
+    manager: DocumentManager,
+    patterns: Iterable[str],
+    root: str | None = None,
+    language_id: Callable[[str], str] = language_id_for,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    progress: Callable[[OpenProgress], None] | None = None,
+    encoding: str = "utf-8",
+) -> list[Document]:
+    """
+    Open all files matching `patterns` on the server.
+
+    Args:
+        manager: The DocumentManager tracking the opened documents.
+        patterns: File paths or glob patterns.
+        root: Directory relative patterns are resolved against.
+        language_id: Function returning the language id of a path.
+        concurrency: Maximum number of files read at the same time.
+        progress: Called after each file with the progress so far.
+        encoding: Encoding of the files; undecodable bytes are replaced.
+
+    Returns:
+        The opened documents, in the order they were opened. Files that could
+        not be read are logged and skipped.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    # Matching and stat-ing tens of thousands of files would block the loop.
+    paths = await asyncio.to_thread(expand_paths, patterns, root)
+    pending: Iterator[str] = iter(paths)
+    documents: list[Document] = []
+    opened = failed = bytes_read = 0
+
+    async def worker() -> None:
+        nonlocal opened, failed, bytes_read
+        for path in pending:
+            try:
+                text, size = await asyncio.to_thread(_read, path, encoding)
+            except OSError as e:
+                logger.warning("Cannot open %s: %s", path, e)
+                failed += 1
+            else:
+                documents.append(
+                    await manager.open(Path(path).as_uri(), language_id(path), text)
+                )
+                opened += 1
+                bytes_read += size
+            if progress is not None:
+                progress(OpenProgress(opened, failed, len(paths), bytes_read))
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(paths)))))
+    return documents
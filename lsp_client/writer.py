@@ -0,0 +1,100 @@
+"""
+Write coalescing for outgoing LSP messages.
+"""
+
+import asyncio
+from typing import Iterable
+
+DEFAULT_FLUSH_THRESHOLD = 65536
+
+
+class CoalescingWriter(object):
+    """
+    Queues framed messages and writes them to the stream in batches.
+
+    Queued buffers are handed to the stream in one vectored `writelines` call,
+    either at the end of the current event loop iteration or as soon as the
+    queued size reaches `flush_threshold`. Buffers are written in the order
+    they were queued.
+
+    Messages too large to hold in memory at once can be written piecewise
+    with `write_stream`; messages queued meanwhile are held back until it
+    completes.
+    """
+
+    def __init__(
+        self,
+        stream: asyncio.StreamWriter,
+        flush_threshold: int = DEFAULT_FLUSH_THRESHOLD,
+    ) -> None:
+        self.stream = stream
+        self.flush_threshold = flush_threshold
+        self._buffers: list[bytes] = []
+        self._size = 0
+        self._flush_handle: asyncio.Handle | None = None
+        self._stream_lock = asyncio.Lock()
+        self._streaming = False
+
+    @property
+    def buffered_size(self) -> int:
+        """The number of bytes queued but not yet written to the stream."""
+        return self._size
+
+    def write(self, *buffers: bytes) -> bool:
+        """
+        Queue buffers for writing.
+
+        Returns:
+            True if the flush threshold was reached, in which case the caller
+            should await `flush`. The queue is written out at once, unless a
+            message is being streamed; `flush` then waits for it to complete,
+            so that the queue does not grow without bound meanwhile.
+        """
+        self._buffers.extend(buffers)
+        self._size += sum(len(buffer) for buffer in buffers)
+        if self._size >= self.flush_threshold:
+            self.write_out()
+            return True
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_soon(self.write_out)
+        return False
+
+    def write_out(self) -> None:
+        """
+        Hand all queued buffers to the stream without waiting for it to drain.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._buffers and not self._streaming:
+            buffers = self._buffers
+            self._buffers = []
+            self._size = 0
+            self.stream.writelines(buffers)
+
+    async def flush(self) -> None:
+        """
+        Write out all queued buffers and wait until the stream has drained.
+        """
+        async with self._stream_lock:
+            self.write_out()
+            await self.stream.drain()
+
+    async def write_stream(self, buffers: Iterable[bytes]) -> None:
+        """
+        Write out the queue, then write one message produced piecewise by
+        `buffers`, waiting for the stream to drain after each piece.
+        """
+        async with self._stream_lock:
+            self.write_out()
+            self._streaming = True
+            try:
+                for buffer in buffers:
+                    self.stream.write(buffer)
+                    await self.stream.drain()
+            finally:
+                self._streaming = False
+                if self._buffers and self._flush_handle is None:
+                    self._flush_handle = asyncio.get_running_loop().call_soon(
+                        self.write_out
+                    )
@@ -0,0 +1,42 @@
+import pytest
+
+from benchmarks import run
+from lsp_client.protocol import BaseRequest
+
+
+@pytest.mark.asyncio
+async def test_fake_server_round_trip():
+    async with run.fake_server("--symbols", "3") as client:
+        hover = await client.request(run._hover())
+        symbols = await client.request(
+            BaseRequest(method="workspace/symbol", params={"query": ""})
+        )
+        echo = await client.request(BaseRequest(method="bench/echo", params={"a": 1}))
+
+    assert hover["contents"]["kind"] == "plaintext"
+    assert [symbol["name"] for symbol in symbols] == [
+        "symbol_0",
+        "symbol_1",
+        "symbol_2",
+    ]
+    assert echo == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_report_is_machine_readable():
+    report = await run.run(["models", "pipelined"], quick=True)
+
+    assert set(report["meta"]) >= {"lsp_client", "python", "timestamp"}
+    assert {(r["suite"], r["name"]) for r in report["results"]} >= {
+        ("models", "did_change_build"),
+        ("pipelined", "hover_throughput"),
+    }
+    assert all(r["value"] > 0 for r in report["results"])
+
+
+def test_import_benchmark():
+    results = {r["name"]: r["value"] for r in run.bench_import(1)}
+
+    assert set(results) == set(run.IMPORT_STATEMENTS)
+    # Importing the package alone loads neither the client nor pydantic.
+    assert results["package"] < results["client"]
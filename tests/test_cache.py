@@ -0,0 +1,98 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from lsp_client.cache import ResponseCache
+from lsp_client.client import LSPClient
+from lsp_client.protocol import (
+    ContentChange,
+    HoverRequest,
+    TextDocumentDidChangeNotification,
+    TextDocumentDidCloseNotification,
+)
+
+URI = "file:///tmp/test.py"
+
+
+def _hover(line: int = 0) -> HoverRequest:
+    return HoverRequest(
+        params={
+            "textDocument": {"uri": URI},
+            "position": {"line": line, "character": 0},
+        }
+    )
+
+
+def _did_open(version: int = 0) -> dict:
+    return {
+        "method": "textDocument/didOpen",
+        "params": {"textDocument": {"uri": URI, "version": version}},
+    }
+
+
+def test_lru_eviction_and_stats():
+    cache = ResponseCache(max_size=2)
+    keys = [cache.key_for(_hover(line).model_dump()) for line in range(3)]
+    for i, key in enumerate(keys):
+        cache.store(key, i)
+
+    assert cache.lookup(keys[0]) == (False, None)
+    assert cache.lookup(keys[2]) == (True, 2)
+    assert cache.stats == (1, 1, 1, 0, 2)
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_uncacheable_requests_have_no_key():
+    cache = ResponseCache()
+    assert cache.key_for({"method": "textDocument/references", "params": {}}) is None
+    assert cache.key_for({"method": "textDocument/hover", "params": {}}) is None
+
+
+def test_key_includes_document_version():
+    cache = ResponseCache()
+    cache.observe_notification(_did_open(version=3))
+    key = cache.key_for(_hover().model_dump())
+    assert key[2] == 3
+
+
+def test_did_change_invalidates_document():
+    cache = ResponseCache()
+    cache.observe_notification(_did_open())
+    key = cache.key_for(_hover().model_dump())
+    cache.store(key, "result")
+
+    change = TextDocumentDidChangeNotification(
+        uri=URI, version=1, contentChanges=[ContentChange(text="x")]
+    )
+    cache.observe_notification(change.model_dump(exclude_none=True))
+
+    assert len(cache) == 0
+    assert cache.stats.invalidations == 1
+    # A response to a request sent before the change is not stored.
+    cache.store(key, "stale")
+    assert len(cache) == 0
+    assert cache.key_for(_hover().model_dump())[2] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_serves_repeated_request_from_cache():
+    client = LSPClient(None, None, AsyncMock(), cache=ResponseCache())
+
+    with patch.object(client, "_send_request") as mock_send:
+        first = await client.send_request(_hover())
+        request_id = mock_send.call_args.args[0]["id"]
+        await client._handle_response({"id": request_id, "result": "doc"})
+        assert await first == "doc"
+        await asyncio.sleep(0)
+
+        second = await client.send_request(_hover())
+        assert second.done() and second.result() == "doc"
+        mock_send.assert_called_once()
+
+        close = TextDocumentDidCloseNotification(params={"textDocument": {"uri": URI}})
+        await client.send_notification(close)
+        await client.send_request(_hover())
+        assert mock_send.call_count == 3
+
+    assert client.cache.stats.hits == 1
@@ -10,8 +10,14 @@ from lsp_client.client import (
     SEPARATOR,
     LSPClient,
 )
+from lsp_client.flow import RequestWindow
 from lsp_client.utils import DEFAULT_CONTENT_TYPE
-from lsp_client.protocol import InitializeRequest, InitializedNotification
+from lsp_client.protocol import (
+    InitializedNotification,
+    InitializeRequest,
+    Position,
+    ResponseError,
+)
 
 
 @pytest.mark.asyncio
@@ -76,11 +82,28 @@ async def test_listen_exits_cleanly_on_eof():
     await client.listen()  # must return without raising
 
 
+@pytest.mark.asyncio
+async def test_listen_fails_pending_requests_on_eof():
+    reader = asyncio.StreamReader()
+    client = LSPClient(None, reader, AsyncMock())
+
+    with patch.object(client, "_async_write_request"):
+        future = await client.send_request(InitializeRequest())
+    reader.feed_eof()
+    await client.listen()
+
+    with pytest.raises(ConnectionResetError):
+        await future
+    assert client.pending_count == 0
+
+
 @pytest.mark.asyncio
 async def test_from_command_wires_streams():
     mock_proc = MagicMock()
     mock_proc.stdin = MagicMock(spec=asyncio.StreamWriter)
     mock_proc.stdout = MagicMock(spec=asyncio.StreamReader)
+    mock_proc.stderr = asyncio.StreamReader()
+    mock_proc.stderr.feed_eof()
 
     async def handler(response: dict) -> None:
         pass
@@ -99,3 +122,247 @@ async def test_from_command_wires_streams():
         assert client.stdin is mock_proc.stdin
         assert client.stdout is mock_proc.stdout
         assert proc is mock_proc
+        assert client.stderr is not None
+        assert client.stderr.stream is mock_proc.stderr
+
+
+@pytest.mark.asyncio
+async def test_send_request_resolves_with_matching_result():
+    handler = AsyncMock()
+    client = LSPClient(None, None, handler)
+
+    with patch.object(client, "_async_write_request"):
+        first = await client.send_request(InitializeRequest())
+        second = await client.send_request(InitializeRequest())
+
+    await client._handle_response({"jsonrpc": "2.0", "id": 2, "result": "b"})
+    await client._handle_response({"jsonrpc": "2.0", "id": 1, "result": "a"})
+
+    assert await first == "a"
+    assert await second == "b"
+    handler.assert_not_called()
+    assert client._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_request_raises_response_error():
+    client = LSPClient(None, None, AsyncMock())
+
+    async def respond(header_bytes: bytes, request_bytes: bytes) -> None:
+        request_id = json.loads(request_bytes)["id"]
+        error = {"code": -32601, "message": "Method not found"}
+        asyncio.get_running_loop().call_soon(
+            asyncio.ensure_future,
+            client._handle_response(
+                {"jsonrpc": "2.0", "id": request_id, "error": error}
+            ),
+        )
+
+    with patch.object(client, "_async_write_request", side_effect=respond):
+        with pytest.raises(ResponseError) as excinfo:
+            await client.request(InitializeRequest())
+
+    assert excinfo.value.code == -32601
+
+
+@pytest.mark.asyncio
+async def test_notifications_and_server_requests_reach_handler():
+    handler = AsyncMock()
+    client = LSPClient(None, None, handler)
+
+    notification = {"jsonrpc": "2.0", "method": "window/logMessage", "params": {}}
+    server_request = {"jsonrpc": "2.0", "id": 1, "method": "workspace/configuration"}
+    unknown_response = {"jsonrpc": "2.0", "id": 99, "result": None}
+    for message in (notification, server_request, unknown_response):
+        await client._handle_response(message)
+
+    assert [c.args[0] for c in handler.call_args_list] == [
+        notification,
+        server_request,
+        unknown_response,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_read_response_dispatches_frames_from_one_read():
+    messages = [{"jsonrpc": "2.0", "method": "a"}, {"jsonrpc": "2.0", "method": "b"}]
+    data = b""
+    for message in messages:
+        body = json.dumps(message).encode(DEFAULT_ENCODING)
+        data += f"Content-Length: {len(body)}{SEPARATOR}{SEPARATOR}".encode() + body
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    handler = AsyncMock()
+
+    client = LSPClient(None, reader, handler)
+    await client.listen()
+
+    assert [c.args[0] for c in handler.call_args_list] == messages
+
+
+@pytest.mark.asyncio
+async def test_notifications_coalesced_until_flush():
+    stdin = MagicMock(spec=asyncio.StreamWriter)
+    stdin.drain = AsyncMock()
+    client = LSPClient(stdin, None, AsyncMock())
+
+    for _ in range(3):
+        await client.send_notification(InitializedNotification())
+    stdin.write.assert_not_called()
+    stdin.writelines.assert_not_called()
+
+    await client.flush()
+
+    stdin.writelines.assert_called_once()
+    (buffers,) = stdin.writelines.call_args.args
+    assert len(buffers) == 6
+    stdin.drain.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_request_timeout_sends_cancel_and_drops_late_response():
+    handler = AsyncMock()
+    client = LSPClient(None, None, handler)
+    client._send_request = AsyncMock()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.request(InitializeRequest(), timeout=0.01)
+    await asyncio.sleep(0)
+
+    cancel = client._send_request.call_args.args[0]
+    assert cancel == {
+        "jsonrpc": "2.0",
+        "method": "$/cancelRequest",
+        "params": {"id": 1},
+    }
+    assert client.pending_count == 0
+
+    await client._handle_response({"jsonrpc": "2.0", "id": 1, "result": "late"})
+    handler.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cancelling_awaiting_task_cancels_request():
+    client = LSPClient(None, None, AsyncMock())
+    client._send_request = AsyncMock()
+
+    task = asyncio.create_task(client.request(InitializeRequest()))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+
+    assert client._send_request.call_args.args[0]["method"] == "$/cancelRequest"
+    assert client.pending_count == 0
+
+
+@pytest.mark.asyncio
+async def test_request_deadline_in_the_past_times_out():
+    client = LSPClient(None, None, AsyncMock())
+    client._send_request = AsyncMock()
+    deadline = asyncio.get_running_loop().time() - 1
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.request(InitializeRequest(), deadline=deadline)
+
+
+@pytest.mark.asyncio
+async def test_request_deadline_includes_waiting_for_a_slot():
+    window = RequestWindow(1)
+    client = LSPClient(None, None, AsyncMock(), window=window)
+    client._send_request = AsyncMock()
+    await window.acquire()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.request(InitializeRequest(), deadline=started + 0.1)
+
+    assert loop.time() - started < 0.4
+    client._send_request.assert_not_called()
+    assert window.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_cancel_request_unknown_id():
+    client = LSPClient(None, None, AsyncMock())
+    assert client.cancel_request(42) is False
+
+
+def frames(*messages: dict) -> bytes:
+    data = b""
+    for message in messages:
+        body = json.dumps(message).encode(DEFAULT_ENCODING)
+        data += f"Content-Length: {len(body)}{SEPARATOR}{SEPARATOR}".encode() + body
+    return data
+
+
+@pytest.mark.asyncio
+async def test_lazy_decoding_skips_ignored_and_defers_results():
+    reader = asyncio.StreamReader()
+    handler = AsyncMock()
+    client = LSPClient(
+        None, reader, handler, lazy_decoding=True, ignored_methods=["$/progress"]
+    )
+    client._send_request = AsyncMock()
+    client.codec = MagicMock(wraps=client.codec)
+
+    future = await client.send_request(InitializeRequest(), lazy=True)
+    log = {"jsonrpc": "2.0", "method": "window/logMessage", "params": {}}
+    reader.feed_data(
+        frames(
+            {"jsonrpc": "2.0", "method": "$/progress", "params": {"token": 1}},
+            {"jsonrpc": "2.0", "id": 1, "result": {"capabilities": {}}},
+            log,
+        )
+    )
+    reader.feed_eof()
+    await client.listen()
+
+    handler.assert_awaited_once_with(log)
+    # Only the log message, which is not ignored, was decoded.
+    assert client.codec.decode.call_count == 1
+    message = future.result()
+    assert not message.decoded
+    assert message.result() == {"capabilities": {}}
+
+
+@pytest.mark.asyncio
+async def test_request_with_result_type_validates_result():
+    client = LSPClient(None, None, AsyncMock(), lazy_decoding=True)
+
+    async def respond(header_bytes: bytes, request_bytes: bytes) -> None:
+        request_id = json.loads(request_bytes)["id"]
+        result = {"line": 3, "character": 1}
+        asyncio.get_running_loop().call_soon(
+            asyncio.ensure_future,
+            client._handle_response(
+                {"jsonrpc": "2.0", "id": request_id, "result": result}
+            ),
+        )
+
+    with patch.object(client, "_async_write_request", side_effect=respond):
+        position = await client.request(InitializeRequest(), result_type=Position)
+
+    assert position == Position(line=3, character=1)
+    assert client._lazy == set()
+
+
+@pytest.mark.asyncio
+async def test_send_response():
+    client = LSPClient(None, None, AsyncMock())
+    client._send_request = AsyncMock()
+
+    await client.send_response(1, [None])
+    await client.send_response(2, error=ResponseError(-32803, "failed", {"x": 1}))
+
+    assert [call.args[0] for call in client._send_request.call_args_list] == [
+        {"jsonrpc": "2.0", "id": 1, "result": [None]},
+        {
+            "jsonrpc": "2.0",
+            "id": 2,
+            "error": {"code": -32803, "message": "failed", "data": {"x": 1}},
+        },
+    ]
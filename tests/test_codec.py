@@ -0,0 +1,44 @@
+import pytest
+
+from lsp_client.codec import JSONCodec, MsgspecCodec, OrjsonCodec, default_codec
+
+
+def _available_codecs():
+    codecs = [JSONCodec()]
+    for codec_cls in (OrjsonCodec, MsgspecCodec):
+        try:
+            codecs.append(codec_cls())
+        except ImportError:
+            pass
+    return codecs
+
+
+MESSAGE = {"jsonrpc": "2.0", "id": 1, "result": {"contents": "naïve → ok"}}
+
+
+@pytest.mark.parametrize("codec", _available_codecs(), ids=lambda c: c.name)
+def test_round_trip(codec):
+    data = codec.encode(MESSAGE)
+    assert isinstance(data, bytes)
+    assert codec.decode(data) == MESSAGE
+    assert codec.decode(bytearray(data)) == MESSAGE
+
+
+@pytest.mark.parametrize("codec", _available_codecs(), ids=lambda c: c.name)
+def test_decode_other_encoding(codec):
+    data = JSONCodec().encode(MESSAGE).decode("utf-8").encode("utf-16")
+    assert codec.decode(data, "utf-16") == MESSAGE
+
+
+@pytest.mark.parametrize("codec", _available_codecs(), ids=lambda c: c.name)
+def test_encoding_is_compact_utf8(codec):
+    assert codec.encode({"a": [1, "é"]}) == '{"a":[1,"é"]}'.encode("utf-8")
+
+
+def test_default_codec_prefers_installed_fast_codec():
+    expected = _available_codecs()[-1] if len(_available_codecs()) > 1 else None
+    codec = default_codec()
+    if expected is None:
+        assert type(codec) is JSONCodec
+    else:
+        assert codec.name in ("orjson", "msgspec")
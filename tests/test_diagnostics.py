@@ -0,0 +1,125 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from lsp_client.client import LSPClient
+from lsp_client.diagnostics import DiagnosticsStore
+
+
+def _diagnostic(message):
+    return {
+        "range": {
+            "start": {"line": 0, "character": 0},
+            "end": {"line": 0, "character": 1},
+        },
+        "message": message,
+    }
+
+
+def _params(uri, version, *messages):
+    return {
+        "uri": uri,
+        "version": version,
+        "diagnostics": [_diagnostic(message) for message in messages],
+    }
+
+
+@pytest.mark.asyncio
+async def test_stale_versions_and_duplicates_are_dropped():
+    store = DiagnosticsStore()
+
+    assert store.publish(_params("a", 2, "x"))
+    assert not store.publish(_params("a", 1, "y"))
+    assert not store.publish(_params("a", 3, "x"))
+    assert store.publish(_params("a", 4, "y"))
+
+    entry = store.get("a")
+    assert entry.version == 4
+    assert entry.diagnostics == [_diagnostic("y")]
+    assert store.stats[:4] == (4, 1, 1, 0)
+    store.flush()
+
+
+@pytest.mark.asyncio
+async def test_bursts_are_coalesced():
+    store = DiagnosticsStore(coalesce_window=0.01)
+    subscriber = MagicMock(return_value=None)
+    store.subscribe(subscriber)
+
+    for version in range(5):
+        store.publish(_params("a", version, f"error {version}"))
+    store.publish(_params("b", None, "warning"))
+    subscriber.assert_not_called()
+    await asyncio.sleep(0.02)
+
+    subscriber.assert_called_once()
+    (updates,) = subscriber.call_args.args
+    assert [(entry.uri, entry.version) for entry in updates] == [("a", 4), ("b", None)]
+    assert store.stats.notifications == 1
+
+
+@pytest.mark.asyncio
+async def test_burst_returning_to_notified_state_is_not_reported():
+    store = DiagnosticsStore()
+    subscriber = AsyncMock()
+    unsubscribe = store.subscribe(subscriber)
+
+    store.publish(_params("a", 1, "x"))
+    store.flush()
+    store.publish(_params("a", 2, "y"))
+    store.publish(_params("a", 3, "x"))
+    store.flush()
+    await asyncio.sleep(0)
+
+    assert subscriber.await_count == 1
+    unsubscribe()
+    store.publish(_params("a", 4))
+    store.flush()
+    assert subscriber.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failing_subscriber_does_not_stop_others(caplog):
+    store = DiagnosticsStore()
+    store.subscribe(MagicMock(side_effect=RuntimeError("boom")))
+    other = MagicMock(return_value=None)
+    store.subscribe(other)
+
+    store.publish(_params("a", 1, "x"))
+    store.flush()
+
+    other.assert_called_once()
+    assert "Diagnostics subscriber failed" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_clear():
+    store = DiagnosticsStore()
+    store.publish(_params("a", 1, "x"))
+    store.publish(_params("b", 1, "x"))
+
+    store.clear("a")
+    assert [entry.uri for entry in store] == ["b"]
+    store.clear()
+    assert len(store) == 0
+    store.flush()
+
+
+@pytest.mark.asyncio
+async def test_client_feeds_store_instead_of_handler():
+    handler = AsyncMock()
+    store = DiagnosticsStore()
+    client = LSPClient(None, None, handler, diagnostics=store)
+
+    await client._handle_response(
+        {
+            "jsonrpc": "2.0",
+            "method": "textDocument/publishDiagnostics",
+            "params": _params("a", 1, "x"),
+        }
+    )
+
+    handler.assert_not_called()
+    assert store.get("a").diagnostics == [_diagnostic("x")]
+    store.flush()
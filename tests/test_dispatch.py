@@ -0,0 +1,191 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from lsp_client.client import LSPClient
+from lsp_client.dispatch import Dispatcher, by_uri
+from lsp_client.protocol import ErrorCodes, ResponseError
+
+
+def _diagnostics(uri, version):
+    return {
+        "jsonrpc": "2.0",
+        "method": "textDocument/publishDiagnostics",
+        "params": {"uri": uri, "version": version, "diagnostics": []},
+    }
+
+
+@pytest.mark.asyncio
+async def test_reader_does_not_wait_for_handlers():
+    dispatcher = Dispatcher()
+    release = asyncio.Event()
+    seen = []
+
+    @dispatcher.handler("window/logMessage")
+    async def slow(message):
+        await release.wait()
+        seen.append(message)
+
+    client = LSPClient(None, None, AsyncMock(), dispatcher=dispatcher)
+    message = {"jsonrpc": "2.0", "method": "window/logMessage", "params": {}}
+    for _ in range(3):
+        # Returns while the handler is still waiting.
+        await client._handle_response(message)
+
+    assert dispatcher.backlog == 0
+    release.set()
+    await dispatcher.join()
+    assert seen == [message] * 3
+
+
+@pytest.mark.asyncio
+async def test_messages_with_the_same_key_run_in_order():
+    dispatcher = Dispatcher()
+    order = []
+
+    async def handle(message):
+        params = message["params"]
+        order.append(("start", params["uri"], params["version"]))
+        await asyncio.sleep(0.01 if params["uri"] == "a" else 0)
+        order.append(("end", params["uri"], params["version"]))
+
+    dispatcher.register("textDocument/publishDiagnostics", handle, key=by_uri)
+    for version in (1, 2):
+        dispatcher.dispatch(_diagnostics("a", version))
+    dispatcher.dispatch(_diagnostics("b", 1))
+    assert dispatcher.backlog == 1
+    await dispatcher.join()
+
+    a_events = [event for event in order if event[1] == "a"]
+    assert a_events == [
+        ("start", "a", 1),
+        ("end", "a", 1),
+        ("start", "a", 2),
+        ("end", "a", 2),
+    ]
+    # b did not wait for a.
+    assert order.index(("end", "b", 1)) < order.index(("end", "a", 1))
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    dispatcher = Dispatcher(max_concurrency=2)
+    running = 0
+    peak = 0
+
+    async def handle(message):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+
+    dispatcher.register("m", handle)
+    for _ in range(10):
+        dispatcher.dispatch({"jsonrpc": "2.0", "method": "m"})
+    assert dispatcher.backlog == 8
+    await dispatcher.join()
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_server_requests_are_answered():
+    dispatcher = Dispatcher()
+    client = LSPClient(None, None, AsyncMock(), dispatcher=dispatcher)
+    client._send_request = AsyncMock()
+
+    @dispatcher.handler("workspace/configuration")
+    async def configuration(message):
+        return [{"setting": True}]
+
+    @dispatcher.handler("window/workDoneProgress/create")
+    async def create(message):
+        raise ResponseError(ErrorCodes.RequestFailed, "no")
+
+    await client._handle_response(
+        {"jsonrpc": "2.0", "id": 1, "method": "workspace/configuration"}
+    )
+    await client._handle_response(
+        {"jsonrpc": "2.0", "id": 2, "method": "window/workDoneProgress/create"}
+    )
+    await dispatcher.join()
+
+    responses = {
+        call.args[0]["id"]: call.args[0] for call in client._send_request.call_args_list
+    }
+    assert responses[1]["result"] == [{"setting": True}]
+    assert responses[2]["error"] == {"code": -32803, "message": "no"}
+
+
+@pytest.mark.asyncio
+async def test_unhandled_requests_get_method_not_found():
+    respond = AsyncMock()
+    dispatcher = Dispatcher()
+    dispatcher.attach(respond)
+
+    dispatcher.dispatch({"jsonrpc": "2.0", "id": 3, "method": "unknown"})
+    dispatcher.dispatch({"jsonrpc": "2.0", "method": "unknown"})
+    # An unmatched response is not a request and gets no reply.
+    dispatcher.dispatch({"jsonrpc": "2.0", "id": 5, "result": None})
+    await dispatcher.join()
+
+    respond.assert_awaited_once()
+    request_id, result, error = respond.call_args.args
+    assert request_id == 3
+    assert result is None
+    assert error.code == ErrorCodes.MethodNotFound
+
+
+@pytest.mark.asyncio
+async def test_unregistered_messages_go_to_fallback():
+    handler = AsyncMock()
+    dispatcher = Dispatcher()
+    client = LSPClient(None, None, handler, dispatcher=dispatcher)
+    client._send_request = AsyncMock()
+    request = {"jsonrpc": "2.0", "id": 1, "method": "custom/request"}
+
+    await client._handle_response(request)
+    await dispatcher.join()
+
+    handler.assert_awaited_once_with(request)
+    # The fallback answers requests itself.
+    client._send_request.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failing_fallback_does_not_answer_responses(caplog):
+    respond = AsyncMock()
+    dispatcher = Dispatcher()
+    dispatcher.attach(respond, AsyncMock(side_effect=RuntimeError("boom")))
+
+    dispatcher.dispatch({"jsonrpc": "2.0", "id": 5, "result": None})
+    await dispatcher.join()
+
+    respond.assert_not_called()
+    assert "RuntimeError: boom" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_failing_notification_handler_is_logged(caplog):
+    dispatcher = Dispatcher()
+    dispatcher.register("m", AsyncMock(side_effect=RuntimeError("boom")))
+    dispatcher.register("n", AsyncMock())
+
+    dispatcher.dispatch({"jsonrpc": "2.0", "method": "m"})
+    dispatcher.dispatch({"jsonrpc": "2.0", "method": "n"})
+    await dispatcher.join()
+
+    assert "Handler for m failed" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_running_handlers():
+    dispatcher = Dispatcher(max_concurrency=1)
+    dispatcher.register("m", lambda message: asyncio.sleep(10))
+    for _ in range(3):
+        dispatcher.dispatch({"jsonrpc": "2.0", "method": "m"})
+
+    await asyncio.wait_for(dispatcher.close(), 1)
+    assert dispatcher.backlog == 0
@@ -0,0 +1,132 @@
+import json
+import re
+import random
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from lsp_client.client import LSPClient
+from lsp_client.documents import DocumentManager, compute_change
+from lsp_client.protocol import TextDocumentSyncKind
+
+
+def _offset(text: str, line: int, character: int) -> int:
+    """Resolve a UTF-16 based position against text."""
+    offset = 0
+    for _ in range(line):
+        offset = re.compile(r"\r\n|\r|\n").search(text, offset).end()
+    units = 0
+    while units < character:
+        units += 2 if ord(text[offset]) > 0xFFFF else 1
+        offset += 1
+    return offset
+
+
+def _apply(text: str, change) -> str:
+    start = _offset(text, change.range.start.line, change.range.start.character)
+    end = _offset(text, change.range.end.line, change.range.end.character)
+    return text[:start] + change.text + text[end:]
+
+
+def test_compute_change_single_insert():
+    change = compute_change("def f():\n    pass\n", "def f():\n    return 1\n")
+    assert change.model_dump(exclude_none=True) == {
+        "text": "return 1",
+        "range": {
+            "start": {"line": 1, "character": 4},
+            "end": {"line": 1, "character": 8},
+        },
+    }
+
+
+def test_compute_change_identical():
+    assert compute_change("abc", "abc") is None
+
+
+def test_compute_change_counts_utf16_units():
+    change = compute_change("😀a\n", "😀b\n")
+    assert change.range.start.character == 2
+    assert change.range.end.character == 3
+
+
+def test_compute_change_does_not_split_crlf():
+    old = "a\r\nb\r\n"
+    new = "a\r\nx\r\nb\r\n"
+    change = compute_change(old, new)
+    assert _apply(old, change) == new
+    for position in (change.range.start, change.range.end):
+        offset = _offset(old, position.line, position.character)
+        assert not (old[offset - 1 : offset] == "\r" and old[offset] == "\n")
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_compute_change_round_trip(seed):
+    rng = random.Random(seed)
+    alphabet = "ab \n\r\t😀é"
+    old = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10000)))
+    start = rng.randint(0, len(old))
+    end = rng.randint(start, len(old))
+    inserted = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+    new = old[:start] + inserted + old[end:]
+
+    change = compute_change(old, new)
+
+    if old == new:
+        assert change is None
+    else:
+        assert _apply(old, change) == new
+
+
+def _sent(mock_send):
+    return [json.loads(json.dumps(c.args[0])) for c in mock_send.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_manager_sends_incremental_changes():
+    client = LSPClient(None, None, AsyncMock())
+    manager = DocumentManager(client)
+
+    with patch.object(client, "_send_request") as mock_send:
+        await manager.open("file:///a.py", "python", "x = 1\n")
+        await manager.change("file:///a.py", "x = 2\n")
+        await manager.change("file:///a.py", "x = 2\n")
+        await manager.close("file:///a.py")
+
+    opened, changed, closed = _sent(mock_send)
+    assert opened["params"]["textDocument"]["version"] == 0
+    assert changed["params"]["textDocument"] == {"uri": "file:///a.py", "version": 1}
+    assert changed["params"]["contentChanges"] == [
+        {
+            "text": "2",
+            "range": {
+                "start": {"line": 0, "character": 4},
+                "end": {"line": 0, "character": 5},
+            },
+        }
+    ]
+    assert closed["method"] == "textDocument/didClose"
+    assert manager.get("file:///a.py") is None
+
+
+@pytest.mark.asyncio
+async def test_manager_falls_back_to_full_sync():
+    client = LSPClient(None, None, AsyncMock())
+    manager = DocumentManager(client)
+    manager.set_server_capabilities({"textDocumentSync": {"change": 1}})
+    assert manager.sync_kind == TextDocumentSyncKind.FULL
+
+    with patch.object(client, "_send_request") as mock_send:
+        await manager.open("file:///a.py", "python", "x = 1\n")
+        await manager.change("file:///a.py", "x = 2\n")
+
+    _, changed = _sent(mock_send)
+    assert changed["params"]["contentChanges"] == [{"text": "x = 2\n"}]
+
+
+def test_sync_kind_from_server_capabilities():
+    from_caps = TextDocumentSyncKind.from_server_capabilities
+    assert from_caps({"textDocumentSync": 2}) == TextDocumentSyncKind.INCREMENTAL
+    assert from_caps({"textDocumentSync": {"openClose": True}}) == (
+        TextDocumentSyncKind.NONE
+    )
+    assert from_caps(None) == TextDocumentSyncKind.NONE
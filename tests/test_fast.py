@@ -0,0 +1,63 @@
+import pytest
+
+from lsp_client import fast
+from lsp_client.codec import JSONCodec, default_codec
+from lsp_client.protocol import (
+    ContentChange,
+    Position,
+    Range,
+    TextDocumentDidChangeNotification,
+    TextDocumentDidCloseNotification,
+    TextDocumentDidOpenNotification,
+    TextDocumentIdentifier,
+    TextDocumentItem,
+)
+
+CODECS = [JSONCodec(), default_codec()]
+URI = "file:///tmp/test.py"
+
+
+def _pairs():
+    change = ContentChange(
+        text="x",
+        range=Range(
+            start=Position(line=1, character=2), end=Position(line=3, character=4)
+        ),
+    )
+    item = TextDocumentItem(uri=URI, languageId="python", version=0, text="é\n")
+    return [
+        (Position(line=1, character=2), fast.position(1, 2)),
+        (change, fast.content_change("x", fast.range_(1, 2, 3, 4))),
+        (ContentChange(text="full"), fast.content_change("full")),
+        (
+            TextDocumentDidChangeNotification(
+                uri=URI,
+                version=3,
+                contentChanges=[change, ContentChange(text="full")],
+            ),
+            fast.did_change_notification(
+                URI,
+                3,
+                [
+                    fast.content_change("x", fast.range_(1, 2, 3, 4)),
+                    fast.content_change("full"),
+                ],
+            ),
+        ),
+        (
+            TextDocumentDidOpenNotification(params={"textDocument": item.model_dump()}),
+            fast.did_open_notification(URI, "python", 0, "é\n"),
+        ),
+        (
+            TextDocumentDidCloseNotification(
+                params={"textDocument": TextDocumentIdentifier(uri=URI).model_dump()}
+            ),
+            fast.did_close_notification(URI),
+        ),
+    ]
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+def test_fast_builders_encode_identically(codec):
+    for model, built in _pairs():
+        assert codec.encode(built) == codec.encode(model.model_dump(exclude_none=True))
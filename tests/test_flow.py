@@ -0,0 +1,81 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from lsp_client.client import LSPClient
+from lsp_client.flow import Priority, RequestWindow
+from lsp_client.protocol import HoverRequest
+
+
+def test_window_rejects_empty_limit():
+    with pytest.raises(ValueError):
+        RequestWindow(0)
+
+
+@pytest.mark.asyncio
+async def test_interactive_waiters_served_first():
+    window = RequestWindow(1)
+    await window.acquire()
+    order = []
+
+    async def waiter(name, priority):
+        await window.acquire(priority)
+        order.append(name)
+
+    tasks = [
+        asyncio.create_task(waiter("background", Priority.BACKGROUND)),
+        asyncio.create_task(waiter("interactive", Priority.INTERACTIVE)),
+    ]
+    await asyncio.sleep(0)
+    assert window.queue_depth == 2
+    assert window.stats.queued == {Priority.INTERACTIVE: 1, Priority.BACKGROUND: 1}
+
+    window.release()
+    await asyncio.sleep(0)
+    window.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["interactive", "background"]
+    assert window.in_flight == 1
+    assert window.stats.waits == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    window = RequestWindow(1)
+    await window.acquire()
+    task = asyncio.create_task(window.acquire())
+    await asyncio.sleep(0)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    window.release()
+
+    assert window.in_flight == 0
+    assert window.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_client_applies_backpressure():
+    client = LSPClient(None, None, AsyncMock(), window=RequestWindow(2))
+    client._send_request = AsyncMock()
+
+    def hover():
+        return HoverRequest(params={})
+
+    first = await client.send_request(hover())
+    await client.send_request(hover())
+    blocked = asyncio.create_task(client.send_request(hover()))
+    await asyncio.sleep(0)
+    assert not blocked.done()
+    assert client._send_request.await_count == 2
+
+    await client._handle_response({"id": 1, "result": None})
+    assert await first is None
+    await asyncio.sleep(0)
+    await blocked
+
+    assert client._send_request.await_count == 3
+    assert client.window.in_flight == 2
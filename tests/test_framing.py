@@ -0,0 +1,74 @@
+import pytest
+
+from lsp_client.framing import FrameParser, parse_headers
+from lsp_client.protocol import ProtocolError
+
+
+def _frame(body: bytes, content_type: str | None = None) -> bytes:
+    header = f"Content-Length: {len(body)}\r\n"
+    if content_type is not None:
+        header += f"Content-Type: {content_type}\r\n"
+    return header.encode("ascii") + b"\r\n" + body
+
+
+def test_parse_headers():
+    assert parse_headers(
+        b"Content-Length: 12\r\nContent-Type: application/vscode-jsonrpc"
+    ) == (12, "application/vscode-jsonrpc")
+
+
+def test_parse_headers_requires_content_length():
+    with pytest.raises(ProtocolError):
+        parse_headers(b"Content-Type: application/vscode-jsonrpc")
+    with pytest.raises(ProtocolError):
+        parse_headers(b"Content-Length: twelve")
+
+
+def test_several_frames_from_one_chunk():
+    parser = FrameParser()
+    parser.feed(_frame(b'{"id":1}') + _frame(b'{"id":2}', "x/y") + b"Content-Le")
+
+    assert len(parser) == 2
+    assert parser.next_frame() == (None, b'{"id":1}')
+    assert parser.next_frame() == ("x/y", b'{"id":2}')
+    assert parser.next_frame() is None
+
+
+def test_frame_split_byte_by_byte():
+    data = _frame(b'{"id":1}') + _frame(b'{"id":2}')
+    parser = FrameParser()
+    for i in range(len(data)):
+        parser.feed(data[i : i + 1])
+
+    assert [parser.next_frame(), parser.next_frame()] == [
+        (None, b'{"id":1}'),
+        (None, b'{"id":2}'),
+    ]
+
+
+def test_large_body_assembled_in_place():
+    body = b"x" * 100_000
+    data = _frame(body) + _frame(b"{}")
+    parser = FrameParser()
+    parser.feed(data[:1000])
+    header_size = len(data) - len(body) - len(_frame(b"{}"))
+    assert parser.bytes_needed == len(body) - (1000 - header_size)
+
+    for i in range(1000, len(data), 4096):
+        parser.feed(data[i : i + 4096])
+
+    assert parser.bytes_needed == 0
+    assert parser.next_frame() == (None, body)
+    assert parser.next_frame() == (None, b"{}")
+
+
+def test_bare_newline_headers_tolerated():
+    parser = FrameParser()
+    parser.feed(b"Content-Length: 2\n\n{}")
+    assert parser.next_frame() == (None, b"{}")
+
+
+def test_oversized_header_rejected():
+    parser = FrameParser(max_header_size=16)
+    with pytest.raises(ProtocolError):
+        parser.feed(b"X-Padding: " + b"a" * 32)
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import pytest
+
+import lsp_client
+
+
+def _run(code):
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.split()
+
+
+def test_package_import_is_lazy():
+    loaded = _run(
+        "import sys, lsp_client;"
+        "print(*sorted(m for m in sys.modules"
+        " if m.startswith(('lsp_client.', 'pydantic'))))"
+    )
+    assert loaded == []
+
+
+def test_exports_resolve_on_access():
+    for name in lsp_client.__all__:
+        assert getattr(lsp_client, name) is not None
+    assert set(lsp_client.__all__) <= set(dir(lsp_client))
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError, match="NoSuchName"):
+        lsp_client.NoSuchName
+
+
+def test_protocol_models_are_built_on_first_use():
+    completeness = _run(
+        "from lsp_client.protocol import Position;"
+        "print(Position.__pydantic_complete__);"
+        "Position(line=0, character=0);"
+        "print(Position.__pydantic_complete__)"
+    )
+    assert completeness == ["False", "True"]
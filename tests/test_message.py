@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from lsp_client.codec import JSONCodec
+from lsp_client.message import Envelope, LazyMessage, peek_envelope
+from lsp_client.protocol import Position, ResponseError
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message).encode()
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ({"jsonrpc": "2.0", "id": 3, "result": {"a": 1}}, Envelope(3, None, True)),
+        ({"jsonrpc": "2.0", "id": "x", "result": None}, Envelope("x", None, True)),
+        (
+            {"jsonrpc": "2.0", "id": 4, "error": {"code": 1, "message": "m"}},
+            Envelope(4, None, True),
+        ),
+        (
+            {"jsonrpc": "2.0", "method": "$/progress", "params": {"token": 1}},
+            Envelope(None, "$/progress", False),
+        ),
+        (
+            {"jsonrpc": "2.0", "id": 7, "method": "workspace/configuration"},
+            Envelope(7, "workspace/configuration", False),
+        ),
+        (
+            {"jsonrpc": "2.0", "method": 'a\\"b', "params": []},
+            Envelope(None, 'a\\"b', False),
+        ),
+    ],
+)
+def test_peek_envelope(message, expected):
+    assert peek_envelope(encode(message)) == expected
+    assert peek_envelope(json.dumps(message, indent=2).encode()) == expected
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        # Members that decide the envelope come after a nested value.
+        {"jsonrpc": "2.0", "result": {}, "id": 1},
+        {"params": {}, "method": "m"},
+        {"jsonrpc": "2.0"},
+        {},
+    ],
+)
+def test_peek_envelope_undetermined(message):
+    assert peek_envelope(encode(message)) is None
+
+
+def test_peek_envelope_ignores_body_size():
+    body = encode({"jsonrpc": "2.0", "id": 1, "result": ["x" * 100] * 10000})
+    # Only the members ahead of the result are read.
+    head = body[: body.index(b"[") + 1]
+    assert peek_envelope(head) == Envelope(1, None, True)
+
+
+def test_lazy_message_decodes_on_demand():
+    body = encode({"jsonrpc": "2.0", "id": 1, "result": {"line": 1, "character": 2}})
+    message = LazyMessage(Envelope(1, None, True), body, JSONCodec())
+
+    assert not message.decoded
+    assert message.id == 1
+    assert message.result() == {"line": 1, "character": 2}
+    assert message.decoded
+    assert message.result(Position) == Position(line=1, character=2)
+
+
+def test_lazy_message_typed_list_result():
+    payload = {"jsonrpc": "2.0", "id": 1, "result": [{"line": 0, "character": 0}]}
+    message = LazyMessage.from_payload(payload, JSONCodec())
+
+    assert message.result(list[Position]) == [Position(line=0, character=0)]
+
+
+def test_lazy_message_error():
+    payload = {"jsonrpc": "2.0", "id": 1, "error": {"code": -32603, "message": "x"}}
+    message = LazyMessage.from_payload(payload, JSONCodec())
+
+    with pytest.raises(ResponseError) as excinfo:
+        message.result(Position)
+    assert excinfo.value.code == -32603
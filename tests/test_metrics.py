@@ -0,0 +1,67 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from lsp_client.client import SEPARATOR, LSPClient
+from lsp_client.metrics import ClientMetrics, Histogram
+from lsp_client.protocol import HoverRequest, InitializedNotification
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram((0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1.0) == 5.0
+    assert histogram.snapshot()["max"] == 5.0
+
+
+@pytest.mark.asyncio
+async def test_client_records_request_latency_and_traffic():
+    observer = MagicMock()
+    exporter = MagicMock()
+    metrics = ClientMetrics(exporter=exporter, observer=observer)
+    client = LSPClient(None, None, AsyncMock(), metrics=metrics)
+    client._async_write_request = AsyncMock()
+
+    future = await client.send_request(HoverRequest(params={}))
+    await client.send_notification(InitializedNotification())
+    assert metrics.snapshot()["pending_requests"] == 1
+
+    await client._handle_response({"jsonrpc": "2.0", "id": 1, "result": None})
+    await future
+    await asyncio.sleep(0)
+
+    snapshot = metrics.export()
+    exporter.assert_called_once_with(snapshot)
+    assert snapshot["requests"]["textDocument/hover"]["count"] == 1
+    assert snapshot["requests"]["textDocument/hover"]["errors"] == 0
+    assert snapshot["messages_out"] == 2
+    assert snapshot["bytes_out"] > 0
+    assert snapshot["pending_requests"] == 0
+    observer.assert_called_once()
+    assert observer.call_args.args[0] == "textDocument/hover"
+
+
+@pytest.mark.asyncio
+async def test_client_records_incoming_messages_and_stalls():
+    body = b'{"jsonrpc":"2.0","method":"window/logMessage","params":{}}'
+    reader = asyncio.StreamReader()
+    reader.feed_data(f"Content-Length: {len(body)}{SEPARATOR}{SEPARATOR}".encode())
+    reader.feed_data(body)
+    reader.feed_eof()
+
+    async def slow_handler(message):
+        await asyncio.sleep(0.02)
+
+    metrics = ClientMetrics(stall_threshold=0.01)
+    client = LSPClient(None, reader, slow_handler, metrics=metrics)
+    await client.listen()
+
+    assert metrics.messages_in == 1
+    assert metrics.bytes_in == len(body)
+    assert metrics.handler_time >= 0.02
+    assert metrics.reader_stalls == 1
@@ -0,0 +1,134 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from lsp_client.cache import ResponseCache
+from lsp_client.client import LSPClient
+from lsp_client.partial import PartialResultStream
+from lsp_client.protocol import ReferencesRequest, ResponseError, WorkspaceSymbolRequest
+
+
+def _progress(token, value):
+    return {
+        "jsonrpc": "2.0",
+        "method": "$/progress",
+        "params": {"token": token, "value": value},
+    }
+
+
+def _client(**kwargs):
+    client = LSPClient(None, None, AsyncMock(), **kwargs)
+    client._send_request = AsyncMock()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_chunks_then_final_result():
+    client = _client()
+    stream = await client.stream_request(WorkspaceSymbolRequest(params={"query": ""}))
+
+    sent = client._send_request.call_args.args[0]
+    assert sent["params"] == {"query": "", "partialResultToken": stream.token}
+
+    await client._handle_response(_progress(stream.token, [1, 2]))
+    first = await stream.__anext__()
+    await client._handle_response(_progress(stream.token, [3]))
+    await client._handle_response({"jsonrpc": "2.0", "id": 1, "result": [4]})
+
+    assert first == [1, 2]
+    assert [chunk async for chunk in stream] == [[3], [4]]
+    client.response_handler.assert_not_called()
+    assert client._partial_streams == {}
+
+
+@pytest.mark.asyncio
+async def test_stream_collect_skips_empty_final_result():
+    client = _client()
+    stream = await client.stream_request(ReferencesRequest(params={}))
+
+    await client._handle_response(_progress(stream.token, [1]))
+    await client._handle_response(_progress(stream.token, [2, 3]))
+    await client._handle_response({"jsonrpc": "2.0", "id": 1, "result": []})
+
+    assert await stream.collect() == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_stream_raises_response_error():
+    client = _client()
+    stream = await client.stream_request(ReferencesRequest(params={}))
+
+    await client._handle_response(_progress(stream.token, [1]))
+    error = {"code": -32603, "message": "failed"}
+    await client._handle_response({"jsonrpc": "2.0", "id": 1, "error": error})
+
+    assert await stream.__anext__() == [1]
+    with pytest.raises(ResponseError):
+        await stream.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_stream_cancel_sends_cancel_request():
+    client = _client()
+    stream = await client.stream_request(ReferencesRequest(params={}))
+    await client._handle_response(_progress(stream.token, [1]))
+
+    async for chunk in stream:
+        assert chunk == [1]
+        stream.cancel()
+    # Run the done callbacks, then the task sending the cancellation.
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert client._send_request.call_args.args[0]["method"] == "$/cancelRequest"
+    assert client._partial_streams == {}
+    # Further progress for the token goes to the response handler.
+    late = _progress(stream.token, [2])
+    await client._handle_response(late)
+    client.response_handler.assert_awaited_once_with(late)
+
+
+@pytest.mark.asyncio
+async def test_stream_progress_not_skipped_by_lazy_decoding():
+    reader = asyncio.StreamReader()
+    client = LSPClient(
+        None, reader, AsyncMock(), lazy_decoding=True, ignored_methods=["$/progress"]
+    )
+    client._send_request = AsyncMock()
+    stream = await client.stream_request(ReferencesRequest(params={}))
+
+    for message in (
+        _progress("other", {"kind": "report"}),
+        _progress(stream.token, [1]),
+        {"jsonrpc": "2.0", "id": 1, "result": []},
+    ):
+        body = json.dumps(message).encode()
+        reader.feed_data(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+    reader.feed_eof()
+    await client.listen()
+
+    assert await stream.collect() == [1]
+    client.response_handler.assert_not_called()
+
+
+def test_partial_requests_are_not_cached():
+    cache = ResponseCache()
+    payload = {
+        "method": "textDocument/completion",
+        "params": {"textDocument": {"uri": "file:///a"}, "partialResultToken": "t"},
+    }
+    assert cache.key_for(payload) is None
+
+
+@pytest.mark.asyncio
+async def test_stream_is_exhausted_after_end():
+    stream = PartialResultStream("t")
+    future = asyncio.get_running_loop().create_future()
+    stream.attach(future)
+    future.set_result(None)
+    await asyncio.sleep(0)
+
+    assert [chunk async for chunk in stream] == []
+    assert [chunk async for chunk in stream] == []
@@ -0,0 +1,119 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from lsp_client import fast
+from lsp_client.client import LSPClient
+from lsp_client.pool import LSPServerPool, RoutingStrategy
+from lsp_client.protocol import (
+    ContentChange,
+    HoverRequest,
+    InitializedNotification,
+    TextDocumentDidChangeNotification,
+    TextDocumentDidOpenNotification,
+)
+
+
+def _clients(count):
+    clients = [LSPClient(None, None, AsyncMock()) for _ in range(count)]
+    for client in clients:
+        client._send_request = AsyncMock()
+    return clients
+
+
+def _did_open(uri):
+    return TextDocumentDidOpenNotification(
+        params={
+            "textDocument": {
+                "uri": uri,
+                "languageId": "python",
+                "version": 0,
+                "text": "",
+            }
+        }
+    )
+
+
+def _hover(uri):
+    return HoverRequest(
+        params={"textDocument": {"uri": uri}, "position": {"line": 0, "character": 0}}
+    )
+
+
+def test_pool_requires_clients():
+    with pytest.raises(ValueError):
+        LSPServerPool([])
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding_routing():
+    clients = _clients(3)
+    pool = LSPServerPool(clients)
+    await pool.send_notification(_did_open("file:///a.py"))
+
+    for _ in range(3):
+        await pool.send_request(_hover("file:///a.py"))
+
+    assert [client.pending_count for client in clients] == [1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_uri_affinity_routing_and_sync_broadcast():
+    clients = _clients(3)
+    pool = LSPServerPool(clients, RoutingStrategy.URI_AFFINITY)
+    await pool.send_notification(_did_open("file:///a.py"))
+    target = pool.select("file:///a.py")
+
+    await pool.send_request(_hover("file:///a.py"))
+    await pool.send_request(_hover("file:///a.py"))
+    await pool.send_notification(
+        TextDocumentDidChangeNotification(
+            uri="file:///a.py", version=1, contentChanges=[ContentChange(text="x")]
+        )
+    )
+
+    for client in clients:
+        expected = 4 if client is target else 0
+        assert client._send_request.await_count == expected
+
+
+@pytest.mark.asyncio
+async def test_wire_format_notifications_are_routed():
+    clients = _clients(3)
+    pool = LSPServerPool(clients, RoutingStrategy.URI_AFFINITY)
+    target = pool.select("file:///a.py")
+
+    await pool.send_notification(
+        fast.did_open_notification("file:///a.py", "python", 0, "")
+    )
+    await pool.send_notification(fast.did_close_notification("file:///a.py"))
+    await pool.send_notification({"jsonrpc": "2.0", "method": "initialized"})
+
+    for client in clients:
+        expected = 3 if client is target else 1
+        assert client._send_request.await_count == expected
+    assert pool._open_on == {}
+
+
+@pytest.mark.asyncio
+async def test_other_notifications_broadcast():
+    clients = _clients(2)
+    pool = LSPServerPool(clients)
+
+    await pool.send_notification(InitializedNotification())
+
+    for client in clients:
+        client._send_request.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_initialize_collects_capabilities():
+    clients = _clients(2)
+    pool = LSPServerPool(clients)
+
+    with patch.object(
+        LSPClient, "request", new=AsyncMock(return_value={"capabilities": {"x": 1}})
+    ):
+        await pool.initialize(None)
+
+    assert pool.server_capabilities == [{"x": 1}, {"x": 1}]
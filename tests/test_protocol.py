@@ -1,5 +1,10 @@
+import json
+
 from lsp_client.protocol import (
+    CancelNotification,
+    CancelParams,
     CancelRequest,
+    ClientCapabilities,
     ClientInfo,
     CompletionRequest,
     ContentChange,
@@ -10,6 +15,7 @@ from lsp_client.protocol import (
     InitializeRequest,
     InitializedNotification,
     Position,
+    PositionEncodingKind,
     ProgressNotification,
     Range,
     ShutdownRequest,
@@ -147,3 +153,36 @@ def test_definition_request():
     data = req.model_dump(exclude_none=True)
     assert data["method"] == "textDocument/definition"
     assert data["params"]["textDocument"]["uri"] == "file:///tmp/test.py"
+
+
+def test_initialize_params_offer_position_encodings():
+    params = InitializeParams(
+        rootUri="file:///tmp",
+        capabilities=ClientCapabilities(
+            general=PositionEncodingKind.client_capabilities(
+                PositionEncodingKind.UTF8, PositionEncodingKind.UTF16
+            )
+        ),
+    )
+    request = InitializeRequest(id=1, params=params)
+    data = json.loads(json.dumps(request.model_dump(exclude_none=True)))
+
+    assert data["params"]["capabilities"]["general"] == {
+        "positionEncodings": ["utf-8", "utf-16"]
+    }
+
+
+def test_general_capabilities_stay_dicts():
+    markdown = {"parser": "marked"}
+    capabilities = ClientCapabilities(general={"markdown": markdown})
+
+    assert capabilities.general == {"markdown": markdown}
+
+
+def test_cancel_notification():
+    notification = CancelNotification(params=CancelParams(id=7))
+    assert notification.model_dump(exclude_none=True) == {
+        "jsonrpc": "2.0",
+        "method": "$/cancelRequest",
+        "params": {"id": 7},
+    }
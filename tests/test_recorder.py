@@ -0,0 +1,85 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from lsp_client import fast
+from lsp_client.client import LSPClient
+from lsp_client.protocol import InitializeRequest
+from lsp_client.recorder import (
+    MAGIC,
+    Direction,
+    SessionRecorder,
+    read_session,
+)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "session.lsprec")
+    with SessionRecorder(path) as recorder:
+        recorder.record(Direction.OUT, b'{"a":1}')
+        recorder.record_chunks(Direction.IN, 7, [b'{"b"', b":2}"])
+
+    messages = list(read_session(path))
+    assert [(m.direction, m.body) for m in messages] == [
+        (Direction.OUT, b'{"a":1}'),
+        (Direction.IN, b'{"b":2}'),
+    ]
+    timestamps = [m.timestamp for m in messages]
+    assert timestamps == sorted(timestamps)
+
+
+def test_new_session_replaces_earlier_one(tmp_path):
+    path = str(tmp_path / "session.lsprec")
+    with SessionRecorder(path) as recorder:
+        recorder.record(Direction.OUT, b'{"a":1}')
+    with SessionRecorder(path) as recorder:
+        recorder.record(Direction.OUT, b"{}")
+
+    assert [m.body for m in read_session(path)] == [b"{}"]
+    with open(path, "rb") as f:
+        assert f.read().count(MAGIC) == 1
+
+
+def test_invalid_files(tmp_path):
+    path = tmp_path / "session.lsprec"
+    path.write_bytes(b"not a session")
+    with pytest.raises(ValueError):
+        list(read_session(str(path)))
+
+    with SessionRecorder(str(path.with_suffix(".2"))) as recorder:
+        recorder.record(Direction.OUT, b"{}")
+    path.write_bytes(path.with_suffix(".2").read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        list(read_session(str(path)))
+
+
+@pytest.mark.asyncio
+async def test_client_records_traffic(tmp_path):
+    path = str(tmp_path / "session.lsprec")
+    stdin = MagicMock(spec=asyncio.StreamWriter)
+    stdin.drain = AsyncMock()
+    reader = asyncio.StreamReader()
+    response = b'{"jsonrpc":"2.0","id":1,"result":null}'
+    reader.feed_data(b"Content-Length: %d\r\n\r\n" % len(response) + response)
+    reader.feed_eof()
+
+    with SessionRecorder(path) as recorder:
+        client = LSPClient(
+            stdin, reader, AsyncMock(), recorder=recorder, streaming_threshold=10
+        )
+        await client.send_request(InitializeRequest())
+        large = fast.did_open_notification("file:///a", "python", 0, "x" * 20)
+        await client.send_notification(large)
+        await client.listen()
+
+    messages = list(read_session(path))
+    assert [m.direction for m in messages] == [
+        Direction.OUT,
+        Direction.OUT,
+        Direction.IN,
+    ]
+    assert json.loads(messages[0].body)["method"] == "initialize"
+    assert json.loads(messages[1].body) == large
+    assert messages[2].body == response
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from lsp_client.client import LSPClient
+from lsp_client.metrics import ClientMetrics
+from lsp_client.protocol import ExitNotification, HoverRequest
+from lsp_client.recorder import Direction, RecordedMessage, SessionRecorder
+from lsp_client.replay import ReplayServer, replay_client, main
+
+MS = 1_000_000
+
+
+def _body(message):
+    return json.dumps(message).encode()
+
+
+def _hover(request_id):
+    return HoverRequest(
+        id=request_id,
+        params={
+            "textDocument": {"uri": "file:///a.py"},
+            "position": {"line": 0, "character": 0},
+        },
+    )
+
+
+def _session():
+    log = {"jsonrpc": "2.0", "method": "window/logMessage", "params": {}}
+    return [
+        RecordedMessage(Direction.OUT, 0, _body(_hover(1).model_dump())),
+        RecordedMessage(Direction.IN, 1 * MS, _body(log)),
+        RecordedMessage(
+            Direction.IN,
+            5 * MS,
+            _body({"jsonrpc": "2.0", "id": 1, "result": {"contents": "doc"}}),
+        ),
+    ]
+
+
+def test_replay_server_indexes_session():
+    server = ReplayServer(_session())
+
+    assert server.responses[1][0] == 5 * MS
+    assert [offset for offset, _ in server.unsolicited] == [1 * MS]
+
+
+@pytest.mark.asyncio
+async def test_replay_server_answers_client(tmp_path):
+    path = str(tmp_path / "session.lsprec")
+    with SessionRecorder(path) as recorder:
+        for message in _session():
+            recorder.record(message.direction, message.body)
+    handler = AsyncMock()
+    client, proc = await LSPClient.from_command(
+        sys.executable,
+        "-m",
+        "lsp_client.replay",
+        "serve",
+        path,
+        "--speed",
+        "0",
+        response_handler=handler,
+    )
+    listener = asyncio.create_task(client.listen())
+    try:
+        result = await client.request(_hover(1), timeout=10)
+        await client.send_notification(ExitNotification())
+        await client.flush()
+        await asyncio.wait_for(proc.wait(), 10)
+        await asyncio.wait_for(listener, 10)
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+    assert result == {"contents": "doc"}
+    assert handler.await_args.args[0]["method"] == "window/logMessage"
+
+
+@pytest.mark.asyncio
+async def test_replay_client():
+    feed = asyncio.StreamReader()
+    handler = AsyncMock()
+    metrics = ClientMetrics()
+    stdin = MagicMock(spec=asyncio.StreamWriter)
+    stdin.drain = AsyncMock()
+    client = LSPClient(stdin, feed, handler, metrics=metrics)
+
+    stats = await replay_client(_session(), client, feed, speed=0)
+
+    assert stats.messages_out == 1
+    assert stats.messages_in == 2
+    assert metrics.request_latency["textDocument/hover"].count == 1
+    handler.assert_awaited_once()
+
+
+def test_replay_client_command(tmp_path, capsys):
+    path = str(tmp_path / "session.lsprec")
+    with SessionRecorder(path) as recorder:
+        for message in _session():
+            recorder.record(message.direction, message.body)
+
+    main(["client", path, "--speed", "0"])
+
+    report = json.loads(capsys.readouterr().out)
+    assert report["messages_out"] == 1
+    assert report["messages_in"] == 2
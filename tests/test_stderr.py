@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import sys
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from benchmarks import run
+from lsp_client.client import LSPClient
+from lsp_client.stderr import StderrDrain
+
+
+async def _drain(data: list[bytes], **options) -> StderrDrain:
+    stream = asyncio.StreamReader()
+    for chunk in data:
+        stream.feed_data(chunk)
+    stream.feed_eof()
+    drain = StderrDrain(stream, **options)
+    await drain.drain()
+    return drain
+
+
+@pytest.mark.asyncio
+async def test_keeps_only_the_most_recent_bytes():
+    drain = await _drain([b"abcdef", b"ghij", b"klmnopqrstuvwxyz"], capacity=8)
+
+    assert drain.tail() == b"stuvwxyz"
+    assert drain.tail(3) == b"xyz"
+    assert drain.tail(0) == b""
+    assert drain.bytes_read == 26
+
+
+@pytest.mark.asyncio
+async def test_trims_the_oldest_chunk_partially():
+    drain = await _drain([b"abcd", b"ef", b"gh"], capacity=5, chunk_size=4)
+
+    assert drain.tail() == b"defgh"
+    assert drain._buffered == 5
+
+
+@pytest.mark.asyncio
+async def test_rejects_empty_capacity():
+    with pytest.raises(ValueError):
+        StderrDrain(asyncio.StreamReader(), capacity=0)
+
+
+@pytest.mark.asyncio
+async def test_invalid_capacity_does_not_leave_the_server_running():
+    spawn = asyncio.create_subprocess_exec
+    processes = []
+
+    async def create_subprocess_exec(*args, **kwargs):
+        processes.append(await spawn(*args, **kwargs))
+        return processes[-1]
+
+    with patch("asyncio.create_subprocess_exec", create_subprocess_exec):
+        with pytest.raises(ValueError):
+            await LSPClient.from_command(
+                sys.executable,
+                run.FAKE_SERVER,
+                response_handler=AsyncMock(),
+                stderr_capacity=0,
+            )
+
+    [process] = processes
+    assert process.returncode is not None
+
+
+@pytest.mark.asyncio
+async def test_forwards_complete_lines(caplog):
+    logger = logging.getLogger("test-stderr")
+    with caplog.at_level(logging.DEBUG, logger="test-stderr"):
+        await _drain([b"first\r\nsec", b"ond\nunterminated"], logger=logger)
+
+    assert [r.getMessage() for r in caplog.records] == [
+        "server stderr: first",
+        "server stderr: second",
+        "server stderr: unterminated",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rate_limits_forwarded_lines(caplog):
+    logger = logging.getLogger("test-stderr")
+    data = [b"".join(b"line %d\n" % i for i in range(10))]
+    with caplog.at_level(logging.DEBUG, logger="test-stderr"):
+        drain = await _drain(data, logger=logger, max_lines_per_second=3)
+
+    assert [r.getMessage() for r in caplog.records] == [
+        "server stderr: line 0",
+        "server stderr: line 1",
+        "server stderr: line 2",
+    ]
+    assert drain.lines_suppressed == 7
+    # Everything is still buffered.
+    assert drain.tail().count(b"\n") == 10
+
+
+@pytest.mark.asyncio
+async def test_verbose_server_does_not_stall():
+    # 200 requests write 1.6MB to stderr, far more than a pipe holds.
+    async with run.fake_server("--stderr-bytes", "8192") as client:
+        for _ in range(200):
+            await asyncio.wait_for(client.request(run._hover()), 5)
+        assert client.stderr is not None
+        assert client.stderr.running
+        await asyncio.sleep(0.05)
+        tail = client.stderr.tail_text(160)
+
+    assert tail.endswith(".\n")
+    assert "handling" in tail
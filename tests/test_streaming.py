@@ -0,0 +1,106 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from lsp_client import fast
+from lsp_client.client import LSPClient
+from lsp_client.codec import JSONCodec, default_codec
+from lsp_client.framing import FrameParser
+from lsp_client.streaming import StreamedBody, find_large_text
+
+TEXT = 'line "one"\\\n\tüñí €😀\r\n\x00' * 50
+
+
+@pytest.mark.parametrize("codec", [JSONCodec(), default_codec()])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 100000])
+def test_streamed_body_matches_encoding(codec, chunk_size):
+    message = fast.did_open_notification("file:///a.py", "python", 1, TEXT)
+    path = find_large_text(message, 10)
+    body = StreamedBody(codec, message, path, chunk_size)
+
+    data = b"".join(body)
+    assert json.loads(data) == message
+    assert body.content_length() == len(data)
+    # The message itself is left untouched.
+    assert message["params"]["textDocument"]["text"] == TEXT
+
+
+def test_find_large_text():
+    open_message = fast.did_open_notification("file:///a", "python", 1, "x" * 10)
+    assert find_large_text(open_message, 10) == ("params", "textDocument", "text")
+    assert find_large_text(open_message, 11) is None
+
+    change = fast.did_change_notification(
+        "file:///a",
+        2,
+        [fast.content_change("y"), fast.content_change("x" * 10)],
+    )
+    assert find_large_text(change, 10) == ("params", "contentChanges", 1, "text")
+    assert find_large_text({"method": "initialized"}, 1) is None
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"textDocument": {"uri": "file:///a", "version": 2}},
+        {"textDocument": {"uri": "file:///a"}, "contentChanges": None},
+        {"contentChanges": [{"range": None}, "x" * 10]},
+        ["x" * 10],
+    ],
+)
+def test_find_large_text_ignores_other_shapes(params):
+    for method in ("textDocument/didOpen", "textDocument/didChange"):
+        assert find_large_text({"method": method, "params": params}, 1) is None
+
+
+@pytest.mark.asyncio
+async def test_incomplete_document_sync_messages_are_sent():
+    stdin = MagicMock(spec=asyncio.StreamWriter)
+    stdin.drain = AsyncMock()
+    client = LSPClient(stdin, None, AsyncMock(), streaming_threshold=1)
+    client._async_write_request = AsyncMock()
+
+    await client.send_notification(
+        {
+            "jsonrpc": "2.0",
+            "method": "textDocument/didChange",
+            "params": {"textDocument": {"uri": "file:///a", "version": 2}},
+        }
+    )
+
+    client._async_write_request.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_large_documents_are_streamed_in_order():
+    stdin = MagicMock(spec=asyncio.StreamWriter)
+    stdin.drain = AsyncMock()
+    written = []
+    stdin.write.side_effect = written.append
+    stdin.writelines.side_effect = written.extend
+    client = LSPClient(stdin, None, AsyncMock(), streaming_threshold=100)
+
+    small = fast.did_open_notification("file:///small", "python", 1, "x")
+    large = fast.did_open_notification("file:///large", "python", 1, TEXT)
+    await client.send_notification(small)
+    await asyncio.gather(
+        client.send_notification(large),
+        client.send_notification(fast.did_close_notification("file:///small")),
+    )
+    await client.flush()
+
+    # The large body went out in several writes.
+    assert stdin.write.call_count > 3
+    parser = FrameParser()
+    parser.feed(b"".join(written))
+    messages = []
+    while (frame := parser.next_frame()) is not None:
+        messages.append(json.loads(frame.body))
+    assert [m["params"]["textDocument"]["uri"] for m in messages] == [
+        "file:///small",
+        "file:///large",
+        "file:///small",
+    ]
+    assert messages[1] == large
@@ -0,0 +1,162 @@
+import asyncio
+import sys
+from unittest.mock import AsyncMock
+
+import pytest
+
+from benchmarks import run
+from lsp_client.protocol import BaseNotification, BaseRequest, InitializeParams
+from lsp_client.supervisor import ServerSupervisor
+from lsp_client.transport import ReconnectPolicy
+
+FAST_RESTARTS = ReconnectPolicy(max_attempts=3, initial_delay=0.01)
+
+
+def _supervisor(**options) -> ServerSupervisor:
+    options.setdefault("restart_policy", FAST_RESTARTS)
+    options.setdefault("retry_methods", {"textDocument/hover", "bench/documents"})
+    return ServerSupervisor(
+        sys.executable,
+        run.FAKE_SERVER,
+        initialize_params=InitializeParams(rootUri="file:///workspace"),
+        response_handler=AsyncMock(),
+        # Every restart counts towards the policy's attempts.
+        stable_after=60.0,
+        **options,
+    )
+
+
+def _documents() -> BaseRequest:
+    return BaseRequest(method="bench/documents", params={})
+
+
+def _crash() -> BaseNotification:
+    return BaseNotification(method="bench/crash", params={})
+
+
+@pytest.mark.asyncio
+async def test_restarts_and_reopens_documents():
+    supervisor = _supervisor()
+    await supervisor.start()
+    try:
+        await supervisor.documents.open("file:///a.py", "python", "a = 1\n")
+        await supervisor.documents.open("file:///b.py", "python", "b = 2\n")
+        await supervisor.documents.close("file:///b.py")
+        first = supervisor.process
+
+        with pytest.raises(ConnectionResetError):
+            await supervisor.request(BaseRequest(method="bench/crash", params={}))
+
+        assert await supervisor.request(_documents(), timeout=5) == ["file:///a.py"]
+        assert supervisor.restarts == 1
+        assert first.returncode is not None
+        assert supervisor.process is not first
+        assert supervisor.server_capabilities["hoverProvider"] is True
+        assert supervisor.documents.client is supervisor.client
+    finally:
+        await supervisor.shutdown(5)
+
+
+@pytest.mark.asyncio
+async def test_document_changes_wait_for_the_restarted_server():
+    supervisor = _supervisor()
+    await supervisor.start()
+    sent = []
+
+    async def on_restart(client):
+        send_notification = client.send_notification
+
+        async def record(notification):
+            sent.append(notification)
+            await send_notification(notification)
+
+        client.send_notification = record
+
+    supervisor.on_restart = on_restart
+    try:
+        await supervisor.documents.open("file:///a.py", "python", "a = 1\n")
+        await supervisor.send_notification(_crash())
+        while supervisor._ready.is_set():
+            await asyncio.sleep(0.01)
+
+        change = asyncio.ensure_future(
+            supervisor.documents.change("file:///a.py", "a = 2\n")
+        )
+        await asyncio.sleep(0)
+        assert not change.done()
+
+        await asyncio.wait_for(change, 5)
+        assert [
+            (n["method"], n["params"]["textDocument"]["version"]) for n in sent
+        ] == [("textDocument/didChange", 1)]
+        assert await supervisor.request(_documents(), timeout=5) == ["file:///a.py"]
+    finally:
+        await supervisor.shutdown(5)
+
+
+@pytest.mark.asyncio
+async def test_read_only_requests_are_retried():
+    supervisor = _supervisor()
+    await supervisor.start()
+    try:
+        await supervisor.send_notification(_crash())
+        hover = await supervisor.request(run._hover(), timeout=5)
+
+        assert hover["contents"]["kind"] == "plaintext"
+        assert supervisor.restarts == 1
+    finally:
+        await supervisor.shutdown(5)
+
+
+@pytest.mark.asyncio
+async def test_on_restart_runs_before_requests():
+    supervisor = _supervisor()
+    await supervisor.start()
+    restarted = []
+
+    async def on_restart(client):
+        restarted.append(client)
+
+    supervisor.on_restart = on_restart
+    try:
+        await supervisor.send_notification(_crash())
+        await supervisor.request(_documents(), timeout=5)
+
+        assert restarted == [supervisor.client]
+    finally:
+        await supervisor.shutdown(5)
+
+
+@pytest.mark.asyncio
+async def test_gives_up_when_restarts_keep_failing():
+    supervisor = _supervisor()
+    await supervisor.start()
+    try:
+        supervisor.cmd = ("/nonexistent/language-server",)
+        await supervisor.send_notification(_crash())
+
+        with pytest.raises(ConnectionError, match="Gave up"):
+            await supervisor.request(_documents(), timeout=5)
+        assert supervisor.restarts == 0
+    finally:
+        await supervisor.close()
+
+
+@pytest.mark.asyncio
+async def test_fails_over_to_warm_standby():
+    supervisor = _supervisor(warm_standby=True)
+    await supervisor.start()
+    try:
+        standby = await asyncio.wait_for(supervisor._standby, 5)
+        await supervisor.documents.open("file:///a.py", "python", "a = 1\n")
+
+        await supervisor.send_notification(_crash())
+        assert await supervisor.request(_documents(), timeout=5) == ["file:///a.py"]
+
+        assert supervisor.process is standby.process
+        # A new standby is started to take over the next time.
+        assert supervisor._standby is not None
+        assert await asyncio.wait_for(supervisor._standby, 5) is not standby
+    finally:
+        await supervisor.shutdown(5)
+    assert standby.process.returncode is not None
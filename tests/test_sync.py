@@ -0,0 +1,84 @@
+import concurrent.futures
+import os
+import sys
+import threading
+
+import pytest
+
+from lsp_client.protocol import BaseRequest, InitializeParams, ResponseError
+from lsp_client.sync import SyncLSPClient
+
+FAKE_SERVER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "benchmarks",
+    "fake_server.py",
+)
+
+
+def _echo(value):
+    return BaseRequest(method="bench/echo", params={"value": value})
+
+
+@pytest.fixture
+def client():
+    client = SyncLSPClient.from_command(sys.executable, FAKE_SERVER)
+    client.initialize(InitializeParams(rootUri="file:///workspace"))
+    yield client
+    client.shutdown(timeout=10)
+
+
+def test_blocking_requests_from_many_threads(client):
+    assert client.server_capabilities["hoverProvider"] is True
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(lambda i: client.request(_echo(i), timeout=10), range(200))
+        )
+
+    assert results == [{"value": i} for i in range(200)]
+    assert client.client.pending_count == 0
+
+
+def test_request_futures_are_pipelined(client):
+    futures = [client.request_future(_echo(i)) for i in range(50)]
+
+    done, _ = concurrent.futures.wait(futures, timeout=10)
+    assert len(done) == 50
+    assert sorted(f.result()["value"] for f in futures) == list(range(50))
+
+
+def test_calls_from_loop_thread_are_rejected(client):
+    errors = []
+
+    def call():
+        try:
+            client.flush()
+        except RuntimeError as e:
+            errors.append(e)
+
+    client.loop.call_soon_threadsafe(call)
+    client.flush()
+    assert len(errors) == 1
+
+
+def test_shutdown_stops_server_and_thread():
+    client = SyncLSPClient.from_command(sys.executable, FAKE_SERVER)
+    with client:
+        assert client.request(_echo(1), timeout=10) == {"value": 1}
+
+    assert client.process.returncode == 0
+    assert not client.thread.is_alive()
+    assert client.loop.is_closed()
+    client.close()
+
+
+def test_factory_errors_propagate():
+    def fail():
+        raise ResponseError(1, "failed")
+
+    async def factory():
+        fail()
+
+    with pytest.raises(ResponseError):
+        SyncLSPClient.start(factory, name="failing-factory")
+    assert "failing-factory" not in [t.name for t in threading.enumerate()]
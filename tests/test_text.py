@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from lsp_client.protocol import Position, PositionEncodingKind, Range
+from lsp_client.text import TextBuffer
+
+UTF8 = PositionEncodingKind.UTF8
+UTF16 = PositionEncodingKind.UTF16
+UTF32 = PositionEncodingKind.UTF32
+
+
+def test_line_index_recognises_all_line_endings():
+    buffer = TextBuffer("a\nb\r\nc\rd")
+    assert buffer.line_count == 4
+    assert [buffer.line_start(line) for line in range(4)] == [0, 2, 5, 7]
+    assert buffer.line_end(1) == 3
+    assert buffer.line_at(6) == 2
+
+
+@pytest.mark.parametrize("encoding, character", [(UTF16, 4), (UTF8, 7), (UTF32, 3)])
+def test_position_conversion_per_encoding(encoding, character):
+    # "é" is 2 UTF-8 units, "😀" is 2 UTF-16 units and 4 UTF-8 units.
+    buffer = TextBuffer("x = 1\né😀b\n")
+    offset = buffer.line_start(1) + 3
+
+    position = buffer.position_at(offset, encoding)
+
+    assert position == Position(line=1, character=character)
+    assert buffer.offset_at(position, encoding) == offset
+
+
+def test_offset_at_clamps_to_line_and_text():
+    buffer = TextBuffer("ab\r\ncd")
+    assert buffer.offset_at(Position(line=0, character=10)) == 2
+    assert buffer.offset_at(Position(line=5, character=0)) == 6
+
+
+def test_offset_inside_surrogate_pair_resolves_to_character_start():
+    buffer = TextBuffer("😀a")
+    assert buffer.offset_at(Position(line=0, character=1)) == 0
+
+
+def test_apply_change_range_and_full():
+    buffer = TextBuffer("hello\nworld\n")
+    buffer.apply_change(
+        "there",
+        Range(start=Position(line=1, character=0), end=Position(line=1, character=5)),
+    )
+    assert buffer.text == "hello\nthere\n"
+
+    buffer.apply_change("a\nb")
+    assert buffer.text == "a\nb"
+    assert buffer.line_count == 2
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_replace_keeps_line_index_consistent(seed):
+    rng = random.Random(seed)
+    alphabet = "ab\r\n"
+    buffer = TextBuffer("".join(rng.choice(alphabet) for _ in range(40)))
+    for _ in range(10):
+        start = rng.randint(0, len(buffer.text))
+        end = rng.randint(start, len(buffer.text))
+        inserted = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))
+        buffer.replace(start, end, inserted)
+
+        expected = TextBuffer(buffer.text)
+        assert [buffer.line_start(i) for i in range(buffer.line_count)] == [
+            expected.line_start(i) for i in range(expected.line_count)
+        ]
+
+
+def test_position_encoding_from_server_capabilities():
+    from_caps = PositionEncodingKind.from_server_capabilities
+    assert from_caps({"positionEncoding": "utf-8"}) == UTF8
+    assert from_caps({}) == UTF16
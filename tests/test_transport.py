@@ -0,0 +1,172 @@
+import asyncio
+import json
+import socket
+from unittest.mock import AsyncMock
+
+import pytest
+
+from lsp_client.client import LSPClient
+from lsp_client.framing import FrameParser
+from lsp_client.protocol import BaseRequest, InitializeRequest
+from lsp_client.transport import (
+    ReconnectPolicy,
+    SocketOptions,
+    TcpTransport,
+    Transport,
+    UnixTransport,
+)
+
+
+class EchoServer(object):
+    """Answers every request with its params; drops a connection on request."""
+
+    def __init__(self):
+        self.connections = 0
+        self.writers = []
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.writers.append(writer)
+        parser = FrameParser()
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            parser.feed(data)
+            while (frame := parser.next_frame()) is not None:
+                message = json.loads(frame.body)
+                if message.get("method") == "test/drop":
+                    writer.close()
+                    return
+                if "id" in message:
+                    body = json.dumps(
+                        {"jsonrpc": "2.0", "id": message["id"], "result": "ok"}
+                    ).encode()
+                    writer.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+        writer.close()
+
+
+async def _round_trip(client):
+    listener = asyncio.create_task(client.listen())
+    try:
+        return await client.request(InitializeRequest(), timeout=5)
+    finally:
+        listener.cancel()
+
+
+@pytest.mark.asyncio
+async def test_from_tcp():
+    echo = EchoServer()
+    server = await asyncio.start_server(echo.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        client = await LSPClient.from_tcp(
+            "127.0.0.1",
+            port,
+            AsyncMock(),
+            socket_options=SocketOptions(send_buffer=1 << 17),
+        )
+        assert await _round_trip(client) == "ok"
+        sock = client.stdin.get_extra_info("socket")
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        client.stdin.close()
+
+
+@pytest.mark.asyncio
+async def test_from_socket(tmp_path):
+    echo = EchoServer()
+    path = str(tmp_path / "server.sock")
+    server = await asyncio.start_unix_server(echo.handle, path)
+    async with server:
+        client = await LSPClient.from_socket(path, AsyncMock())
+        assert await _round_trip(client) == "ok"
+        client.stdin.close()
+
+
+@pytest.mark.asyncio
+async def test_connect_retries_then_fails(tmp_path):
+    transport = UnixTransport(
+        str(tmp_path / "missing.sock"),
+        ReconnectPolicy(max_attempts=3, initial_delay=0.001),
+    )
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        sleeps.append(delay)
+        await real_sleep(0)
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(asyncio, "sleep", sleep)
+        with pytest.raises(OSError):
+            await transport.connect()
+    assert sleeps == [0.001, 0.002]
+
+
+def test_reconnect_policy_delays():
+    policy = ReconnectPolicy(max_attempts=5, initial_delay=1, max_delay=3)
+    assert list(policy.delays()) == [1, 2, 3, 3]
+    assert list(ReconnectPolicy(max_attempts=1).delays()) == []
+
+
+@pytest.mark.asyncio
+async def test_listen_backs_off_and_gives_up_on_connections_closed_at_once():
+    connections = 0
+
+    async def reject(reader, writer):
+        nonlocal connections
+        connections += 1
+        writer.close()
+
+    server = await asyncio.start_server(reject, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        client = await LSPClient.from_tcp(
+            "127.0.0.1",
+            port,
+            AsyncMock(),
+            reconnect_policy=ReconnectPolicy(max_attempts=4, initial_delay=0.02),
+        )
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.wait_for(client.listen(), 5)
+        elapsed = loop.time() - started
+        client.stdin.close()
+
+    # The first connection and one per delay of the policy.
+    assert connections == 4
+    assert elapsed >= 0.02 + 0.04 + 0.08
+
+
+@pytest.mark.asyncio
+async def test_listen_reconnects_and_fails_pending_requests():
+    echo = EchoServer()
+    server = await asyncio.start_server(echo.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reconnected = asyncio.Event()
+
+    async def on_reconnect():
+        reconnected.set()
+
+    async with server:
+        client = await LSPClient.from_transport(
+            TcpTransport("127.0.0.1", port, ReconnectPolicy(initial_delay=0.01)),
+            AsyncMock(),
+        )
+        client.on_reconnect = on_reconnect
+        listener = asyncio.create_task(client.listen())
+        # The server drops the connection instead of answering.
+        dropped = await client.send_request(BaseRequest(method="test/drop", params={}))
+        with pytest.raises(ConnectionResetError):
+            await asyncio.wait_for(dropped, 5)
+        await asyncio.wait_for(reconnected.wait(), 5)
+
+        assert await client.request(InitializeRequest(), timeout=5) == "ok"
+        assert echo.connections == 2
+        listener.cancel()
+        client.stdin.close()
+
+
+def test_transport_requires_open():
+    with pytest.raises(TypeError):
+        Transport()  # type: ignore[abstract]
@@ -0,0 +1,106 @@
+import threading
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+from lsp_client.client import LSPClient
+from lsp_client.documents import DocumentManager
+from lsp_client.workspace import (
+    OpenProgress,
+    expand_paths,
+    language_id_for,
+    open_files,
+)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("a = 1\n")
+    (tmp_path / "pkg" / "b.py").write_bytes(b"b = '\xff'\r\n")
+    (tmp_path / "README.md").write_text("# readme\n")
+    return tmp_path
+
+
+def test_expand_paths(workspace):
+    assert expand_paths(["**/*.py", "pkg/a.py"], root=str(workspace)) == [
+        str(workspace / "pkg" / "a.py"),
+        str(workspace / "pkg" / "b.py"),
+    ]
+    assert expand_paths([str(workspace / "missing")]) == []
+
+
+def test_language_id_for():
+    assert language_id_for("x/y.PY") == "python"
+    assert language_id_for("Makefile") == "plaintext"
+
+
+@pytest.mark.asyncio
+async def test_open_files(workspace):
+    client = LSPClient(None, None, AsyncMock())
+    client._send_request = AsyncMock()
+    manager = DocumentManager(client)
+    reports = []
+
+    documents = await open_files(
+        manager, ["**/*"], root=str(workspace), concurrency=2, progress=reports.append
+    )
+
+    uris = sorted(document.uri for document in documents)
+    assert uris == sorted(manager.documents)
+    assert len(uris) == 3
+    b = manager.get((workspace / "pkg" / "b.py").as_uri())
+    assert b.language_id == "python"
+    assert b.text == "b = '�'\r\n"
+    sent = [call.args[0] for call in client._send_request.call_args_list]
+    assert {message["method"] for message in sent} == {"textDocument/didOpen"}
+    assert reports[-1] == OpenProgress(
+        3,
+        0,
+        3,
+        sum(
+            path.stat().st_size for path in Path(workspace).rglob("*") if path.is_file()
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_unreadable_files_are_skipped(workspace, monkeypatch):
+    client = LSPClient(None, None, AsyncMock())
+    client._send_request = AsyncMock()
+    manager = DocumentManager(client)
+    reports = []
+
+    def fail(path, encoding):
+        raise PermissionError(path)
+
+    monkeypatch.setattr("lsp_client.workspace._read", fail)
+    documents = await open_files(
+        manager, ["README.md"], root=str(workspace), progress=reports.append
+    )
+
+    assert documents == []
+    assert reports == [OpenProgress(0, 1, 1, 0)]
+    assert manager.documents == {}
+
+
+@pytest.mark.asyncio
+async def test_patterns_are_expanded_off_the_event_loop(workspace, monkeypatch):
+    manager = DocumentManager(AsyncMock())
+    threads = []
+
+    def expand(patterns, root=None):
+        threads.append(threading.current_thread())
+        return []
+
+    monkeypatch.setattr("lsp_client.workspace.expand_paths", expand)
+
+    assert await open_files(manager, ["**/*"], root=str(workspace)) == []
+    assert threads and threads[0] is not threading.main_thread()
+
+
+@pytest.mark.asyncio
+async def test_open_files_rejects_empty_concurrency(workspace):
+    with pytest.raises(ValueError):
+        await open_files(DocumentManager(AsyncMock()), ["**/*"], concurrency=0)
@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from lsp_client.writer import CoalescingWriter
+
+
+def _stream():
+    stream = MagicMock(spec=asyncio.StreamWriter)
+    stream.drain = AsyncMock()
+    return stream
+
+
+@pytest.mark.asyncio
+async def test_burst_written_once_per_tick_in_order():
+    stream = _stream()
+    writer = CoalescingWriter(stream)
+
+    for i in range(100):
+        assert writer.write(b"h%d" % i, b"b%d" % i) is False
+    stream.writelines.assert_not_called()
+
+    await asyncio.sleep(0)
+
+    stream.writelines.assert_called_once()
+    (buffers,) = stream.writelines.call_args.args
+    assert buffers == [x for i in range(100) for x in (b"h%d" % i, b"b%d" % i)]
+    assert writer.buffered_size == 0
+    stream.drain.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_threshold_writes_immediately():
+    stream = _stream()
+    writer = CoalescingWriter(stream, flush_threshold=8)
+
+    assert writer.write(b"1234") is False
+    assert writer.write(b"5678") is True
+    stream.writelines.assert_called_once_with([b"1234", b"5678"])
+
+    await asyncio.sleep(0)
+    stream.writelines.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_threshold_during_stream_waits_for_the_stream():
+    stream = _stream()
+    writer = CoalescingWriter(stream, flush_threshold=8)
+    piece_written = asyncio.Event()
+    resume = asyncio.Event()
+
+    async def drain():
+        piece_written.set()
+        await resume.wait()
+
+    stream.drain = AsyncMock(side_effect=drain)
+    streaming = asyncio.ensure_future(writer.write_stream([b"large"]))
+    await piece_written.wait()
+
+    assert writer.write(b"1234") is False
+    assert writer.write(b"5678") is True
+    flushed = asyncio.ensure_future(writer.flush())
+    await asyncio.sleep(0)
+    assert not flushed.done()
+    stream.writelines.assert_not_called()
+
+    resume.set()
+    await asyncio.gather(streaming, flushed)
+    stream.write.assert_called_once_with(b"large")
+    stream.writelines.assert_called_once_with([b"1234", b"5678"])
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_and_drains():
+    stream = _stream()
+    writer = CoalescingWriter(stream)
+
+    writer.write(b"abc")
+    await writer.flush()
+
+    stream.writelines.assert_called_once_with([b"abc"])
+    stream.drain.assert_awaited_once()